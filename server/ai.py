@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from services.ai_service import ai_service
 from services.finance_service import finance_service
+from services.metrics import ai_stage_latency
+from utils.intent import INTENT_PRICE, classify_query
 import time
 
 router = APIRouter()
@@ -18,9 +20,12 @@ class QueryResponse(BaseModel):
 async def ask_question(request: QueryRequest):
     try:
         start_time = time.time()
+        intent = classify_query(request.query)
         
-        # Search for financial information
-        search_results = await finance_service.search_financial_info(request.query)
+        # Search for financial information (price lookups are answered from market data alone)
+        search_results = {}
+        if intent['intent'] != INTENT_PRICE:
+            search_results = await finance_service.search_financial_info(request.query)
         
         # Process search results
         context = ""
@@ -44,7 +49,7 @@ async def ask_question(request: QueryRequest):
         key_data = []
         
         # Extract price information if available
-        if "bitcoin" in request.query.lower() or "btc" in request.query.lower():
+        if 'bitcoin' in intent['coins']:
             from services.crypto_service import crypto_service
             btc_data = await crypto_service.get_bitcoin_price()
             if btc_data:
@@ -56,6 +61,7 @@ async def ask_question(request: QueryRequest):
                 ])
         
         response_time = time.time() - start_time
+        ai_stage_latency.observe(response_time, 'total')
         
         return QueryResponse(
             summary=ai_response,
@@ -0,0 +1,18 @@
+"""Load-testing harness for the API against local stub upstreams.
+
+Starts stub CoinGecko, Alpha Vantage, Finnhub, CoinMarketCap,
+CurrencyLayer, Serper, NewsAPI and AIMLAPI servers, launches the app with
+its upstream URLs pointed at them, drives the main endpoints at set
+concurrency levels and compares the results with a stored baseline.
+
+Run from the server directory:
+
+    python -m bench.run --profile realistic --concurrency 1,10,50
+    python -m bench.run --save-baseline bench/baseline.json
+    python -m bench.run --baseline bench/baseline.json
+
+bench/baseline.json holds a default run (realistic profile, concurrency
+1,10,50, 200 requests per level). Latency and throughput are only
+comparable on the machine that recorded them, so re-record it before
+comparing elsewhere; upstream call and error counts carry over.
+"""
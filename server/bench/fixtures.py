@@ -0,0 +1,204 @@
+"""Upstream responses for the stub servers.
+
+Responses are generated deterministically in each upstream's wire format.
+A recorded response saved as `<route>.json` in a fixtures directory is
+replayed instead (see ROUTES for the route names).
+"""
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+COINS = [
+    ('bitcoin', 'btc', 'Bitcoin', 65000.0), ('ethereum', 'eth', 'Ethereum', 3400.0),
+    ('tether', 'usdt', 'Tether', 1.0), ('binancecoin', 'bnb', 'BNB', 580.0),
+    ('solana', 'sol', 'Solana', 150.0), ('ripple', 'xrp', 'XRP', 0.52),
+    ('cardano', 'ada', 'Cardano', 0.45), ('dogecoin', 'doge', 'Dogecoin', 0.15),
+    ('polkadot', 'dot', 'Polkadot', 7.0), ('chainlink', 'link', 'Chainlink', 14.0)
+]
+
+STOCKS = {
+    'AAPL': 190.0, 'MSFT': 420.0, 'GOOGL': 170.0, 'AMZN': 180.0, 'TSLA': 175.0,
+    'META': 480.0, 'NVDA': 880.0, 'JPM': 195.0, 'V': 275.0, 'WMT': 60.0
+}
+
+USD_RATES = {'EUR': 0.92, 'GBP': 0.79, 'JPY': 151.0, 'CAD': 1.36, 'AUD': 1.52}
+
+# Route name -> (upstream, method, path under the upstream's stub prefix)
+ROUTES = {
+    'coingecko_markets': ('coingecko', 'GET', '/coins/markets'),
+    'coingecko_market_chart': ('coingecko', 'GET', '/coins/{coin_id}/market_chart'),
+    'coingecko_market_chart_range': ('coingecko', 'GET', '/coins/{coin_id}/market_chart/range'),
+    'coingecko_simple_price': ('coingecko', 'GET', '/simple/price'),
+    'alpha_vantage_query': ('alpha_vantage', 'GET', ''),
+    'finnhub_quote': ('finnhub', 'GET', '/quote'),
+    'coinmarketcap_listings': ('coinmarketcap', 'GET', '/cryptocurrency/listings/latest'),
+    'currencylayer_live': ('currencylayer', 'GET', '/live'),
+    'serper_search': ('serper', 'POST', ''),
+    'newsapi_everything': ('newsapi', 'GET', ''),
+    'aimlapi_completions': ('aimlapi', 'POST', '')
+}
+
+def _coins(limit: int) -> List[tuple]:
+    coins = list(COINS)
+    for i in range(len(coins), limit):
+        coins.append((f'coin-{i}', f'c{i}', f'Coin {i}', 10.0 / (i + 1)))
+    return coins[:limit]
+
+def _drift(price: float, key: str) -> float:
+    """Small per-minute price movement so refreshed snapshots differ like live data"""
+    rng = random.Random(f"{key}:{int(time.time() // 60)}")
+    return price * (1 + rng.uniform(-0.01, 0.01))
+
+def coingecko_markets(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    return [{
+        'id': coin_id,
+        'symbol': symbol,
+        'name': name,
+        'current_price': _drift(price, coin_id),
+        'price_change_percentage_24h': random.Random(coin_id).uniform(-5, 5),
+        'total_volume': price * 1e6,
+        'market_cap': price * 1e7,
+        'market_cap_rank': rank + 1
+    } for rank, (coin_id, symbol, name, price) in enumerate(_coins(int(query.get('per_page', 100))))]
+
+def _chart(coin_id: str, start_ms: int, end_ms: int, step_ms: int) -> Dict:
+    price = dict((c[0], c[3]) for c in COINS).get(coin_id, 10.0)
+    start_ms -= start_ms % step_ms
+    prices = [[t, price * (1 + 0.05 * math.sin(t / 86400000))] for t in range(start_ms, end_ms, step_ms)]
+    return {
+        'prices': prices,
+        'market_caps': [[t, p * 1e7] for t, p in prices],
+        'total_volumes': [[t, p * 1e6] for t, p in prices]
+    }
+
+def coingecko_market_chart(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    days = float(query.get('days', 1))
+    step_ms = 300000 if days <= 1 else 3600000 if days <= 90 else 86400000
+    end_ms = int(time.time() * 1000)
+    return _chart(path['coin_id'], end_ms - int(days * 86400000), end_ms, step_ms)
+
+def coingecko_market_chart_range(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    start, end = int(query['from']), int(query['to'])
+    span = end - start
+    step_ms = 300000 if span <= 86400 else 3600000 if span <= 90 * 86400 else 86400000
+    return _chart(path['coin_id'], start * 1000, end * 1000, step_ms)
+
+def coingecko_simple_price(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    return {'bitcoin': {
+        'usd': _drift(65000.0, 'bitcoin'),
+        'usd_24h_change': 1.2,
+        'usd_24h_vol': 3.5e10,
+        'usd_market_cap': 1.28e12
+    }}
+
+def _stock_quote(symbol: str) -> Dict:
+    price = _drift(STOCKS.get(symbol, 100.0), symbol)
+    return {'price': price, 'change': price * 0.01, 'volume': 1000000}
+
+def alpha_vantage_query(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    if query.get('function') == 'REALTIME_BULK_QUOTES':
+        data = []
+        for symbol in query.get('symbol', '').split(','):
+            quote = _stock_quote(symbol)
+            data.append({
+                'symbol': symbol, 'close': quote['price'], 'change': quote['change'],
+                'change_percent': '1.0', 'volume': quote['volume'],
+                'high': quote['price'] * 1.01, 'low': quote['price'] * 0.99, 'open': quote['price']
+            })
+        return {'data': data}
+
+    symbol = query.get('symbol', 'AAPL')
+    quote = _stock_quote(symbol)
+    return {'Global Quote': {
+        '01. symbol': symbol,
+        '02. open': str(quote['price']),
+        '03. high': str(quote['price'] * 1.01),
+        '04. low': str(quote['price'] * 0.99),
+        '05. price': str(quote['price']),
+        '06. volume': str(quote['volume']),
+        '09. change': str(quote['change']),
+        '10. change percent': '1.0%'
+    }}
+
+def finnhub_quote(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    quote = _stock_quote(query.get('symbol', 'AAPL'))
+    price = quote['price']
+    return {'c': price, 'd': quote['change'], 'dp': 1.0, 'h': price * 1.01, 'l': price * 0.99, 'o': price}
+
+def coinmarketcap_listings(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    return {'data': [{
+        'slug': coin_id,
+        'symbol': symbol.upper(),
+        'name': name,
+        'cmc_rank': rank + 1,
+        'quote': {'USD': {
+            'price': _drift(price, coin_id),
+            'percent_change_24h': 1.0,
+            'volume_24h': price * 1e6,
+            'market_cap': price * 1e7
+        }}
+    } for rank, (coin_id, symbol, name, price) in enumerate(_coins(int(query.get('limit', 100))))]}
+
+def currencylayer_live(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    currencies = [c for c in query.get('currencies', '').split(',') if c] or list(USD_RATES)
+    return {
+        'success': True,
+        'source': 'USD',
+        'quotes': {f"USD{c}": _drift(USD_RATES.get(c, 1.0), c) for c in currencies}
+    }
+
+def serper_search(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    q = (body or {}).get('q', 'finance')
+    return {'organic': [{
+        'title': f"{q.title()} explained ({i + 1})",
+        'snippet': f"Analysis and background on {q} from source {i + 1}.",
+        'link': f"https://example.com/search/{abs(hash(q)) % 100000}/{i}"
+    } for i in range(int((body or {}).get('num', 3)))]}
+
+def newsapi_everything(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    q = query.get('q', 'finance')
+    size = min(int(query.get('pageSize', 20)), 100)
+    now = time.time()
+    topic = q.split(' OR ')[0].strip('"').title()
+    return {'status': 'ok', 'totalResults': size, 'articles': [{
+        'title': f"{topic} market update {i + 1}",
+        'description': f"Coverage of {q} moves, bitcoin, stocks and the economy.",
+        'url': f"https://news.example.com/{abs(hash(q)) % 100000}/{i}",
+        'publishedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - i * 600)),
+        'source': {'name': f"Example Wire {i % 5}"}
+    } for i in range(size)]}
+
+COMPLETION = ("Here is an overview based on the latest market data and sources. "
+              "Prices have moved modestly over the past day; consider volatility, "
+              "diversification and your time horizon before acting.")
+
+def aimlapi_completions(query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+    return {'choices': [{'message': {'role': 'assistant', 'content': COMPLETION}}]}
+
+def aimlapi_stream_chunks() -> List[bytes]:
+    """The completion as OpenAI-compatible SSE chunks"""
+    chunks = [f"data: {json.dumps({'choices': [{'delta': {'content': word + ' '}}]})}\n\n".encode()
+              for word in COMPLETION.split()]
+    return chunks + [b"data: [DONE]\n\n"]
+
+GENERATORS = {name: globals()[name] for name in ROUTES}
+
+class Fixtures:
+    """Recorded responses where available, generated ones otherwise"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self._recorded: Dict[str, Any] = {}
+        if directory:
+            for name in ROUTES:
+                path = os.path.join(directory, f"{name}.json")
+                if os.path.exists(path):
+                    with open(path) as f:
+                        self._recorded[name] = json.load(f)
+
+    def response(self, name: str, query: Dict[str, str], body: Any, path: Dict[str, str]) -> Any:
+        if name in self._recorded:
+            return self._recorded[name]
+        return GENERATORS[name](query, body, path)
@@ -0,0 +1,253 @@
+"""Drive the API against stub upstreams and compare with a baseline.
+
+    python -m bench.run [--profile fast|realistic|degraded] [--concurrency 1,10,50]
+                        [--requests 200] [--scenarios market_data,crypto_symbol,chart,ai_ask]
+                        [--override coingecko.error_rate=0.2] [--fixtures DIR]
+                        [--baseline FILE] [--save-baseline FILE] [--output FILE]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+from .fixtures import Fixtures
+from .stubs import PROFILES, Profile, StubUpstreams
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CRYPTO_SYMBOLS = ['btc', 'eth', 'sol', 'xrp', 'ada', 'doge', 'bitcoin', 'ethereum']
+CHART_REQUESTS = [('bitcoin', 1), ('bitcoin', 7), ('ethereum', 30), ('solana', 90), ('bitcoin', 365)]
+AI_QUESTIONS = [
+    'What is the price of bitcoin?',
+    'Should I invest in index funds or individual stocks?',
+    'How do interest rates affect the stock market?',
+    'Explain what a crypto staking yield is',
+    'What is driving ethereum this week?'
+]
+
+# Scenario -> request sequence of (method, path, JSON body)
+SCENARIOS = {
+    'market_data': lambda: itertools.repeat(('GET', '/api/finance/market-data', None)),
+    'crypto_symbol': lambda: (('GET', f'/api/crypto/{symbol}', None) for symbol in itertools.cycle(CRYPTO_SYMBOLS)),
+    'chart': lambda: (('GET', f'/api/finance/crypto/chart/{coin}?days={days}', None)
+                      for coin, days in itertools.cycle(CHART_REQUESTS)),
+    'ai_ask': lambda: (('POST', '/api/ai/ask', {'query': question}) for question in itertools.cycle(AI_QUESTIONS))
+}
+
+# Relative change beyond which a metric counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (0-1) of unsorted values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and its children in MB (Linux /proc only)"""
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        if not total:
+            return None
+    return round(total / 1024, 1)
+
+async def drive(session: aiohttp.ClientSession, base_url: str, scenario: str,
+                concurrency: int, total: int) -> Tuple[List[float], int, float]:
+    """Send `total` requests from `concurrency` workers; returns latencies (s), error count and wall time"""
+    requests = SCENARIOS[scenario]()
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            issued += 1
+            method, path, body = next(requests)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, json=body) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+async def wait_ready(session: aiohttp.ClientSession, base_url: str, process, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.returncode is not None:
+            raise RuntimeError(f"App exited with code {process.returncode} before becoming ready")
+        try:
+            async with session.get(base_url + '/health') as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"App not ready after {timeout}s")
+
+async def run(args) -> Dict:
+    profiles = {upstream: Profile(p.latency, p.jitter, p.error_rate, p.throttle_rate)
+                for upstream, p in PROFILES[args.profile].items()}
+    for override in args.override:
+        target, _, value = override.partition('=')
+        upstream, _, field = target.partition('.')
+        setattr(profiles[upstream], field, float(value))
+
+    stubs = StubUpstreams(profiles, Fixtures(args.fixtures))
+    await stubs.start()
+
+    data_dir = tempfile.mkdtemp(prefix='bench-')
+    env = {
+        **os.environ,
+        **stubs.env_for(),
+        'BACKGROUND_REFRESH': 'true' if args.background_refresh else 'false',
+        # Every level reuses one client address, so lift the per-client AI quota out of the way
+        'FREE_QUERIES_PER_DAY': os.environ.get('FREE_QUERIES_PER_DAY', '1000000'),
+        'TIMESERIES_DB_PATH': os.path.join(data_dir, 'timeseries.db')
+    }
+    command = args.app_cmd.format(python=sys.executable, port=args.port).split()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=SERVER_DIR, env=env,
+        stdout=asyncio.subprocess.DEVNULL if not args.app_output else None,
+        stderr=asyncio.subprocess.DEVNULL if not args.app_output else None
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=max(args.concurrency))
+        timeout = aiohttp.ClientTimeout(total=args.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await wait_ready(session, base_url, process)
+            for scenario in args.scenarios:
+                # Warm caches and connection pools so levels measure steady state
+                await drive(session, base_url, scenario, 1, args.warmup)
+                for concurrency in args.concurrency:
+                    calls_before = dict(stubs.calls)
+                    latencies, errors, elapsed = await drive(session, base_url, scenario, concurrency, args.requests)
+                    calls = {upstream: count - calls_before.get(upstream, 0)
+                             for upstream, count in stubs.calls.items() if count - calls_before.get(upstream, 0)}
+                    results[f"{scenario}@{concurrency}"] = {
+                        'requests': args.requests,
+                        'errors': errors,
+                        'p50_ms': _ms(percentile(latencies, 0.50)),
+                        'p95_ms': _ms(percentile(latencies, 0.95)),
+                        'p99_ms': _ms(percentile(latencies, 0.99)),
+                        'rps': round(args.requests / elapsed, 1) if elapsed else None,
+                        'upstream_calls': calls,
+                        'rss_mb': rss_mb(process.pid)
+                    }
+                    _print_result(f"{scenario}@{concurrency}", results[f"{scenario}@{concurrency}"])
+    finally:
+        process.terminate()
+        await process.wait()
+        await stubs.stop()
+
+    return {
+        'profile': args.profile,
+        'overrides': args.override,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'upstreams': stubs.snapshot(),
+        'results': results
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of current results against a baseline, one line each"""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        for field in ('p50_ms', 'p95_ms', 'p99_ms', 'rss_mb'):
+            if result.get(field) and base.get(field) and result[field] > base[field] * (1 + tolerance):
+                regressions.append(f"{name}: {field} {base[field]} -> {result[field]}")
+        if result.get('rps') and base.get('rps') and result['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {result['rps']}")
+        if result['errors'] > base['errors'] + result['requests'] * 0.01:
+            regressions.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+        calls, base_calls = sum(result['upstream_calls'].values()), sum(base['upstream_calls'].values())
+        if calls > base_calls * (1 + tolerance) + 1:
+            regressions.append(f"{name}: upstream calls {base_calls} -> {calls}")
+    return regressions
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+def _print_result(name: str, result: Dict) -> None:
+    calls = ', '.join(f"{upstream}={count}" for upstream, count in sorted(result['upstream_calls'].items())) or '-'
+    print(f"{name:<22} p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+          f"rps={result['rps']} errors={result['errors']} rss={result['rss_mb']}MB upstream[{calls}]")
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='realistic')
+    parser.add_argument('--override', action='append', default=[],
+                        help="Profile field for one upstream, e.g. coingecko.latency=500 or serper.error_rate=0.1")
+    parser.add_argument('--fixtures', help="Directory of recorded <route>.json responses to replay")
+    parser.add_argument('--scenarios', type=_csv, default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=lambda v: [int(c) for c in _csv(v)], default=[1, 10, 50])
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--app-cmd', default='{python} -m uvicorn main:app --port {port} --log-level warning',
+                        help="Command starting the app ({python} and {port} are substituted)")
+    parser.add_argument('--app-output', action='store_true', help="Show the app's stdout/stderr")
+    parser.add_argument('--background-refresh', action='store_true',
+                        help="Keep the app's background refresh loops on (adds upstream calls between levels)")
+    parser.add_argument('--baseline', help="Compare against this results file; exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--save-baseline', help="Write the results here as the new baseline")
+    parser.add_argument('--output', help="Write the results here")
+    args = parser.parse_args()
+
+    unknown = [scenario for scenario in args.scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
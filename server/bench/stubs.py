@@ -0,0 +1,131 @@
+"""Local stub upstreams with configurable latency, error and throttle profiles.
+
+Every upstream is served from one aiohttp server under its own prefix
+(e.g. /coingecko/coins/markets), and env_for() gives the app settings that
+point it there.
+"""
+import asyncio
+import json
+import random
+from collections import Counter
+from typing import Dict, Optional
+from aiohttp import web
+from .fixtures import ROUTES, Fixtures, aimlapi_stream_chunks
+
+# Settings (env var) holding each upstream's base URL
+UPSTREAM_SETTINGS = {
+    'coingecko': 'COINGECKO_API',
+    'alpha_vantage': 'ALPHA_VANTAGE_API',
+    'finnhub': 'FINNHUB_API',
+    'coinmarketcap': 'COINMARKETCAP_API',
+    'currencylayer': 'CURRENCYLAYER_API',
+    'serper': 'SERPER_URL',
+    'newsapi': 'NEWSAPI_URL',
+    'aimlapi': 'AIMLAPI_URL'
+}
+
+class Profile:
+    """Response behaviour of one stub upstream; latencies in milliseconds"""
+
+    __slots__ = ('latency', 'jitter', 'error_rate', 'throttle_rate')
+
+    def __init__(self, latency: float = 0, jitter: float = 0, error_rate: float = 0, throttle_rate: float = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+
+    def delay(self) -> float:
+        return max(0.0, random.gauss(self.latency, self.jitter)) / 1000
+
+def _profiles(latencies: Dict[str, float], jitter: float = 0.2,
+              error_rate: float = 0, throttle_rate: float = 0) -> Dict[str, Profile]:
+    return {upstream: Profile(latency, latency * jitter, error_rate, throttle_rate)
+            for upstream, latency in latencies.items()}
+
+REALISTIC_LATENCY = {
+    'coingecko': 120, 'alpha_vantage': 250, 'finnhub': 100, 'coinmarketcap': 150,
+    'currencylayer': 120, 'serper': 400, 'newsapi': 300, 'aimlapi': 2000
+}
+
+PROFILES = {
+    'fast': _profiles({upstream: 0 for upstream in UPSTREAM_SETTINGS}),
+    'realistic': _profiles(REALISTIC_LATENCY),
+    'degraded': _profiles({upstream: latency * 3 for upstream, latency in REALISTIC_LATENCY.items()},
+                          jitter=0.5, error_rate=0.05, throttle_rate=0.05)
+}
+
+class StubUpstreams:
+    """Serves every upstream's routes and counts the calls each one receives"""
+
+    def __init__(self, profiles: Dict[str, Profile], fixtures: Optional[Fixtures] = None):
+        self.profiles = profiles
+        self.fixtures = fixtures or Fixtures()
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.throttles: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+        self.app = web.Application()
+        for name, (upstream, method, path) in ROUTES.items():
+            self.app.router.add_route(method, f"/{upstream}{path}", self._handler(name, upstream))
+
+    def _handler(self, name: str, upstream: str):
+        async def handle(request: web.Request) -> web.StreamResponse:
+            self.calls[upstream] += 1
+            profile = self.profiles.get(upstream, Profile())
+            await asyncio.sleep(profile.delay())
+
+            roll = random.random()
+            if roll < profile.error_rate:
+                self.errors[upstream] += 1
+                return web.json_response({'error': 'stub upstream error'}, status=503)
+            if roll < profile.error_rate + profile.throttle_rate:
+                self.throttles[upstream] += 1
+                if upstream == 'alpha_vantage':
+                    # Alpha Vantage signals throttling in a 200 body
+                    return web.json_response({'Note': 'API call frequency exceeded (stub)'})
+                return web.json_response({'error': 'rate limited'}, status=429, headers={'Retry-After': '1'})
+
+            body = None
+            if request.method == 'POST' and request.can_read_body:
+                body = json.loads(await request.read() or b'null')
+
+            if upstream == 'aimlapi' and body and body.get('stream'):
+                return await self._stream_completion(request)
+
+            data = self.fixtures.response(name, dict(request.query), body, dict(request.match_info))
+            return web.json_response(data)
+        return handle
+
+    async def _stream_completion(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        for chunk in aimlapi_stream_chunks():
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def env_for(self, host: str = '127.0.0.1') -> Dict[str, str]:
+        """App settings pointing every upstream at this server"""
+        return {setting: f"http://{host}:{self.port}/{upstream}" for upstream, setting in UPSTREAM_SETTINGS.items()}
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {
+            'calls': dict(self.calls),
+            'errors': dict(self.errors),
+            'throttles': dict(self.throttles)
+        }
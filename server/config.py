@@ -4,29 +4,183 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
+    # Upstream endpoints (overridable, e.g. to point the benchmark harness at local stubs)
+    COINGECKO_API = os.getenv("COINGECKO_API", "https://api.coingecko.com/api/v3")
+    FINNHUB_API = os.getenv("FINNHUB_API", "https://finnhub.io/api/v1")
+    COINMARKETCAP_API = os.getenv("COINMARKETCAP_API", "https://pro-api.coinmarketcap.com/v1")
+    CURRENCYLAYER_API = os.getenv("CURRENCYLAYER_API", "http://api.currencylayer.com")
+    ALPHA_VANTAGE_API = os.getenv("ALPHA_VANTAGE_API", "https://www.alphavantage.co/query")
+    SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+    NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+    AIMLAPI_URL = os.getenv("AIMLAPI_URL", "https://api.aimlapi.com/v1/chat/completions")
+
     # API Keys
-    COINGECKO_API = "https://api.coingecko.com/api/v3"
     ALPHA_VANTAGE_KEY = os.getenv("ALPHA_VANTAGE_KEY", "J4JR4K6HSSRZI0XQ")
     NEWS_API_KEY = os.getenv("NEWS_API_KEY", "2a23841bd725419c8879a162aba88d0f")
     FRED_API_KEY = os.getenv("FRED_API_KEY", "f17ce42fa92ba97d74fa58962176a4c0")
     AIMLAPI_KEY = os.getenv("AIMLAPI_KEY", "66d901f08be441119a4cfda40d4089e1")
     SERPER_API = os.getenv("SERPER_API", "1c06f769b862ff008429dc55a4873d1b91e76c0a")
     
+    # Comma-separated list to spread stock quotes over several Alpha Vantage keys
+    ALPHA_VANTAGE_KEYS = [key for key in os.getenv("ALPHA_VANTAGE_KEYS", ALPHA_VANTAGE_KEY).split(",") if key]
+    
     # Fallback APIs
     FINNHUB_KEY = os.getenv("FINNHUB_KEY", "d34oho9r01qhorbf1uqgd34oho9r01qhorbf1ur0")
     COINMARKETCAP_KEY = os.getenv("COINMARKETCAP_KEY", "425ba6fa-9653-4518-80e2-670c889d38a2")
     CURRENCYLAYER_KEY = os.getenv("CURRENCYLAYER_KEY", "22bd072872251a32787e8ab6ec5f2de1")
     
     # App Settings
-    FREE_QUERIES_PER_DAY = 100
+    FREE_QUERIES_PER_DAY = int(os.getenv("FREE_QUERIES_PER_DAY", "100"))
+    # Admission Control: questions that need the LLM count against a per-client quota over a sliding
+    # QUOTA_WINDOW (seconds); price lookups and cached answers are free. At most AI_LLM_CONCURRENCY
+    # completions run at once, and LLM-bound questions are shed with 503 when the expected wait for one
+    # exceeds AI_QUEUE_BUDGET seconds (AI_LLM_EXPECTED_SECONDS seeds the average call duration)
+    QUOTA_WINDOW = 86400
+    QUOTA_MAX_CLIENTS = 100000
+    AI_LLM_CONCURRENCY = int(os.getenv("AI_LLM_CONCURRENCY", "8"))
+    AI_QUEUE_BUDGET = float(os.getenv("AI_QUEUE_BUDGET", "10"))
+    AI_LLM_EXPECTED_SECONDS = 5.0
+    # Key quotas on the first X-Forwarded-For address (only behind a proxy that sets it)
+    ADMISSION_TRUST_FORWARDED = os.getenv("ADMISSION_TRUST_FORWARDED", "false").lower() == "true"
+    # Seconds the AI pipeline waits for search and market context before prompting without the stragglers
+    AI_CONTEXT_BUDGET = float(os.getenv("AI_CONTEXT_BUDGET", "2.5"))
+    # Reuse the answer to a recent question whose normalized tokens overlap at least this much
+    AI_SIMILARITY_THRESHOLD = 0.8
+    AI_SIMILARITY_INDEX_SIZE = 1000
+    # Batch research: questions answered at once per batch, and seconds each may take once started
+    AI_BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+    AI_BATCH_ITEM_TIMEOUT = 30
+    # Size of the single cached CoinGecko markets pull every crypto list is sliced from
+    CRYPTO_TOP_N = 250
     CACHE_DURATION = {
         'crypto': 300,
         'forex': 300,
         'stocks': 120,
-        'bitcoin': 60
+        'bitcoin': 60,
+        'search': 600,
+        'ai': 600,
+        'news': 600,
+        'default': 300
     }
-    
+    # How long past its TTL a market snapshot may still be served while it refreshes
+    CACHE_STALE_DURATION = {
+        'crypto': 900,
+        'forex': 900,
+        'stocks': 600,
+        'bitcoin': 300
+    }
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_SWEEP_INTERVAL = 60
+    # Cache backend: "memory" (per process), "redis" (shared) or "tiered" (in-process L1 over shared redis L2)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "finance:")
+    # Pickled values at least this large are zlib-compressed before going to redis
+    CACHE_COMPRESS_MIN_BYTES = 1024
+    # HMAC key for entries in redis, shared by every worker; values are only unpickled if their signature
+    # matches, so anyone able to write to redis can't inject objects (required for the redis and tiered backends)
+    CACHE_SIGNING_KEY = os.getenv("CACHE_SIGNING_KEY", "")
+    # With a shared backend, one worker fetches a missing key while the others poll for its result
+    CACHE_DISTRIBUTED_LOCK = os.getenv("CACHE_DISTRIBUTED_LOCK", "true").lower() == "true"
+    CACHE_LOCK_TIMEOUT = 10
+    CACHE_LOCK_POLL_INTERVAL = 0.05
+    BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "true").lower() == "true"
+    # Refresh snapshots at this fraction of their TTL so they never expire
+    REFRESH_LEAD = 0.8
+
+    # Chart Time Series: each resolution tier is fetched once over its full range and
+    # every shorter window is sliced from it (CoinGecko picks the granularity by range)
+    # (step is the tier's point spacing in seconds; refreshed tails are conformed to it)
+    TIMESERIES_TIERS = {
+        'minute': {'days': 1, 'step': 300, 'ttl': 60, 'stale_ttl': 300},
+        'hourly': {'days': 90, 'step': 3600, 'ttl': 300, 'stale_ttl': 1800},
+        'daily': {'days': 365, 'step': 86400, 'ttl': 3600, 'stale_ttl': 21600}
+    }
+    # Series kept in memory for tail-only refreshes, and the SQLite file they persist to ("" disables)
+    TIMESERIES_MAX_SERIES = 500
+    TIMESERIES_DB_PATH = os.getenv("TIMESERIES_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "timeseries.db"))
+    # Upper bound for the points a downsampled chart may request
+    CHART_MAX_POINTS = 5000
+    # Indicator results kept for incremental recomputation, one per (coin, tier, indicator, parameter)
+    ANALYTICS_MEMO_SIZE = 512
+
+    # News Index: feeds ingested on the 'news' cadence (NewsAPI queries), answered locally when it has
+    # at least NEWS_MIN_LOCAL_RESULTS matches (or the requested limit, if smaller)
+    NEWS_FEEDS = {
+        'finance': 'finance OR "stock market" OR economy',
+        'crypto': 'cryptocurrency OR bitcoin OR ethereum'
+    }
+    NEWS_FEED_SIZE = 100
+    NEWS_INDEX_MAX_ARTICLES = 5000
+    NEWS_MIN_LOCAL_RESULTS = 3
+    # Serper results per research question; indexed results are reused when they hold this share of its terms
+    SEARCH_RESULTS = 3
+    SEARCH_INDEX_MIN_MATCH = 0.75
+
+    # Stocks
+    STOCK_SYMBOLS = [symbol.strip().upper() for symbol in os.getenv(
+        "STOCK_SYMBOLS", "AAPL,MSFT,GOOGL,AMZN,TSLA,META,NVDA,JPM,V,WMT"
+    ).split(",") if symbol.strip()]
+    ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5"))
+    # REALTIME_BULK_QUOTES is a premium endpoint; enable it only for premium keys
+    ALPHA_VANTAGE_BULK = os.getenv("ALPHA_VANTAGE_BULK", "false").lower() == "true"
+    ALPHA_VANTAGE_MAX_WAIT = 10
+    ALPHA_VANTAGE_LIST_WAIT = 5
+    ALPHA_VANTAGE_MAX_RETRIES = 2
+    # Untracked symbols in one /api/stocks/batch request that get an individual quote lookup; each costs one of
+    # the ALPHA_VANTAGE_CALLS_PER_MINUTE ahead of the list refresh, so the rest come back as 'missing'
+    STOCK_BATCH_MAX_LOOKUPS = 2
+
+    # WebSocket Push: updates queued per subscriber before it is dropped to a resync, and top-N coins on 'crypto'
+    WS_QUEUE_SIZE = 100
+    WS_CRYPTO_TOP_N = 100
+
+    # Market Data Providers (tried fastest-healthy-first per asset class)
+    MARKET_PROVIDERS = [name.strip() for name in os.getenv(
+        "MARKET_PROVIDERS", "coingecko,coinmarketcap,alpha_vantage,finnhub,currencylayer"
+    ).split(",") if name.strip()]
+    FOREX_PAIRS = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CAD', 'AUD/USD']
+    PROVIDER_STATS_WINDOW = 100
+    PROVIDER_MIN_SAMPLES = 5
+    PROVIDER_MAX_ERROR_RATE = 0.5
+    # Hedge to the next provider after the current one's p95, clamped to this range (seconds)
+    PROVIDER_HEDGE_MIN = 0.25
+    PROVIDER_HEDGE_MAX = 3.0
+    STUB_PROVIDER_LATENCY = float(os.getenv("STUB_PROVIDER_LATENCY", "0"))
+    STUB_PROVIDER_ERROR_RATE = float(os.getenv("STUB_PROVIDER_ERROR_RATE", "0"))
+
+    # HTTP Client
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+    HTTP_KEEPALIVE_TIMEOUT = 30
+    HTTP_DNS_CACHE_TTL = 300
+    HTTP_TIMEOUTS = {
+        'coingecko': {'total': 10, 'connect': 3},
+        'alpha_vantage': {'total': 10, 'connect': 3},
+        'serper': {'total': 10, 'connect': 3},
+        'newsapi': {'total': 10, 'connect': 3},
+        'aimlapi': {'total': 15, 'connect': 3},
+        # Streamed completions stay open while tokens arrive
+        'aimlapi_stream': {'total': 60, 'connect': 3},
+        'finnhub': {'total': 10, 'connect': 3},
+        'coinmarketcap': {'total': 10, 'connect': 3},
+        'currencylayer': {'total': 10, 'connect': 3},
+        'default': {'total': 10, 'connect': 3}
+    }
+
+    # Circuit Breakers and Adaptive Timeouts (per upstream)
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RECOVERY_TIME = 30
+    CIRCUIT_LATENCY_WINDOW = 200
+    CIRCUIT_MIN_SAMPLES = 20
+    # Timeout is p99 latency times this factor, never below CIRCUIT_MIN_TIMEOUT seconds
+    CIRCUIT_TIMEOUT_MULTIPLIER = 2.0
+    CIRCUIT_MIN_TIMEOUT = 1.0
+
     # Solana
     RECEIVER_WALLET = "EqdQrA4HVc9Y8Lg4pADSaghrxFA4GZPUV3phTaUeQKni"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+# Services and routers import the settings under this name
+config = settings
@@ -1,20 +1,49 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
-from routers import finance, crypto, stocks, ai
+from routers import finance, crypto, stocks, ai, charts, ws
+from services.http_client import http_client
+from services.cache_service import cache
+from services.finance_service import FinanceService
+from services.ai_service import AIService
+from services.refresh_scheduler import refresh_scheduler
+from services.stock_service import stock_service
+from services.providers import market_router
+from services.broadcaster import broadcaster
+from services.news_index import news_index
+from services.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from services.admission import admission
 from config import settings
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown"""
+    await http_client.start()
+    await cache.start()
+    FinanceService().register_broadcasts(broadcaster)
+    if settings.BACKGROUND_REFRESH:
+        FinanceService().register_refresh_jobs(refresh_scheduler)
+        AIService().register_refresh_jobs(refresh_scheduler)
+        await refresh_scheduler.start()
+    yield
+    await refresh_scheduler.stop()
+    await stock_service.close()
+    await cache.stop()
+    await http_client.close()
+
 app = FastAPI(
     title="Aladin.AI Finance API",
     description="AI-powered financial research assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -26,11 +55,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency and status metrics (outermost, so CORS handling is timed too)
+app.add_middleware(MetricsMiddleware)
+metrics.register_collector('cache', 'Cache counters and size from CacheService.stats()', cache.stats)
+metrics.register_collector('admission', 'AI quota and LLM concurrency from AdmissionController.stats()', admission.stats)
+
 # Include routers
 app.include_router(finance.router, prefix="/api/finance", tags=["finance"])
 app.include_router(crypto.router, prefix="/api/crypto", tags=["crypto"])
 app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
+app.include_router(charts.router, prefix="/api/charts", tags=["charts"])
+app.include_router(ws.router, prefix="/api", tags=["stream"])
 
 @app.get("/")
 async def root():
@@ -38,7 +74,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    upstreams = http_client.health()
+    degraded = any(upstream['state'] != 'closed' for upstream in upstreams.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "upstreams": upstreams,
+        "providers": market_router.stats(),
+        "stream": broadcaster.stats(),
+        "news": news_index.stats(),
+        "admission": admission.stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Route, upstream and AI latency histograms plus cache gauges, in Prometheus text format"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     uvicorn.run(
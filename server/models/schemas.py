@@ -1,17 +1,24 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any, Generic, TypeVar
 from datetime import datetime
 
+T = TypeVar('T')
+
 # Request Schemas
 class FinanceQuery(BaseModel):
     query: str = Field(..., min_length=1, max_length=500, description="Financial question to research")
 
+class FinanceBatchQuery(BaseModel):
+    queries: List[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, max_length=50, description="Financial questions to research together")
+
 class ChartRequest(BaseModel):
     symbol: str = Field(..., description="Symbol for chart data")
     days: int = Field(30, ge=1, le=365, description="Number of days for chart")
 
 # Response Schemas  
 class CryptoData(BaseModel):
+    id: Optional[str] = None
     symbol: str
     name: str
     price: float
@@ -35,9 +42,10 @@ class AIResponse(BaseModel):
     sources: List[Dict[str, str]] = []
     response_time: float
     timestamp: datetime
+    timings: Dict[str, Optional[float]] = {}  # seconds per pipeline stage, None if it missed the budget
 
 class ChartData(BaseModel):
-    prices: List[List[float]]  # [[timestamp, price], ...]
+    prices: List[List[float]]  # [[timestamp, price], ...] or [[timestamp, open, high, low, close], ...]
     market_caps: List[List[float]]
     total_volumes: List[List[float]]
     symbol: str
@@ -49,6 +57,13 @@ class MarketData(BaseModel):
     forex: List[Dict[str, Any]]
     timestamp: datetime
 
+class PaginatedResponse(BaseModel, Generic[T]):
+    data: List[T]
+    count: int
+    total: int
+    page: int
+    limit: int
+
 class APIStatus(BaseModel):
     status: str
     message: str
@@ -3,11 +3,13 @@ from .crypto import router as crypto_router
 from .stocks import router as stocks_router
 from .ai import router as ai_router
 from .charts import router as charts_router
+from .ws import router as ws_router
 
 __all__ = [
     'finance_router',
     'crypto_router',
     'stocks_router', 
     'ai_router',
-    'charts_router'
+    'charts_router',
+    'ws_router'
 ]
\ No newline at end of file
@@ -1,19 +1,91 @@
-from fastapi import APIRouter, HTTPException
-from ..services.ai_service import AIService
-from ..models.schemas import FinanceQuery, AIResponse
+import math
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from services.ai_service import AIService
+from services.admission import Overloaded, QuotaExceeded, client_id
+from models.schemas import FinanceBatchQuery, FinanceQuery, AIResponse
+from utils.helpers import format_sse
 
 router = APIRouter()
 ai_service = AIService()
 
+def _client(request: Request) -> str:
+    return client_id(request.client.host if request.client else None, request.headers.get('x-forwarded-for'))
+
+def _rejection(e: Exception) -> HTTPException:
+    """503 while the LLM path is saturated, 429 once the client's quota is used up"""
+    status = 503 if isinstance(e, Overloaded) else 429
+    return HTTPException(status_code=status, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+async def _event_stream(query: str, client: str) -> StreamingResponse:
+    stream = ai_service.stream_finance_response(query, client)
+    # Admission happens before the first event, so a rejection can still be an HTTP status
+    try:
+        first = await stream.__anext__()
+    except (Overloaded, QuotaExceeded) as e:
+        raise _rejection(e)
+    except StopAsyncIteration:
+        first = None
+
+    async def events():
+        if first is not None:
+            yield format_sse(*first)
+            async for event, data in stream:
+                yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/ask", response_model=AIResponse)
-async def ask_finance_question(query: FinanceQuery):
+async def ask_finance_question(
+    request: Request,
+    query: FinanceQuery,
+    stream: bool = Query(False, description="Stream the answer as Server-Sent Events")
+):
     """Ask financial questions to AI"""
+    if stream:
+        return await _event_stream(query.query, _client(request))
+
     try:
-        response = await ai_service.get_finance_response(query.query)
+        response = await ai_service.get_finance_response(query.query, _client(request))
         return response
+    except (Overloaded, QuotaExceeded) as e:
+        raise _rejection(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+@router.get("/ask/stream")
+async def stream_finance_question(
+    request: Request,
+    query: str = Query(..., min_length=1, max_length=500, description="Financial question to research")
+):
+    """Ask financial questions to AI, streamed as Server-Sent Events (EventSource-friendly GET)"""
+    return await _event_stream(query, _client(request))
+
+@router.post("/ask/batch")
+async def ask_finance_questions(request: Request, batch: FinanceBatchQuery):
+    """Ask many financial questions at once; results stream as Server-Sent Events as each finishes.
+
+    Events: 'context' once the shared market data is ready, one 'result' per
+    distinct question (with the request positions it answers), then 'done'.
+    Questions the LLM can't take are results with 'error', 'status' (429 or
+    503) and 'retry_after'.
+    """
+    client = _client(request)
+
+    async def events():
+        async for event, data in ai_service.stream_batch_responses(batch.queries, client):
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/news")
 async def get_financial_news(
     query: str = "",
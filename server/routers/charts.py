@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from services.finance_service import FinanceService
+from services.analytics import AnalyticsService, INDICATOR_DEFAULTS
+
+router = APIRouter()
+finance_service = FinanceService()
+analytics_service = AnalyticsService(finance_service.timeseries)
+
+@router.get("/{coin_id}/indicators")
+async def get_indicators(
+    coin_id: str,
+    days: int = Query(30, ge=1, le=365, description="Number of days for chart"),
+    indicators: str = Query(",".join(INDICATOR_DEFAULTS), description="Comma-separated: sma,ema,rsi,volatility,drawdown"),
+    sma_window: int = Query(INDICATOR_DEFAULTS['sma'], ge=2, le=500),
+    ema_period: int = Query(INDICATOR_DEFAULTS['ema'], ge=2, le=500),
+    rsi_period: int = Query(INDICATOR_DEFAULTS['rsi'], ge=2, le=100),
+    volatility_window: int = Query(INDICATOR_DEFAULTS['volatility'], ge=2, le=500)
+):
+    """Get technical indicators computed over the cryptocurrency's chart data"""
+    names = list(dict.fromkeys(name.strip().lower() for name in indicators.split(',') if name.strip()))
+    unknown = [name for name in names if name not in INDICATOR_DEFAULTS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"indicators must be among {', '.join(INDICATOR_DEFAULTS)}")
+
+    params = {'sma': sma_window, 'ema': ema_period, 'rsi': rsi_period, 'volatility': volatility_window}
+    try:
+        result = await analytics_service.get_indicators(coin_id, days, names, params)
+        if not result:
+            raise HTTPException(status_code=404, detail="Chart data not found")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute indicators: {str(e)}")
+
+@router.get("/{coin_id}/summary")
+async def get_chart_summary(
+    coin_id: str,
+    days: int = Query(30, ge=1, le=365, description="Number of days for chart")
+):
+    """Get the latest indicator readings, return and maximum drawdown over the window"""
+    try:
+        summary = await analytics_service.get_summary(coin_id, days)
+        if not summary:
+            raise HTTPException(status_code=404, detail="Chart data not found")
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute chart summary: {str(e)}")
@@ -1,37 +1,68 @@
 from fastapi import APIRouter, HTTPException, Query
-from ..services.finance_service import FinanceService
+from typing import Optional
+from services.finance_service import FinanceService
+from models.schemas import CryptoData, PaginatedResponse
+from utils.helpers import parse_symbols
 
 router = APIRouter()
 finance_service = FinanceService()
 
-@router.get("/list")
+@router.get("/list", response_model=PaginatedResponse[CryptoData])
 async def get_crypto_list(
     limit: int = Query(100, ge=1, le=250),
-    page: int = Query(1, ge=1)
+    page: int = Query(1, ge=1),
+    sort_by: str = Query("market_cap", pattern="^(market_cap|price_chg|volume_24h)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    min_market_cap: Optional[float] = Query(None, ge=0),
+    min_volume: Optional[float] = Query(None, ge=0),
+    min_change: Optional[float] = Query(None, description="Minimum 24h change in percent"),
+    max_change: Optional[float] = Query(None, description="Maximum 24h change in percent")
 ):
-    """Get cryptocurrency list"""
+    """Get a sorted, filtered page of the cryptocurrency list"""
     try:
-        crypto_data = await finance_service.get_live_crypto_data(limit)
+        return await finance_service.get_crypto_page(
+            page=page,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            min_market_cap=min_market_cap,
+            min_volume=min_volume,
+            min_change=min_change,
+            max_change=max_change
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch crypto data: {str(e)}")
+
+@router.get("/batch")
+async def get_crypto_batch(
+    symbols: str = Query(..., description="Comma-separated symbols or CoinGecko ids, e.g. BTC,ETH,solana")
+):
+    """Get many cryptocurrencies in one call"""
+    try:
+        keys = parse_symbols(symbols)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        index = await finance_service.get_crypto_index()
+        found = index.get_many(keys)
         return {
-            "data": crypto_data,
-            "count": len(crypto_data),
-            "limit": limit,
-            "page": page
+            "data": [crypto for crypto in found.values() if crypto is not None],
+            "missing": [key for key, crypto in found.items() if crypto is None],
+            "count": sum(1 for crypto in found.values() if crypto is not None)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch crypto data: {str(e)}")
 
 @router.get("/{symbol}")
 async def get_crypto_by_symbol(symbol: str):
-    """Get specific cryptocurrency data"""
+    """Get specific cryptocurrency data by symbol or CoinGecko id"""
     try:
-        crypto_data = await finance_service.get_live_crypto_data(250)
-        symbol_upper = symbol.upper()
-        
-        for crypto in crypto_data:
-            if crypto['symbol'] == symbol_upper:
-                return crypto
-        
+        index = await finance_service.get_crypto_index()
+        crypto = index.get(symbol)
+        if crypto is not None:
+            return crypto
+
         raise HTTPException(status_code=404, detail=f"Cryptocurrency {symbol} not found")
     except HTTPException:
         raise
@@ -1,40 +1,56 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
-import asyncio
-from ..services.finance_service import FinanceService
-from ..models.schemas import MarketData, ChartData
+from datetime import datetime
+from config import config
+from services.finance_service import FinanceService, MARKET_DATA_CRYPTO_LIMIT
+from services.snapshot_cache import snapshot_encoder
+from models.schemas import MarketData, ChartData
+from utils.helpers import snapshot_response
 
 router = APIRouter()
 finance_service = FinanceService()
 
 @router.get("/market-data", response_model=MarketData)
-async def get_market_data():
+async def get_market_data(request: Request):
     """Get comprehensive market data (crypto, stocks, forex)"""
     try:
-        market_data = await finance_service.get_comprehensive_market_data()
-        return market_data
+        crypto, stocks, forex = await finance_service.get_market_snapshots()
+        # Encoded once per refresh of any of the three snapshots, not per request
+        snapshot = snapshot_encoder.encode("market_data", (crypto, stocks, forex), lambda: {
+            "crypto": crypto[:MARKET_DATA_CRYPTO_LIMIT],
+            "stocks": stocks,
+            "forex": forex,
+            "timestamp": datetime.now().isoformat()
+        })
+        return snapshot_response(request, snapshot)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch market data: {str(e)}")
 
 @router.get("/crypto/chart/{coin_id}", response_model=ChartData)
 async def get_crypto_chart(
     coin_id: str,
-    days: int = Query(30, ge=1, le=365, description="Number of days for chart")
+    days: int = Query(30, ge=1, le=365, description="Number of days for chart"),
+    points: Optional[int] = Query(None, ge=3, le=config.CHART_MAX_POINTS,
+                                  description="Downsample to about this many points"),
+    downsample: str = Query("lttb", pattern="^(lttb|ohlc)$",
+                            description="lttb keeps significant points; ohlc returns candles")
 ):
     """Get cryptocurrency chart data"""
     try:
-        chart_data = await finance_service.get_crypto_chart_data(coin_id, days)
+        chart_data = await finance_service.get_crypto_chart_data(coin_id, days, points, downsample)
         if not chart_data:
             raise HTTPException(status_code=404, detail="Chart data not found")
         return chart_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch chart data: {str(e)}")
 
 @router.get("/bitcoin/price")
-async def get_bitcoin_price():
+async def get_bitcoin_price(request: Request):
     """Get current Bitcoin price"""
     try:
         btc_data = await finance_service.get_bitcoin_price()
-        return btc_data
+        return snapshot_response(request, snapshot_encoder.encode("bitcoin_price", (btc_data,), lambda: btc_data))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch Bitcoin price: {str(e)}")
\ No newline at end of file
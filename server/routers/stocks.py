@@ -1,17 +1,54 @@
-from fastapi import APIRouter, HTTPException
-from ..services.finance_service import FinanceService
+from fastapi import APIRouter, HTTPException, Query, Request
+import asyncio
+from config import config
+from services.finance_service import FinanceService
+from services.snapshot_cache import snapshot_encoder
+from utils.helpers import parse_symbols, snapshot_response
 
 router = APIRouter()
 finance_service = FinanceService()
 
 @router.get("/list")
-async def get_stocks_list():
+async def get_stocks_list(request: Request):
     """Get stock list"""
     try:
         stock_data = await finance_service.get_live_stock_data()
-        return {
+        snapshot = snapshot_encoder.encode("stocks_list", (stock_data,), lambda: {
             "data": stock_data,
             "count": len(stock_data)
+        })
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch stock data: {str(e)}")
+
+@router.get("/batch")
+async def get_stocks_batch(
+    symbols: str = Query(..., description="Comma-separated stock symbols, e.g. AAPL,MSFT")
+):
+    """Get many stock quotes in one call.
+
+    Tracked symbols come from the stock index; only the first
+    STOCK_BATCH_MAX_LOOKUPS untracked ones are quoted individually and the
+    rest are listed under 'missing'.
+    """
+    try:
+        keys = parse_symbols(symbols)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        index = await finance_service.get_stock_index()
+        found = index.get_many(keys)
+
+        # Fetch a few symbols outside the tracked list individually
+        lookups = [key for key, stock in found.items() if stock is None][:config.STOCK_BATCH_MAX_LOOKUPS]
+        quotes = await asyncio.gather(*[finance_service.get_stock_quote(key) for key in lookups])
+        found.update(zip(lookups, quotes))
+
+        return {
+            "data": [stock for stock in found.values() if stock is not None],
+            "missing": [key for key, stock in found.items() if stock is None],
+            "count": sum(1 for stock in found.values() if stock is not None)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch stock data: {str(e)}")
@@ -20,13 +57,13 @@ async def get_stocks_list():
 async def get_stock_by_symbol(symbol: str):
     """Get specific stock data"""
     try:
-        stock_data = await finance_service.get_live_stock_data()
+        index = await finance_service.get_stock_index()
         symbol_upper = symbol.upper()
-        
-        for stock in stock_data:
-            if stock['symbol'] == symbol_upper:
-                return stock
-        
+
+        stock = index.get(symbol_upper)
+        if stock is not None:
+            return stock
+
         # Try to fetch individual stock if not in list
         individual_stock = await finance_service.get_stock_quote(symbol_upper)
         if individual_stock:
@@ -0,0 +1,78 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from services.broadcaster import broadcaster
+
+router = APIRouter()
+
+def _parse_channels(raw) -> list:
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    channels = []
+    for channel in raw or []:
+        channel = str(channel).strip()
+        if not channel:
+            continue
+        # Channel names are lower case, coin symbols upper case ('crypto:BTC')
+        name, _, symbol = channel.partition(':')
+        channels.append(f"{name.lower()}:{symbol.upper()}" if symbol else name.lower())
+    return channels
+
+async def _send_loop(websocket: WebSocket, subscriber) -> None:
+    while True:
+        for message in await broadcaster.next_messages(subscriber):
+            await websocket.send_text(message)
+
+@router.websocket("/ws")
+async def market_stream(websocket: WebSocket, channels: str = ""):
+    """Live market updates.
+
+    Subscribe with ?channels=crypto,btc or by sending
+    {"action": "subscribe" | "unsubscribe", "channels": [...]}. Each channel
+    starts with a 'snapshot' message followed by 'delta' messages holding
+    only the changed items or fields.
+    """
+    await websocket.accept()
+    subscriber = broadcaster.connect()
+    sender = asyncio.create_task(_send_loop(websocket, subscriber))
+
+    async def apply(action: str, requested) -> None:
+        for channel in _parse_channels(requested):
+            if not broadcaster.is_channel(channel):
+                await websocket.send_json({"type": "error", "message": f"Unknown channel {channel}"})
+            elif action == "subscribe":
+                await broadcaster.subscribe(subscriber, channel)
+            else:
+                broadcaster.unsubscribe(subscriber, channel)
+
+    async def receive_loop() -> None:
+        await apply("subscribe", channels)
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "message": "messages must be JSON"})
+                continue
+            action = message.get("action") if isinstance(message, dict) else None
+            if action not in ("subscribe", "unsubscribe"):
+                await websocket.send_json({"type": "error", "message": "action must be subscribe or unsubscribe"})
+                continue
+            await apply(action, message.get("channels"))
+
+    receiver = asyncio.create_task(receive_loop())
+    try:
+        # Whichever loop ends first ends the connection, so a dead sender doesn't leave the receiver running
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        if sender.done() and not sender.cancelled() and sender.exception() is not None:
+            print(f"WebSocket send failed: {sender.exception()}")
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+        elif receiver.done() and not receiver.cancelled():
+            error = receiver.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        broadcaster.disconnect(subscriber)
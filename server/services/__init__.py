@@ -1,16 +1,12 @@
 from .finance_service import FinanceService
-from .crypto_service import CryptoService
 from .stock_service import StockService
 from .ai_service import AIService
 from .cache_service import cache, CacheService
-from .payment_service import PaymentService
 
 __all__ = [
     'FinanceService',
-    'CryptoService', 
     'StockService',
     'AIService',
     'cache',
-    'CacheService',
-    'PaymentService'
+    'CacheService'
 ]
\ No newline at end of file
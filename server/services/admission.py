@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from config import config
+
+class QuotaExceeded(Exception):
+    """Raised when a client has used its query quota for the window"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Query quota exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class Overloaded(Exception):
+    """Raised instead of queueing LLM work that couldn't start within the latency budget"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"AI service overloaded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class _Window:
+    __slots__ = ('index', 'current', 'previous')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+class QuotaTracker:
+    """Per-client sliding-window query counter.
+
+    Each client costs three integers: counts for the current and previous
+    fixed windows, with the previous one weighted by how much of it still
+    overlaps the sliding window. Clients not seen recently are dropped
+    first once `max_clients` are tracked.
+    """
+
+    def __init__(self, limit: int, window: float, max_clients: int):
+        self.limit = limit
+        self.window = window
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, _Window]" = OrderedDict()
+        self.rejections = 0
+
+    def _roll(self, client: str, now: float) -> _Window:
+        index = int(now // self.window)
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = _Window(index)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        elif state.index != index:
+            state.previous = state.current if state.index == index - 1 else 0
+            state.current = 0
+            state.index = index
+        self._clients.move_to_end(client)
+        return state
+
+    def _estimate(self, state: _Window, now: float) -> float:
+        overlap = 1 - (now % self.window) / self.window
+        return state.current + state.previous * overlap
+
+    def consume(self, client: str, cost: int = 1) -> None:
+        """Count `cost` queries for a client, or raise QuotaExceeded without counting them"""
+        now = time.time()
+        state = self._roll(client, now)
+        if self._estimate(state, now) + cost > self.limit:
+            self.rejections += 1
+            raise QuotaExceeded(self._retry_after(state, now, cost))
+        state.current += cost
+
+    def refund(self, client: str, cost: int = 1) -> None:
+        """Give back `cost` queries charged in the current window for work that never ran"""
+        state = self._clients.get(client)
+        if state is not None:
+            state.current = max(0, state.current - cost)
+
+    def _retry_after(self, state: _Window, now: float, cost: int) -> float:
+        """Seconds until the estimate leaves room for `cost` more queries"""
+        # The estimate only falls as the previous window slides out...
+        excess = self._estimate(state, now) + cost - self.limit
+        overlap = 1 - (now % self.window) / self.window
+        if excess <= state.previous * overlap:
+            return excess / state.previous * self.window
+        # ...so past that, wait for the current window to become the previous one
+        until_next = overlap * self.window
+        excess = state.current + cost - self.limit
+        if excess <= 0 or not state.current:
+            return until_next
+        return until_next + min(1.0, excess / state.current) * self.window
+
+    def stats(self) -> Dict[str, int]:
+        return {'clients': len(self._clients), 'rejections': self.rejections}
+
+class ConcurrencyLimiter:
+    """Bounds LLM-bound work in flight and sheds what would queue too long.
+
+    The expected wait for a slot is the queue ahead divided by the number of
+    slots, times the average call duration (an exponential moving average
+    of observed calls). Work that would wait longer than `budget` seconds is
+    rejected with Overloaded immediately instead of queueing.
+    """
+
+    def __init__(self, limit: int, budget: float, expected_duration: float):
+        self.limit = limit
+        self.budget = budget
+        self.duration = expected_duration
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def expected_wait(self) -> float:
+        if self.active + self.waiting < self.limit:
+            return 0.0
+        return (self.waiting + 1) / self.limit * self.duration
+
+    def check(self) -> None:
+        """Raise Overloaded if new work couldn't start within the budget"""
+        wait = self.expected_wait()
+        if wait > self.budget:
+            self.shed += 1
+            raise Overloaded(wait)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the slots for the duration of the block"""
+        self.check()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.budget)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise Overloaded(self.expected_wait() or self.duration)
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.duration += 0.2 * (time.monotonic() - start - self.duration)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'shed': self.shed,
+            'expected_wait': round(self.expected_wait(), 3),
+            'average_duration': round(self.duration, 3)
+        }
+
+class AdmissionController:
+    """Admission for AI queries headed for the LLM: room on the LLM path, then the client's daily quota.
+
+    Price lookups and cached answers never reach the LLM and are not
+    admitted or charged, and market endpoints never pass through here, so
+    both stay responsive while the AI path is saturated.
+    """
+
+    def __init__(self):
+        self.quota = QuotaTracker(config.FREE_QUERIES_PER_DAY, config.QUOTA_WINDOW, config.QUOTA_MAX_CLIENTS)
+        self.llm = ConcurrencyLimiter(config.AI_LLM_CONCURRENCY, config.AI_QUEUE_BUDGET, config.AI_LLM_EXPECTED_SECONDS)
+
+    def admit(self, client: str, cost: int = 1) -> None:
+        """Raise Overloaded or QuotaExceeded, or count `cost` queries against the client's quota"""
+        # Shedding first, so requests turned away for load don't use up quota
+        self.llm.check()
+        self.quota.consume(client, cost)
+
+    def refund(self, client: str, cost: int = 1) -> None:
+        """Undo an admission whose LLM call was shed before it started"""
+        self.quota.refund(client, cost)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {'quota': self.quota.stats(), 'llm': self.llm.stats()}
+
+def client_id(host: Optional[str], forwarded_for: Optional[str] = None) -> str:
+    """Quota key for a request: its peer address, or the first X-Forwarded-For hop behind a trusted proxy"""
+    if config.ADMISSION_TRUST_FORWARDED and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return host or 'unknown'
+
+# Global admission controller instance
+admission = AdmissionController()
@@ -1,11 +1,21 @@
-import aiohttp
+import asyncio
 import json
+import math
 import time
-from typing import List, Dict
+from typing import AsyncIterator, Awaitable, Iterable, List, Dict, Optional, Tuple
 from datetime import datetime
-from ..config import config
+from config import config
 from .finance_service import FinanceService
 from .cache_service import cache
+from .http_client import http_client
+from .answer_cache import answer_cache, text_fingerprint
+from .news_index import KIND_SEARCH, news_index
+from .metrics import ai_stage_latency
+from .admission import Overloaded, QuotaExceeded, admission
+from utils.intent import INTENT_CHART, INTENT_EXPLANATION, INTENT_PRICE, classify_query
+
+# Context stages that quote live market data (and so bound how long an answer stays fresh)
+MARKET_STAGES = ('crypto', 'stocks', 'forex', 'bitcoin')
 
 class AIService:
     def __init__(self):
@@ -14,30 +24,77 @@ class AIService:
         self.serper_api = config.SERPER_API
         self.news_api_key = config.NEWS_API_KEY
 
-    async def get_finance_response(self, query: str) -> Dict:
-        """Get AI response for financial questions"""
+    async def get_finance_response(self, query: str, client: Optional[str] = None) -> Dict:
+        """Get AI response for financial questions.
+
+        Price lookups and cached answers are served as-is; only a question
+        headed for the LLM is admitted, and charged to `client`'s quota
+        (Overloaded and QuotaExceeded propagate to the caller).
+        """
         start_time = time.time()
+        admitted = False
         
         try:
-            # Get context from various sources
-            search_context = await self._search_financial_info(query)
-            market_context = await self._get_market_context(query)
-            
+            intent = classify_query(query)
+
+            # Price lookups are answered from cached market data without search or the LLM
+            if intent['intent'] == INTENT_PRICE:
+                answer = await self._price_answer(intent)
+                if answer:
+                    response_time = time.time() - start_time
+                    _record_timings({"market": response_time}, response_time)
+                    return {
+                        "response": answer,
+                        "sources": [],
+                        "response_time": response_time,
+                        "timestamp": datetime.now().isoformat(),
+                        "timings": {"market": response_time}
+                    }
+
+            # A cached answer needs no fresh context
+            cached = await self._cached_answer(query)
+            if cached:
+                answer, sources = cached
+                response_time = time.time() - start_time
+                _record_timings({}, response_time)
+                return {
+                    "response": answer,
+                    "sources": sources,
+                    "response_time": response_time,
+                    "timestamp": datetime.now().isoformat(),
+                    "timings": {}
+                }
+
+            self._admit(client)
+            admitted = True
+
+            # Get context from various sources concurrently, within the budget
+            search_context, market_context, timings = await self._gather_context(query, intent)
             enhanced_context = f"{search_context}\n\n{market_context}"
             
             # Get AI response
-            response = await self._get_ai_completion(query, enhanced_context)
+            llm_start = time.time()
+            market_stages = [name for name in MARKET_STAGES if timings.get(name) is not None]
+            response = await self._get_ai_completion(query, enhanced_context, market_stages)
+            timings['llm'] = time.time() - llm_start
             
             end_time = time.time()
             response_time = end_time - start_time
+            _record_timings(timings, response_time)
             
             return {
                 "response": response,
                 "sources": await self._extract_sources(search_context),
                 "response_time": response_time,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now().isoformat(),
+                "timings": timings
             }
-            
+
+        except (Overloaded, QuotaExceeded):
+            # Shed after admission (no LLM slot in time): the question never reached the LLM
+            if admitted:
+                self._refund(client)
+            raise
         except Exception as e:
             return {
                 "response": f"I apologize, but I encountered an error: {str(e)}",
@@ -46,116 +103,538 @@ class AIService:
                 "timestamp": datetime.now().isoformat()
             }
 
-    async def _search_financial_info(self, query: str) -> str:
-        """Search for financial information using Serper API"""
-        cache_key = f"search_{hash(query)}"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
+    async def stream_finance_response(self, query: str, client: Optional[str] = None) -> AsyncIterator[Tuple[str, object]]:
+        """Stream an AI response as (event, data) pairs.
+
+        Sources and key data are sent as soon as the context is assembled, then
+        completion tokens are forwarded as the upstream produces them. The
+        assembled answer is cached exactly like a non-streamed one, and a
+        cached answer is sent without gathering context at all. Admission is
+        as in get_finance_response and happens before the first event; an
+        LLM slot not granted in time once events have been sent ends the
+        stream with an 'error' event carrying status 503 and retry_after.
+        """
+        start_time = time.time()
+        admitted = False
 
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://google.serper.dev/search"
-                payload = json.dumps({
-                    "q": f"finance {query}",
-                    "num": 3
-                })
-                headers = {
-                    'X-API-KEY': self.serper_api,
-                    'Content-Type': 'application/json'
+            intent = classify_query(query)
+
+            if intent['intent'] == INTENT_PRICE:
+                answer = await self._price_answer(intent)
+                if answer:
+                    yield "sources", []
+                    yield "key_data", await self._get_key_data(query, intent)
+                    yield "token", answer
+                    response_time = time.time() - start_time
+                    _record_timings({"market": response_time}, response_time)
+                    yield "done", {
+                        "response_time": response_time,
+                        "timestamp": datetime.now().isoformat(),
+                        "timings": {"market": response_time}
+                    }
+                    return
+
+            cached = await self._cached_answer(query)
+            if cached:
+                answer, sources = cached
+                yield "sources", sources
+                yield "key_data", await self._get_key_data(query, intent)
+                yield "token", answer
+                response_time = time.time() - start_time
+                _record_timings({}, response_time)
+                yield "done", {
+                    "response_time": response_time,
+                    "timestamp": datetime.now().isoformat(),
+                    "timings": {}
                 }
-                
-                async with session.post(url, headers=headers, data=payload, timeout=10) as response:
-                    result = await response.json()
-                    
-                    context = ""
-                    if 'organic' in result:
-                        for i, item in enumerate(result['organic'][:3]):
-                            context += f"Source {i+1}: {item.get('title', '')}. {item.get('snippet', '')}\n\n"
-                    
-                    await cache.set(cache_key, context, ttl=600)  # 10 minutes
-                    return context
-                    
+                return
+
+            self._admit(client)
+            admitted = True
+            search_context, market_context, timings = await self._gather_context(query, intent)
+            enhanced_context = f"{search_context}\n\n{market_context}"
+
+            yield "sources", await self._extract_sources(search_context)
+            yield "key_data", await self._get_key_data(query, intent)
+
+            chunks = []
+            async for token in self._stream_ai_completion(query, enhanced_context):
+                chunks.append(token)
+                yield "token", token
+
+            if chunks:
+                market_stages = [name for name in MARKET_STAGES if timings.get(name) is not None]
+                await answer_cache.store(query, "".join(chunks), market_stages)
+            else:
+                yield "token", "I couldn't generate a response. Please try again."
+
+            response_time = time.time() - start_time
+            _record_timings(timings, response_time)
+            yield "done", {
+                "response_time": response_time,
+                "timestamp": datetime.now().isoformat(),
+                "timings": timings
+            }
+
+        except (Overloaded, QuotaExceeded) as e:
+            if not admitted:
+                raise
+            self._refund(client)
+            yield "error", {"message": str(e), "status": 503, "retry_after": math.ceil(e.retry_after)}
+        except Exception as e:
+            print(f"AI stream error: {e}")
+            yield "error", {"message": f"I apologize, but I encountered an error: {str(e)}"}
+
+    async def _get_key_data(self, query: str, intent: Optional[Dict] = None) -> List[Dict]:
+        """Headline figures for the assets a query is about"""
+        if intent is None:
+            intent = classify_query(query)
+        key_data = []
+
+        if 'bitcoin' in intent['coins']:
+            btc_data = await self.finance_service.get_bitcoin_price()
+            if btc_data:
+                key_data.extend([
+                    {"label": "Current Price", "value": f"${btc_data['price']:,.2f}"},
+                    {"label": "24h Change", "value": f"{btc_data['change_24h']:+.2f}%", "positive": btc_data['change_24h'] > 0},
+                    {"label": "Market Cap", "value": f"${btc_data['market_cap']:,.0f}"},
+                    {"label": "24h Volume", "value": f"${btc_data['volume_24h']:,.0f}"}
+                ])
+
+        return key_data
+
+    def _admit(self, client: Optional[str]) -> None:
+        """Admit a question headed for the LLM, charging the client's quota (None: unmetered)"""
+        if client is not None:
+            admission.admit(client)
+
+    def _refund(self, client: Optional[str]) -> None:
+        """Return the quota charged by _admit when the LLM call was shed before it started"""
+        if client is not None:
+            admission.refund(client)
+
+    async def _cached_answer(self, query: str) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+        """A cached answer to the question and the sources of its search, without fetching anything"""
+        answer = await answer_cache.lookup(query)
+        if not answer:
+            return None
+        indexed = news_index.search(query, config.SEARCH_RESULTS, KIND_SEARCH, config.SEARCH_INDEX_MIN_MATCH)
+        if len(indexed) >= config.SEARCH_RESULTS:
+            search_context = _search_context(indexed)
+        else:
+            search_context = await cache.get(f"search_{text_fingerprint(query)}") or ""
+        return answer, await self._extract_sources(search_context)
+
+    async def _search_financial_info(self, query: str) -> str:
+        """Search for financial information, from indexed results of earlier searches when they cover the question"""
+        indexed = news_index.search(query, config.SEARCH_RESULTS, KIND_SEARCH, config.SEARCH_INDEX_MIN_MATCH)
+        if len(indexed) >= config.SEARCH_RESULTS:
+            return _search_context(indexed)
+
+        try:
+            return await cache.get_or_set(
+                f"search_{text_fingerprint(query)}",
+                lambda: self._fetch_search_results(query),
+                ttl=cache.ttl_for('search')
+            )
         except Exception as e:
             print(f"Search error: {e}")
             return ""
 
-    async def _get_market_context(self, query: str) -> str:
-        """Get relevant market context based on query"""
-        query_lower = query.lower()
-        context = ""
-        
-        # Add crypto data if query mentions crypto
-        if any(term in query_lower for term in ['crypto', 'bitcoin', 'btc', 'ethereum', 'eth']):
-            crypto_data = await self.finance_service.get_live_crypto_data(10)
-            if crypto_data:
-                context += "**Real-time Cryptocurrency Data:**\n"
-                for coin in crypto_data[:5]:
-                    context += f"• {coin['name']} ({coin['symbol']}): ${coin['price']:,.2f} ({coin['price_chg']:+.2f}%)\n"
-                context += "\n"
-        
-        # Add stock data if query mentions stocks
-        if any(term in query_lower for term in ['stock', 'stocks', 'equity', 'apple', 'microsoft', 'google']):
-            stock_data = await self.finance_service.get_live_stock_data()
-            if stock_data:
-                context += "**Real-time Stock Data:**\n"
-                for stock in stock_data[:5]:
-                    context += f"• {stock['symbol']}: ${stock['price']:,.2f} ({stock['change_percent']:+.2f}%)\n"
-                context += "\n"
-        
+    async def _fetch_search_results(self, query: str) -> str:
+        url = config.SERPER_URL
+        payload = json.dumps({
+            "q": f"finance {query}",
+            "num": config.SEARCH_RESULTS
+        })
+        headers = {
+            'X-API-KEY': self.serper_api,
+            'Content-Type': 'application/json'
+        }
+
+        async with http_client.post('serper', url, headers=headers, data=payload) as response:
+            result = await response.json()
+
+            items = [{
+                'title': item.get('title', ''),
+                'description': item.get('snippet', ''),
+                'url': item.get('link', ''),
+                'publishedAt': '',
+                'source': 'Google'
+            } for item in result.get('organic', [])[:config.SEARCH_RESULTS]]
+            news_index.add(items, KIND_SEARCH)
+            return _search_context(items)
+
+    def _stage_names(self, intent: Dict) -> List[str]:
+        """The context stages a query needs from its intent and entities"""
+        names = []
+
+        # Charts are about the market data itself; everything else needs research
+        if intent['intent'] != INTENT_CHART or not intent['asset_classes']:
+            names.append('search')
+
+        for asset_class in ('crypto', 'stocks', 'forex'):
+            if asset_class in intent['asset_classes']:
+                names.append(asset_class)
+
         # Add Bitcoin price for Bitcoin-specific queries
-        if 'bitcoin' in query_lower or 'btc' in query_lower:
-            btc_data = await self.finance_service.get_bitcoin_price()
-            if btc_data:
-                context += f"**Bitcoin (BTC) Current Price:** ${btc_data['price']:,.2f} ({btc_data['change_24h']:+.2f}%)\n\n"
-        
-        return context
+        if 'bitcoin' in intent['coins']:
+            names.append('bitcoin')
+
+        return names
+
+    def _context_stages(self, query: str, intent: Dict, names: Optional[List[str]] = None) -> Dict[str, Awaitable[str]]:
+        """Context fetchers for the named stages (default: the ones the query needs), keyed by stage name"""
+        fetchers = {
+            'search': lambda: self._search_financial_info(query),
+            'crypto': lambda: self._crypto_context(intent['coins']),
+            'stocks': lambda: self._stock_context(intent['tickers']),
+            'forex': lambda: self._forex_context(intent['forex_pairs']),
+            'bitcoin': self._bitcoin_context
+        }
+        if names is None:
+            names = self._stage_names(intent)
+        return {name: fetchers[name]() for name in names}
+
+    async def _gather_context(self, query: str, intent: Optional[Dict] = None) -> Tuple[str, str, Dict[str, Optional[float]]]:
+        """Run the context stages concurrently and build the prompt from whatever finishes in budget.
+
+        Returns (search context, market context, per-stage timings in seconds).
+        Stages that miss AI_CONTEXT_BUDGET are cancelled and reported as None;
+        their shared upstream fetches keep running and warm the cache.
+        """
+        if intent is None:
+            intent = classify_query(query)
+        sections, timings = await self._gather_sections(query, intent)
+        return sections.get('search', ""), _market_context(sections), timings
+
+    async def _gather_sections(self, query: str, intent: Dict,
+                               names: Optional[List[str]] = None) -> Tuple[Dict[str, str], Dict[str, Optional[float]]]:
+        """Context text per stage that finished within AI_CONTEXT_BUDGET, plus per-stage timings"""
+        start = time.time()
+        timings: Dict[str, Optional[float]] = {}
+
+        async def timed(name: str, stage: Awaitable[str]) -> str:
+            result = await stage
+            timings[name] = time.time() - start
+            return result
+
+        tasks = {name: asyncio.ensure_future(timed(name, stage))
+                 for name, stage in self._context_stages(query, intent, names).items()}
+        if tasks:
+            done, pending = await asyncio.wait(tasks.values(), timeout=config.AI_CONTEXT_BUDGET)
+        else:
+            done, pending = set(), set()
+        for task in pending:
+            task.cancel()
+
+        sections = {}
+        for name, task in tasks.items():
+            if task in done and task.exception() is None:
+                sections[name] = task.result()
+            else:
+                if task in done:
+                    print(f"Context stage {name} error: {task.exception()}")
+                timings[name] = None
+
+        timings['context'] = time.time() - start
+        return sections, timings
 
-    async def _get_ai_completion(self, query: str, context: str) -> str:
-        """Get AI completion from AIMLAPI"""
-        cache_key = f"ai_{hash(query + context)}"
-        cached = await cache.get(cache_key)
+    async def stream_batch_responses(self, queries: List[str],
+                                     client: Optional[str] = None) -> AsyncIterator[Tuple[str, object]]:
+        """Answer many questions, yielding each result as (event, data) as soon as it finishes.
+
+        Questions sharing an answer cache key are answered once and the
+        result lists every position they were asked at. The market snapshots
+        and quotes for every asset the batch mentions are fetched once up
+        front; each question's market sections are then built from those
+        cached snapshots for its own assets. Searches and
+        completions run at most AI_BATCH_CONCURRENCY at a time, each question
+        within AI_BATCH_ITEM_TIMEOUT once it starts. Each question headed for
+        the LLM is admitted on its own; one that isn't gets an error result
+        with the status and retry_after a single request would have had.
+        """
+        start_time = time.time()
+
+        groups: Dict[str, Tuple[str, List[int]]] = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(answer_cache.key(query), (query, []))[1].append(index)
+        intents = {key: classify_query(query) for key, (query, _) in groups.items()}
+
+        # Warm the shared snapshots once; the section text built here is discarded
+        market_names = sorted({name for intent in intents.values() for name in self._stage_names(intent)} - {'search'})
+        _, timings = await self._gather_sections("", _merge_intents(intents.values()), market_names)
+        yield "context", {"queries": len(queries), "unique": len(groups), "timings": timings}
+
+        pool = asyncio.Semaphore(config.AI_BATCH_CONCURRENCY)
+
+        async def answer(key: str) -> Dict:
+            query, indexes = groups[key]
+            try:
+                async with pool:
+                    result = await asyncio.wait_for(
+                        self._batch_answer(query, intents[key], client),
+                        config.AI_BATCH_ITEM_TIMEOUT
+                    )
+            except asyncio.TimeoutError:
+                result = {"error": f"No answer within {config.AI_BATCH_ITEM_TIMEOUT}s"}
+            except (Overloaded, QuotaExceeded) as e:
+                result = {"error": str(e), "status": 503 if isinstance(e, Overloaded) else 429,
+                          "retry_after": math.ceil(e.retry_after)}
+            except Exception as e:
+                print(f"AI batch error for {query!r}: {e}")
+                result = {"error": f"I apologize, but I encountered an error: {str(e)}"}
+            return {"indexes": indexes, "query": query, **result}
+
+        tasks = [asyncio.ensure_future(answer(key)) for key in groups]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield "result", await finished
+        finally:
+            # The client went away mid-batch: stop work nobody will read
+            for task in tasks:
+                task.cancel()
+
+        yield "done", {
+            "response_time": time.time() - start_time,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def _batch_answer(self, query: str, intent: Dict, client: Optional[str] = None) -> Dict:
+        """One batch question, prompted with market sections for its own assets from the warmed snapshots"""
+        start_time = time.time()
+
+        if intent['intent'] == INTENT_PRICE:
+            answer = await self._price_answer(intent)
+            if answer:
+                response_time = time.time() - start_time
+                _record_timings({"market": response_time}, response_time)
+                return {"response": answer, "sources": [], "response_time": response_time,
+                        "timings": {"market": response_time}}
+
+        cached = await self._cached_answer(query)
         if cached:
-            return cached
+            answer, sources = cached
+            response_time = time.time() - start_time
+            _record_timings({}, response_time)
+            return {"response": answer, "sources": sources, "response_time": response_time, "timings": {}}
 
+        self._admit(client)
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.aimlapi.com/v1/chat/completions"
-                
-                system_prompt = """You are Aladin.AI, a financial research assistant. Provide comprehensive, 
-                accurate information about finance, investing, stocks, cryptocurrencies, and economics.
-                Always cite sources and be transparent about data limitations. Format responses clearly
-                with sections and bullet points when appropriate."""
-                
-                payload = json.dumps({
-                    "model": "gpt-4",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Context and Real-time Data: {context}\n\nQuestion: {query}"}
-                    ],
-                    "max_tokens": 1500,
-                    "temperature": 0.3
-                })
-                
-                headers = {
-                    'Authorization': f'Bearer {self.aimlapi_key}',
-                    'Content-Type': 'application/json'
-                }
-                
-                async with session.post(url, headers=headers, data=payload, timeout=15) as response:
-                    result = await response.json()
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        ai_response = result['choices'][0]['message']['content']
-                        await cache.set(cache_key, ai_response, ttl=600)  # 10 minutes cache
-                        return ai_response
-                    else:
-                        return "I couldn't generate a response. Please try again."
-                        
+            sections, timings = await self._gather_sections(query, intent)
+            search_context = sections.get('search', "")
+            market_stages = [name for name in MARKET_STAGES if name in sections]
+            market_context = _market_context(sections)
+            llm_start = time.time()
+            response = await self._get_ai_completion(query, f"{search_context}\n\n{market_context}", market_stages)
+            timings['llm'] = time.time() - llm_start
+        except Overloaded:
+            self._refund(client)
+            raise
+
+        response_time = time.time() - start_time
+        _record_timings(timings, response_time)
+        return {
+            "response": response,
+            "sources": await self._extract_sources(search_context),
+            "response_time": response_time,
+            "timings": timings
+        }
+
+    async def _crypto_context(self, coins: List[str] = ()) -> str:
+        """The coins a query names, or the top five when it names none"""
+        if coins:
+            index = await self.finance_service.get_crypto_index()
+            crypto_data = [coin for coin in (index.get(coin_id, 'id') for coin_id in coins) if coin]
+        else:
+            crypto_data = await self.finance_service.get_live_crypto_data(5)
+        if not crypto_data:
+            return ""
+        context = "**Real-time Cryptocurrency Data:**\n"
+        for coin in crypto_data:
+            context += f"• {_format_coin(coin)}\n"
+        return context + "\n"
+
+    async def _stock_context(self, tickers: List[str] = ()) -> str:
+        """The stocks a query names, or the top five tracked when it names none"""
+        if tickers:
+            stock_data = [stock for stock in await asyncio.gather(*(self._find_stock(ticker) for ticker in tickers))
+                          if stock]
+        else:
+            stock_data = (await self.finance_service.get_live_stock_data())[:5]
+        if not stock_data:
+            return ""
+        context = "**Real-time Stock Data:**\n"
+        for stock in stock_data:
+            context += f"• {_format_stock(stock)}\n"
+        return context + "\n"
+
+    async def _forex_context(self, pairs: List[str] = ()) -> str:
+        """The currency pairs a query names, or every tracked pair when it names none"""
+        if pairs:
+            forex_data = [rate for rate in await asyncio.gather(*(self._find_forex(pair) for pair in pairs)) if rate]
+        else:
+            forex_data = await self.finance_service.get_live_forex_data()
+        if not forex_data:
+            return ""
+        context = "**Real-time Forex Data:**\n"
+        for rate in forex_data:
+            context += f"• {rate['pair']}: {rate['price']:,.4f}\n"
+        return context + "\n"
+
+    async def _find_stock(self, ticker: str) -> Optional[Dict]:
+        index = await self.finance_service.get_stock_index()
+        return index.get(ticker) or await self.finance_service.get_stock_quote(ticker)
+
+    async def _find_forex(self, pair: str) -> Optional[Dict]:
+        """A tracked pair, or the inverse of one (JPY/USD from USD/JPY)"""
+        rates = {rate['pair']: rate for rate in await self.finance_service.get_live_forex_data()}
+        if pair in rates:
+            return rates[pair]
+        base, quote = pair.split('/')
+        inverse = rates.get(f"{quote}/{base}")
+        if inverse and inverse['price']:
+            return {'pair': pair, 'price': 1 / inverse['price'], 'change': 0.0}
+        return None
+
+    async def _price_answer(self, intent: Dict) -> Optional[str]:
+        """Answer a price lookup from cached market data, or None if any asset can't be resolved.
+
+        Tickers come from the cached stock and crypto indexes first; only the
+        rest are quoted individually, concurrently and within AI_CONTEXT_BUDGET,
+        since each quote may wait on the Alpha Vantage rate limit.
+        """
+        lines = []
+        crypto_index = await self.finance_service.get_crypto_index() if intent['coins'] or intent['tickers'] else None
+
+        for coin_id in intent['coins']:
+            coin = crypto_index.get(coin_id, 'id')
+            if coin is None:
+                return None
+            lines.append(_format_coin(coin))
+
+        ticker_lines: Dict[str, str] = {}
+        if intent['tickers']:
+            stock_index = await self.finance_service.get_stock_index()
+            missing = []
+            for ticker in intent['tickers']:
+                stock = stock_index.get(ticker)
+                # Cashtags may name coin symbols outside the major list
+                coin = crypto_index.get(ticker, 'symbol') if stock is None else None
+                if stock is not None:
+                    ticker_lines[ticker] = _format_stock(stock)
+                elif coin is not None:
+                    ticker_lines[ticker] = _format_coin(coin)
+                else:
+                    missing.append(ticker)
+
+            if missing:
+                try:
+                    quotes = await asyncio.wait_for(
+                        asyncio.gather(*(self.finance_service.get_stock_quote(ticker) for ticker in missing)),
+                        config.AI_CONTEXT_BUDGET
+                    )
+                except asyncio.TimeoutError:
+                    return None
+                for ticker, quote in zip(missing, quotes):
+                    if quote is None:
+                        return None
+                    ticker_lines[ticker] = _format_stock(quote)
+        lines.extend(ticker_lines[ticker] for ticker in intent['tickers'])
+
+        for pair in intent['forex_pairs']:
+            rate = await self._find_forex(pair)
+            if rate is None:
+                return None
+            lines.append(f"{rate['pair']}: {rate['price']:,.4f}")
+
+        if not lines:
+            return None
+        return "**Latest prices:**\n" + "\n".join(f"• {line}" for line in lines)
+
+    async def _bitcoin_context(self) -> str:
+        btc_data = await self.finance_service.get_bitcoin_price()
+        if not btc_data:
+            return ""
+        return f"**Bitcoin (BTC) Current Price:** ${btc_data['price']:,.2f} ({btc_data['change_24h']:+.2f}%)\n\n"
+
+    async def _get_ai_completion(self, query: str, context: str, market_stages: List[str] = ()) -> str:
+        """Get AI completion from AIMLAPI, reusing answers to the same (normalized) question.
+
+        Overloaded (no LLM slot within the queue budget) propagates so callers can shed with 503.
+        """
+        try:
+            ai_response = await answer_cache.get_or_fetch(
+                query,
+                lambda: self._fetch_ai_completion(query, context),
+                market_stages
+            )
+            return ai_response or "I couldn't generate a response. Please try again."
+        except Overloaded:
+            raise
         except Exception as e:
             print(f"AI API error: {e}")
             return "I'm having trouble connecting to the AI service. Please try again later."
 
+    def _completion_request(self, query: str, context: str, stream: bool = False) -> Tuple[str, str, Dict]:
+        """URL, JSON payload and headers for an AIMLAPI chat completion"""
+        url = config.AIMLAPI_URL
+
+        system_prompt = """You are Aladin.AI, a financial research assistant. Provide comprehensive, 
+        accurate information about finance, investing, stocks, cryptocurrencies, and economics.
+        Always cite sources and be transparent about data limitations. Format responses clearly
+        with sections and bullet points when appropriate."""
+
+        payload = json.dumps({
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Context and Real-time Data: {context}\n\nQuestion: {query}"}
+            ],
+            "max_tokens": 1500,
+            "temperature": 0.3,
+            "stream": stream
+        })
+
+        headers = {
+            'Authorization': f'Bearer {self.aimlapi_key}',
+            'Content-Type': 'application/json'
+        }
+        return url, payload, headers
+
+    async def _stream_ai_completion(self, query: str, context: str) -> AsyncIterator[str]:
+        """Yield completion tokens from AIMLAPI's OpenAI-compatible SSE stream"""
+        url, payload, headers = self._completion_request(query, context, stream=True)
+
+        async with admission.llm.slot(), http_client.post('aimlapi_stream', url, headers=headers, data=payload) as response:
+            if response.status != 200:
+                raise RuntimeError(f"AI API error: {response.status}")
+
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+
+                chunk = json.loads(data)
+                choices = chunk.get('choices') or [{}]
+                token = choices[0].get('delta', {}).get('content')
+                if token:
+                    yield token
+
+    async def _fetch_ai_completion(self, query: str, context: str) -> Optional[str]:
+        url, payload, headers = self._completion_request(query, context)
+
+        async with admission.llm.slot(), http_client.post('aimlapi', url, headers=headers, data=payload) as response:
+            result = await response.json()
+
+            if 'choices' in result and len(result['choices']) > 0:
+                return result['choices'][0]['message']['content']
+            return None
+
     async def _extract_sources(self, search_context: str) -> List[Dict[str, str]]:
         """Extract sources from search context"""
         # This is a simplified implementation
@@ -174,44 +653,85 @@ class AIService:
         
         return sources[:3]  # Return top 3 sources
 
+    def register_refresh_jobs(self, scheduler) -> None:
+        """Ingest the configured news feeds into the news index on the 'news' cadence"""
+        for name, feed_query in config.NEWS_FEEDS.items():
+            scheduler.register_task(f"news_feed_{name}", self._ingest_feed(feed_query), 'news')
+
+    def _ingest_feed(self, feed_query: str):
+        async def ingest() -> None:
+            news_index.add(await self._fetch_financial_news(feed_query, config.NEWS_FEED_SIZE))
+        return ingest
+
     async def get_financial_news(self, query: str = "", limit: int = 10) -> List[Dict]:
-        """Get financial news"""
-        cache_key = f"news_{query}_{limit}"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
+        """Get financial news, from the local news index when it covers the query"""
+        indexed = news_index.search(query, limit)
+        if len(indexed) >= min(limit, config.NEWS_MIN_LOCAL_RESULTS):
+            return indexed
 
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://newsapi.org/v2/everything"
-                params = {
-                    'q': query or 'finance OR cryptocurrency OR stock market',
-                    'language': 'en',
-                    'sortBy': 'publishedAt',
-                    'pageSize': limit,
-                    'apiKey': self.news_api_key
-                }
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        news_data = []
-                        
-                        if data.get('status') == 'ok' and 'articles' in data:
-                            for article in data['articles'][:limit]:
-                                news_data.append({
-                                    'title': article.get('title', ''),
-                                    'description': article.get('description', ''),
-                                    'url': article.get('url', ''),
-                                    'publishedAt': article.get('publishedAt', ''),
-                                    'source': article.get('source', {}).get('name', '')
-                                })
-                        
-                        await cache.set(cache_key, news_data, ttl=600)  # 10 minutes
-                        return news_data
-                    else:
-                        return []
-                        
+            # One upstream pull per query, sized for any limit; its articles join the index
+            articles = await cache.get_or_set(
+                f"news_{query}",
+                lambda: self._fetch_financial_news(query, config.NEWS_FEED_SIZE),
+                ttl=cache.ttl_for('news')
+            )
         except Exception as e:
             print(f"News API error: {e}")
-            return []
\ No newline at end of file
+            return indexed
+        news_index.add(articles)
+        return articles[:limit] or indexed
+
+    async def _fetch_financial_news(self, query: str, limit: int) -> List[Dict]:
+        url = config.NEWSAPI_URL
+        params = {
+            'q': query or 'finance OR cryptocurrency OR stock market',
+            'language': 'en',
+            'sortBy': 'publishedAt',
+            'pageSize': limit,
+            'apiKey': self.news_api_key
+        }
+
+        async with http_client.get('newsapi', url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                news_data = []
+
+                if data.get('status') == 'ok' and 'articles' in data:
+                    for article in data['articles'][:limit]:
+                        news_data.append({
+                            'title': article.get('title', ''),
+                            'description': article.get('description', ''),
+                            'url': article.get('url', ''),
+                            'publishedAt': article.get('publishedAt', ''),
+                            'source': article.get('source', {}).get('name', '')
+                        })
+                return news_data
+            else:
+                return []
+
+def _market_context(sections: Dict[str, str], names: Iterable[str] = MARKET_STAGES) -> str:
+    return "".join(sections.get(name, "") for name in MARKET_STAGES if name in names)
+
+def _merge_intents(intents: Iterable[Dict]) -> Dict:
+    """One intent covering every asset the given intents mention, in first-seen order"""
+    merged = {'intent': INTENT_EXPLANATION, 'coins': [], 'tickers': [], 'forex_pairs': [], 'asset_classes': []}
+    for intent in intents:
+        for field in ('coins', 'tickers', 'forex_pairs', 'asset_classes'):
+            merged[field].extend(item for item in intent[field] if item not in merged[field])
+    return merged
+
+def _record_timings(timings: Dict[str, Optional[float]], total: float) -> None:
+    for stage, seconds in timings.items():
+        if seconds is not None:
+            ai_stage_latency.observe(seconds, stage)
+    ai_stage_latency.observe(total, 'total')
+
+def _search_context(items: List[Dict]) -> str:
+    return ''.join(f"Source {i+1}: {item['title']}. {item.get('description') or ''}\n\n" for i, item in enumerate(items))
+
+def _format_coin(coin: Dict) -> str:
+    return f"{coin['name']} ({coin['symbol']}): ${coin['price']:,.2f} ({(coin['price_chg'] or 0):+.2f}%)"
+
+def _format_stock(stock: Dict) -> str:
+    return f"{stock['symbol']}: ${stock['price']:,.2f} ({float(stock['change_percent']):+.2f}%)"
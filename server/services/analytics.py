@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from config import config
+from .timeseries import DAY_MS, Series, TimeSeriesStore, tier_for, to_rows
+
+# Indicator -> default parameter (window or period, in points)
+INDICATOR_DEFAULTS = {
+    'sma': 20,
+    'ema': 20,
+    'rsi': 14,
+    'volatility': 30,
+    'drawdown': 0
+}
+
+class IndicatorResult:
+    """Indicator values aligned with the series they were computed from, plus resumable state"""
+
+    __slots__ = ('source', 'values', 'state')
+
+    def __init__(self, source: Series, values: np.ndarray, state: Dict[str, np.ndarray]):
+        self.source = source
+        self.values = values
+        self.state = state
+
+def _sma(series: Series, window: int, out: np.ndarray, state: Dict, start: int) -> None:
+    lo = max(0, start - window + 1)
+    out[start:] = pd.Series(series.prices[lo:]).rolling(window).mean().to_numpy()[start - lo:]
+
+def _ema(series: Series, period: int, out: np.ndarray, state: Dict, start: int) -> None:
+    if start == 0:
+        out[:] = pd.Series(series.prices).ewm(span=period, adjust=False).mean().to_numpy()
+        return
+    # Seeding with the last known EMA continues the recursion exactly
+    segment = np.concatenate(([out[start - 1]], series.prices[start:]))
+    out[start:] = pd.Series(segment).ewm(span=period, adjust=False).mean().to_numpy()[1:]
+
+def _rsi(series: Series, period: int, out: np.ndarray, state: Dict, start: int) -> None:
+    """Wilder RSI; the smoothed average gain and loss are the resumable state"""
+    avg_gain = state.setdefault('avg_gain', np.full(len(out), np.nan))
+    avg_loss = state.setdefault('avg_loss', np.full(len(out), np.nan))
+
+    first = max(start, 1)
+    deltas = np.diff(series.prices[first - 1:])
+    gains, losses = np.clip(deltas, 0, None), np.clip(-deltas, 0, None)
+    if first > 1:
+        gains = np.concatenate(([avg_gain[first - 1]], gains))
+        losses = np.concatenate(([avg_loss[first - 1]], losses))
+
+    smoothed_gain = pd.Series(gains).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    smoothed_loss = pd.Series(losses).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    if first > 1:
+        smoothed_gain, smoothed_loss = smoothed_gain[1:], smoothed_loss[1:]
+    avg_gain[first:], avg_loss[first:] = smoothed_gain, smoothed_loss
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + smoothed_gain / smoothed_loss)
+    rsi[(smoothed_gain == 0) & (smoothed_loss == 0)] = 50.0
+    out[first:] = rsi
+    # Not meaningful until a full period of changes has been seen
+    out[:min(period, len(out))] = np.nan
+
+def _volatility(series: Series, window: int, out: np.ndarray, state: Dict, start: int) -> None:
+    """Rolling standard deviation of log returns, annualized, in percent"""
+    lo = max(0, start - window)
+    returns = np.diff(np.log(series.prices[lo:]))
+    rolled = np.concatenate(([np.nan], pd.Series(returns).rolling(window).std().to_numpy()))
+    out[start:] = rolled[start - lo:] * _annualization(series.timestamps) * 100
+
+INDICATORS: Dict[str, Callable[[Series, int, np.ndarray, Dict, int], None]] = {
+    'sma': _sma,
+    'ema': _ema,
+    'rsi': _rsi,
+    'volatility': _volatility
+}
+
+def drawdown(prices: np.ndarray) -> np.ndarray:
+    """Percent below the running peak of the given prices"""
+    if not len(prices):
+        return prices
+    return (prices / np.maximum.accumulate(prices) - 1) * 100
+
+def splice_point(previous: Series, series: Series) -> Tuple[int, int]:
+    """Where a refreshed series diverges from the one an indicator was computed on.
+
+    Returns (offset of the new series' first point in the old one, number of
+    leading points the two share). (0, 0) means nothing can be reused.
+    """
+    if not len(previous) or not len(series):
+        return 0, 0
+    offset = int(np.searchsorted(previous.timestamps, series.timestamps[0]))
+    if offset >= len(previous) or previous.timestamps[offset] != series.timestamps[0]:
+        return 0, 0
+
+    n = min(len(previous) - offset, len(series))
+    same = ((previous.timestamps[offset:offset + n] == series.timestamps[:n]) &
+            (previous.prices[offset:offset + n] == series.prices[:n]))
+    return offset, n if same.all() else int(np.argmin(same))
+
+class AnalyticsService:
+    """Technical indicators over the cached chart series.
+
+    Indicators are computed over a coin's full tier series and sliced to the
+    requested window, so every window of a tier shares one computation.
+    Results are memoized per (coin, tier, indicator, parameter) against the
+    series object they were computed from; when the series is refreshed, the
+    prefix it shares with the previous one is reused and only the changed
+    tail is computed. Values spliced in carry their original history, which
+    for the recursive EMA and RSI is at least as long as a fresh compute's.
+    """
+
+    def __init__(self, timeseries: TimeSeriesStore, memo_size: Optional[int] = None):
+        self.timeseries = timeseries
+        self.memo_size = memo_size or config.ANALYTICS_MEMO_SIZE
+        self._memo: "OrderedDict[Tuple, IndicatorResult]" = OrderedDict()
+        self.hits = 0
+        self.splices = 0
+        self.computations = 0
+
+    async def get_indicators(self, coin_id: str, days: int, indicators: List[str],
+                             params: Optional[Dict[str, int]] = None) -> Dict:
+        """Indicator series for a coin's trailing `days`, as [[timestamp, value], ...] per indicator"""
+        params = {name: (params or {}).get(name, INDICATOR_DEFAULTS[name]) for name in indicators}
+        tier = tier_for(days)
+        series = await self.timeseries.get_tier_series(coin_id, tier)
+        if not series:
+            return {}
+
+        window = series.window(days)
+        start = len(series) - len(window)
+        results = {}
+        for name in indicators:
+            if name == 'drawdown':
+                # Measured from the peak within the requested window, so not shared across windows
+                values = drawdown(window.prices)
+            else:
+                values = self._indicator(coin_id, tier, name, params[name], series).values[start:]
+            results[name] = to_rows(window.timestamps, values)
+
+        return {
+            'coin_id': coin_id,
+            'days': days,
+            'params': params,
+            'indicators': results
+        }
+
+    async def get_summary(self, coin_id: str, days: int) -> Dict:
+        """Latest indicator readings plus window return and maximum drawdown"""
+        tier = tier_for(days)
+        series = await self.timeseries.get_tier_series(coin_id, tier)
+        if not series:
+            return {}
+
+        window = series.window(days)
+        latest = {
+            name: _last(self._indicator(coin_id, tier, name, INDICATOR_DEFAULTS[name], series).values)
+            for name in INDICATORS
+        }
+        return {
+            'coin_id': coin_id,
+            'days': days,
+            'price': float(window.prices[-1]),
+            'change_pct': float((window.prices[-1] / window.prices[0] - 1) * 100),
+            'high': float(window.prices.max()),
+            'low': float(window.prices.min()),
+            'max_drawdown': float(drawdown(window.prices).min()),
+            **latest
+        }
+
+    def _indicator(self, coin_id: str, tier: str, name: str, param: int, series: Series) -> IndicatorResult:
+        key = (coin_id, tier, name, param)
+        previous = self._memo.get(key)
+        if previous is not None and previous.source is series:
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return previous
+
+        offset, start = splice_point(previous.source, series) if previous is not None else (0, 0)
+        # Reuse only past the warm-up, where the carried state is fully formed
+        if start <= param:
+            start = 0
+
+        values = np.full(len(series), np.nan)
+        state: Dict[str, np.ndarray] = {}
+        if start:
+            values[:start] = previous.values[offset:offset + start]
+            for field, column in previous.state.items():
+                state[field] = np.full(len(series), np.nan)
+                state[field][:start] = column[offset:offset + start]
+            self.splices += 1
+        else:
+            self.computations += 1
+
+        INDICATORS[name](series, param, values, state, start)
+        result = IndicatorResult(series, values, state)
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._memo),
+            'hits': self.hits,
+            'splices': self.splices,
+            'computations': self.computations
+        }
+
+def _annualization(timestamps: np.ndarray) -> float:
+    """sqrt of the number of sampling periods per year"""
+    if len(timestamps) < 2:
+        return 0.0
+    step = float(np.median(np.diff(timestamps)))
+    return float(np.sqrt(365 * DAY_MS / step)) if step > 0 else 0.0
+
+def _last(values: np.ndarray) -> Optional[float]:
+    return None if not len(values) or np.isnan(values[-1]) else float(values[-1])
@@ -0,0 +1,173 @@
+import hashlib
+import math
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, FrozenSet, Iterable, List, Optional, Tuple
+from config import config
+from utils.finance_keywords import CURRENCY_CODES
+from utils.fuzzy_matching import normalize_query
+from utils.intent import classify_query
+from .cache_service import cache
+
+# Words that don't change what a finance question is asking
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'of', 'for', 'to', 'in', 'on', 'at', 'by',
+    'and', 'or', 'me', 'my', 'i', 'you', 'your', 'we', 'it', 'its', 'this', 'that', 'do', 'does',
+    'can', 'could', 'would', 'should', 'did', 'will', 'please', 'tell', 'show', 'give', 'explain', 'about', 'what',
+    'whats', 'how', 'hows', 'current', 'currently', 'right', 'now', 'today', 'latest'
+})
+
+# Words that make a question depend on the order of what it compares ("is X better than Y")
+COMPARISON_TERMS = frozenset({'than', 'vs', 'versus', 'over', 'against', 'instead', 'outperform', 'outperforms'})
+# Conversions ("convert usd to eur") and questions linking two assets by direction ("btc to eth") depend on
+# their word order too, although 'to' and 'in' themselves are stopwords
+CONVERSION_TERMS = frozenset({'convert', 'conversion', 'converting', 'exchange', 'swap', 'into', 'per'})
+DIRECTION_TERMS = frozenset({'to', 'in', 'from'})
+
+# Assets a question names: CoinGecko ids, stock tickers and forex pairs ('EUR/USD', so base/quote order counts)
+Entities = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]
+
+def query_words(query: str) -> List[str]:
+    """Significant tokens of a query after finance-aware normalization, in order"""
+    # Drop stopwords first so typo correction can't turn them into finance terms
+    words = [word for word in re.findall(r'[\w-]+', query.lower().replace("'", "")) if word not in STOPWORDS]
+    return [token for token in re.findall(r'[\w-]+', normalize_query(' '.join(words))) if token not in STOPWORDS]
+
+def query_tokens(query: str) -> FrozenSet[str]:
+    """Significant tokens of a query after finance-aware normalization"""
+    return frozenset(query_words(query))
+
+def query_fingerprint(tokens: Iterable[str]) -> str:
+    """Stable (cross-process) fingerprint of a normalized token set"""
+    return hashlib.sha256(' '.join(sorted(tokens)).encode('utf-8')).hexdigest()[:32]
+
+def text_fingerprint(query: str) -> str:
+    """Stable (cross-process) fingerprint of a query's normalized text, word order included"""
+    return hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()[:32]
+
+def query_entities(query: str) -> Entities:
+    """Assets a query names, as classify_query finds them"""
+    intent = classify_query(query)
+    return tuple(sorted(intent['coins'])), tuple(sorted(intent['tickers'])), tuple(intent['forex_pairs'])
+
+def is_directional(query: str, entities: Entities) -> bool:
+    """Whether a query's meaning depends on the order of the assets it names"""
+    coins, tickers, forex_pairs = entities
+    words = set(re.findall(r'[\w-]+', query.lower()))
+    if forex_pairs or words & CONVERSION_TERMS:
+        return True
+    currencies = {word for word in words if word.upper() in CURRENCY_CODES}
+    return bool(words & DIRECTION_TERMS) and len(coins) + len(tickers) + len(currencies) >= 2
+
+class AnswerCache:
+    """AI answer cache keyed by normalized question rather than raw prompt text.
+
+    Exact hits use a stable fingerprint of the normalized query, so differently
+    worded versions of the same question share one answer across workers and
+    restarts. On an exact miss, recent questions are compared by similarity
+    (token-set Jaccard by default, or cosine over vectors from an optional
+    `embed` function). Answers built on live market data expire with the
+    freshest market snapshot they used.
+
+    Comparisons and directional questions keep their word order in the
+    fingerprint and questions made only of stopwords are keyed by their
+    normalized text; none of them take part in similarity matching, which
+    can't tell them apart. A similar question only matches one naming
+    exactly the same assets, since swapping one coin or ticker for another
+    changes the answer but barely changes the token overlap.
+    """
+
+    def __init__(self, embed: Optional[Callable[[str], Awaitable[List[float]]]] = None):
+        self.embed = embed
+        self._recent: "OrderedDict[str, Tuple[FrozenSet[str], Entities, Optional[List[float]]]]" = OrderedDict()
+
+    def key(self, query: str, tokens: Optional[FrozenSet[str]] = None, entities: Optional[Entities] = None) -> str:
+        if tokens is None:
+            tokens = query_tokens(query)
+        if not tokens:
+            return f"ai_answer_text_{text_fingerprint(query)}"
+        if entities is None:
+            entities = query_entities(query)
+        if tokens & COMPARISON_TERMS or is_directional(query, entities):
+            return f"ai_answer_ordered_{text_fingerprint(' '.join(query_words(query)))}"
+        return f"ai_answer_{query_fingerprint(tokens)}"
+
+    def _matches_similar(self, query: str, tokens: FrozenSet[str], entities: Entities) -> bool:
+        return bool(tokens) and not tokens & COMPARISON_TERMS and not is_directional(query, entities)
+
+    def ttl_for(self, market_stages: Iterable[str]) -> int:
+        """Answers are only as fresh as the market data they quote"""
+        ttls = [cache.ttl_for(stage) for stage in market_stages]
+        return min([cache.ttl_for('ai')] + ttls)
+
+    async def lookup(self, query: str, tokens: Optional[FrozenSet[str]] = None,
+                     entities: Optional[Entities] = None) -> Optional[str]:
+        """Exact fingerprint hit, else the answer to the most similar recent question naming the same assets"""
+        if tokens is None:
+            tokens = query_tokens(query)
+        if entities is None:
+            entities = query_entities(query)
+        answer = await cache.get(self.key(query, tokens, entities))
+        if answer:
+            return answer
+        if not self._matches_similar(query, tokens, entities):
+            return None
+
+        vector = await self.embed(query) if self.embed else None
+        best_key, best_score = None, 0.0
+        for fingerprint, (other_tokens, other_entities, other_vector) in self._recent.items():
+            if other_entities != entities:
+                continue
+            if vector is not None and other_vector is not None:
+                score = _cosine(vector, other_vector)
+            else:
+                score = len(tokens & other_tokens) / len(tokens | other_tokens)
+            if score > best_score:
+                best_key, best_score = fingerprint, score
+
+        if best_key is None or best_score < config.AI_SIMILARITY_THRESHOLD:
+            return None
+        answer = await cache.get(best_key)
+        if answer is None:
+            # Expired or evicted: drop it from the similarity index too
+            self._recent.pop(best_key, None)
+        return answer
+
+    async def get_or_fetch(self, query: str, fetcher: Callable[[], Awaitable[Optional[str]]],
+                           market_stages: Iterable[str] = ()) -> Optional[str]:
+        """Cached or similar answer, else fetch once (single-flight per fingerprint) and store it"""
+        tokens = query_tokens(query)
+        entities = query_entities(query)
+        answer = await self.lookup(query, tokens, entities)
+        if answer:
+            return answer
+
+        key = self.key(query, tokens, entities)
+        answer = await cache.get_or_set(key, fetcher, ttl=self.ttl_for(market_stages))
+        if answer:
+            await self._remember(key, query, tokens, entities)
+        return answer
+
+    async def store(self, query: str, answer: str, market_stages: Iterable[str] = ()) -> None:
+        tokens = query_tokens(query)
+        entities = query_entities(query)
+        key = self.key(query, tokens, entities)
+        await cache.set(key, answer, ttl=self.ttl_for(market_stages))
+        await self._remember(key, query, tokens, entities)
+
+    async def _remember(self, key: str, query: str, tokens: FrozenSet[str], entities: Entities) -> None:
+        if not self._matches_similar(query, tokens, entities):
+            return
+        vector = await self.embed(query) if self.embed else None
+        self._recent[key] = (tokens, entities, vector)
+        self._recent.move_to_end(key)
+        while len(self._recent) > config.AI_SIMILARITY_INDEX_SIZE:
+            self._recent.popitem(last=False)
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+# Global answer cache instance
+answer_cache = AnswerCache()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from config import config
+
+# Fields identifying an item in each list channel, tried in order
+ITEM_KEYS = ('id', 'symbol', 'pair')
+
+# Queued in place of dropped updates; the sender replies with fresh snapshots
+RESYNC = object()
+
+class Subscriber:
+    __slots__ = ('queue', 'channels')
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.channels: Set[str] = set()
+
+class Broadcaster:
+    """Fan-out of market snapshot updates to WebSocket subscribers.
+
+    Each publish computes one delta against the channel's previous snapshot
+    and encodes it once; every subscriber receives the same string. Channels
+    are 'crypto', 'stocks', 'forex', 'btc' and per-coin 'crypto:<SYMBOL>'.
+    A subscriber whose queue fills up has its backlog dropped and is sent
+    fresh snapshots instead, so a slow consumer never holds up the others.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or config.WS_QUEUE_SIZE
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._state: Dict[str, Any] = {}
+        self._seq: Dict[str, int] = {}
+        self._snapshots: Dict[str, str] = {}
+        self._loaders: Dict[str, Callable[[str], Awaitable[Any]]] = {}
+        self.published = 0
+        self.resyncs = 0
+
+    def register_loader(self, prefix: str, loader: Callable[[str], Awaitable[Any]]) -> None:
+        """Loader for a channel's first snapshot ('crypto:' covers every per-coin channel)"""
+        self._loaders[prefix] = loader
+
+    def is_channel(self, channel: str) -> bool:
+        return _loader_key(channel) in self._loaders
+
+    def connect(self) -> Subscriber:
+        return Subscriber(self.queue_size)
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        for channel in list(subscriber.channels):
+            self.unsubscribe(subscriber, channel)
+
+    async def subscribe(self, subscriber: Subscriber, channel: str) -> None:
+        """Subscribe and queue the channel's current snapshot"""
+        if channel not in self._state:
+            loader = self._loaders.get(_loader_key(channel))
+            data = await loader(channel) if loader else None
+            # Loading may itself have refreshed the cache and published
+            if data and channel not in self._state:
+                self.publish(channel, data)
+
+        subscriber.channels.add(channel)
+        self._subscribers.setdefault(channel, set()).add(subscriber)
+        if channel in self._state:
+            self._deliver(subscriber, self.snapshot_message(channel))
+
+    def unsubscribe(self, subscriber: Subscriber, channel: str) -> None:
+        subscriber.channels.discard(channel)
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[channel]
+                if ':' in channel:
+                    # Per-coin state is only kept while someone is watching
+                    self._state.pop(channel, None)
+                    self._snapshots.pop(channel, None)
+
+    def active_channels(self, prefix: str) -> List[str]:
+        return [channel for channel in self._subscribers if channel.startswith(prefix)]
+
+    def publish(self, channel: str, data: Any) -> None:
+        """Record a new snapshot and send its delta to the channel's subscribers"""
+        previous = self._state.get(channel)
+        self._state[channel] = data
+        self._seq[channel] = self._seq.get(channel, 0) + 1
+        self._snapshots.pop(channel, None)
+
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return
+
+        if previous is None:
+            message = self.snapshot_message(channel)
+        else:
+            delta = _delta(previous, data)
+            if delta is None:
+                return
+            message = self._encode('delta', channel, delta)
+
+        self.published += 1
+        for subscriber in list(subscribers):
+            self._deliver(subscriber, message)
+
+    def snapshot_message(self, channel: str) -> str:
+        """The encoded full snapshot for a channel, encoded once per update"""
+        message = self._snapshots.get(channel)
+        if message is None:
+            message = self._encode('snapshot', channel, self._state[channel])
+            self._snapshots[channel] = message
+        return message
+
+    def _encode(self, kind: str, channel: str, data: Any) -> str:
+        return json.dumps({
+            'type': kind,
+            'channel': channel,
+            'seq': self._seq.get(channel, 0),
+            'timestamp': datetime.now().isoformat(),
+            'data': data
+        })
+
+    def _deliver(self, subscriber: Subscriber, message: str) -> None:
+        try:
+            subscriber.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog and resync it from snapshots
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(RESYNC)
+            self.resyncs += 1
+
+    async def next_messages(self, subscriber: Subscriber) -> List[str]:
+        """Wait for the subscriber's next message(s), expanding a resync into snapshots"""
+        message = await subscriber.queue.get()
+        if message is RESYNC:
+            return [self.snapshot_message(channel) for channel in subscriber.channels if channel in self._state]
+        return [message]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'channels': len(self._subscribers),
+            'subscriptions': sum(len(subscribers) for subscribers in self._subscribers.values()),
+            'published': self.published,
+            'resyncs': self.resyncs
+        }
+
+def _loader_key(channel: str) -> str:
+    return channel.split(':', 1)[0] + ':' if ':' in channel else channel
+
+def _item_key(item: Dict) -> Optional[str]:
+    for field in ITEM_KEYS:
+        if item.get(field):
+            return str(item[field])
+    return None
+
+def _delta(previous: Any, current: Any) -> Optional[Dict]:
+    """Changed items (lists keyed by id/symbol/pair) or changed fields (dicts); None when nothing changed"""
+    if isinstance(previous, list) and isinstance(current, list):
+        before = {_item_key(item): item for item in previous}
+        after = {_item_key(item): item for item in current}
+        changed = [item for key, item in after.items() if before.get(key) != item]
+        removed = [key for key in before if key not in after]
+        if not changed and not removed:
+            return None
+        return {'changed': changed, 'removed': removed}
+
+    if isinstance(previous, dict) and isinstance(current, dict):
+        changed = {field: value for field, value in current.items() if previous.get(field) != value}
+        removed = [field for field in previous if field not in current]
+        if not changed and not removed:
+            return None
+        return {'changed': changed, 'removed': removed}
+
+    return None if previous == current else {'changed': current, 'removed': []}
+
+# Global broadcaster instance
+broadcaster = Broadcaster()
@@ -1,41 +1,557 @@
 import asyncio
-from typing import Any, Optional
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+import pickle
+import struct
+import sys
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config import config
+
+class CacheEntry:
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size')
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float, size: int = 0):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+
+class CacheBackend:
+    """Storage behind CacheService. Entry times are wall-clock so they mean the same in every worker."""
+
+    name = "base"
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """The entry for a key while inside its stale window, else None"""
+        raise NotImplementedError
+
+    async def set_entry(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """Token for the cross-worker fetch lock on a key, or None while another worker holds it.
+
+        A backend that isn't shared has no other workers to coordinate with.
+        """
+        return "local"
+
+    async def release_lock(self, key: str, token: str) -> None:
+        pass
+
+    def sweep(self) -> int:
+        return 0
+
+    async def start(self, on_invalidate: Optional[Callable[[str], None]] = None) -> None:
+        """Start background work; on_invalidate(key) is called when another worker changes a key"""
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.name}
+
+class MemoryBackend(CacheBackend):
+    """In-process store with LRU eviction under entry and byte budgets"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.CACHE_MAX_BYTES
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set_entry(self, key: str, entry: CacheEntry) -> None:
+        self._remove(key)
+        if not entry.size:
+            entry.size = _estimate_size(entry.value)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def sweep(self) -> int:
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry.stale_until <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until both budgets are met"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+# Stored entry layout: expires_at and stale_until (epoch seconds), compressed flag, HMAC-SHA256 of
+# the header and payload, then the pickled value
+_HEADER = struct.Struct('!ddB')
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+class RedisBackend(CacheBackend):
+    """Shared store on any Redis-protocol server (redis-server, or a fakeredis client).
+
+    Values are pickled and zlib-compressed from CACHE_COMPRESS_MIN_BYTES up,
+    behind a fixed header with the entry's expiry times; Redis drops the key
+    itself once the stale window ends. Entries are signed with
+    CACHE_SIGNING_KEY and anything whose signature doesn't match is treated
+    as a miss without being unpickled. Every read deserializes a new object,
+    so services that key work on snapshot identity should sit behind the
+    tiered backend.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: Optional[str] = None,
+                 signing_key: Optional[str] = None):
+        signing_key = config.CACHE_SIGNING_KEY if signing_key is None else signing_key
+        if not signing_key:
+            raise ValueError("CACHE_SIGNING_KEY must be set to use a redis cache backend")
+        self._signing_key = signing_key.encode()
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url or config.REDIS_URL)
+        self.client = client
+        self.prefix = config.CACHE_KEY_PREFIX if prefix is None else prefix
+        self.reads = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.rejected = 0
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        raw = await self.client.get(self._key(key))
+        self.reads += 1
+        if raw is None:
+            return None
+        header, signature = raw[:_HEADER.size], raw[_HEADER.size:_HEADER.size + _SIGNATURE_SIZE]
+        payload = raw[_HEADER.size + _SIGNATURE_SIZE:]
+        if len(header) < _HEADER.size or not hmac.compare_digest(signature, self._sign(header, payload)):
+            self.rejected += 1
+            print(f"Cache entry {key} failed signature check; ignoring it")
+            return None
+        expires_at, stale_until, compressed = _HEADER.unpack(header)
+        value = pickle.loads(zlib.decompress(payload) if compressed else payload)
+        return CacheEntry(value, expires_at, stale_until, len(raw))
+
+    async def set_entry(self, key: str, entry: CacheEntry) -> None:
+        payload = pickle.dumps(entry.value, protocol=pickle.HIGHEST_PROTOCOL)
+        compressed = len(payload) >= config.CACHE_COMPRESS_MIN_BYTES
+        if compressed:
+            payload = zlib.compress(payload, 6)
+        header = _HEADER.pack(entry.expires_at, entry.stale_until, compressed)
+        raw = header + self._sign(header, payload) + payload
+        ttl_ms = max(1, int((entry.stale_until - time.time()) * 1000))
+        await self.client.set(self._key(key), raw, px=ttl_ms)
+        self.writes += 1
+        self.bytes_written += len(raw)
+
+    def _sign(self, header: bytes, payload: bytes) -> bytes:
+        return hmac.new(self._signing_key, header + payload, hashlib.sha256).digest()
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + '*', count=500)]
+        for start in range(0, len(keys), 500):
+            await self.client.delete(*keys[start:start + 500])
+
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(self._key('lock:' + key), token, nx=True, px=int(timeout * 1000))
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        lock_key = self._key('lock:' + key)
+        # The lock may have timed out and been taken by another worker; only drop our own
+        current = await self.client.get(lock_key)
+        if current is not None and current.decode() == token:
+            await self.client.delete(lock_key)
+
+    async def stop(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'reads': self.reads,
+            'writes': self.writes,
+            'bytes_written': self.bytes_written,
+            'rejected': self.rejected
+        }
+
+class TieredBackend(CacheBackend):
+    """In-process L1 over a shared L2, kept coherent across workers by pub/sub invalidation.
+
+    Reads hit L1 first and promote L2 hits into it, so a snapshot stays one
+    shared object within a worker. Writes go to both tiers and announce the
+    key so every other worker drops its L1 copy.
+    """
+
+    name = "tiered"
+
+    def __init__(self, l1: MemoryBackend, l2: RedisBackend, channel: Optional[str] = None):
+        self.l1 = l1
+        self.l2 = l2
+        self.channel = channel or l2.prefix + 'invalidate'
+        self.origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._on_invalidate: Optional[Callable[[str], None]] = None
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.invalidations = 0
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = await self.l1.get_entry(key)
+        if entry is not None:
+            self.l1_hits += 1
+            return entry
+        entry = await self.l2.get_entry(key)
+        if entry is not None:
+            self.l2_hits += 1
+            entry.size = 0
+            await self.l1.set_entry(key, entry)
+        return entry
+
+    async def set_entry(self, key: str, entry: CacheEntry) -> None:
+        await self.l1.set_entry(key, entry)
+        await self.l2.set_entry(key, entry)
+        await self._announce(key)
+
+    async def delete(self, key: str) -> None:
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+        await self._announce(key)
+
+    async def clear(self) -> None:
+        await self.l1.clear()
+        await self.l2.clear()
+        await self._announce('*')
+
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        return await self.l2.acquire_lock(key, timeout)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.l2.release_lock(key, token)
+
+    def sweep(self) -> int:
+        return self.l1.sweep()
+
+    async def _announce(self, key: str) -> None:
+        await self.l2.client.publish(self.channel, f"{self.origin}|{key}")
+
+    async def start(self, on_invalidate: Optional[Callable[[str], None]] = None) -> None:
+        self._on_invalidate = on_invalidate
+        if self._listener is None or self._listener.done():
+            pubsub = self.l2.client.pubsub()
+            await pubsub.subscribe(self.channel)
+            self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.l2.stop()
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                data = message['data']
+                origin, _, key = (data.decode() if isinstance(data, bytes) else data).partition('|')
+                if origin == self.origin:
+                    continue
+                self.invalidations += 1
+                if key == '*':
+                    await self.l1.clear()
+                else:
+                    await self.l1.delete(key)
+                if self._on_invalidate is not None:
+                    self._on_invalidate(key)
+        finally:
+            await pubsub.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'l1': self.l1.stats(),
+            'l2': self.l2.stats(),
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'invalidations': self.invalidations
+        }
+
+def create_backend(kind: Optional[str] = None) -> CacheBackend:
+    """Backend named by config.CACHE_BACKEND: 'memory', 'redis' or 'tiered'"""
+    kind = kind or config.CACHE_BACKEND
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend()
+    if kind == "tiered":
+        return TieredBackend(MemoryBackend(), RedisBackend())
+    raise ValueError(f"Unknown cache backend: {kind}")
 
 class CacheService:
-    def __init__(self):
-        self._cache = {}
-        self._timestamps = {}
+    """Cache with per-entry TTL, stale-while-revalidate, single-flight fetches and background sweeping.
+
+    Storage is a pluggable CacheBackend (see create_backend). With a shared
+    backend and CACHE_DISTRIBUTED_LOCK on, single-flight extends across
+    workers: one fetches a missing key while the others wait for its result.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, sweep_interval: Optional[float] = None):
+        self.backend = backend or create_backend()
+        self.sweep_interval = sweep_interval or config.CACHE_SWEEP_INTERVAL
+        self._sweeper: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._watchers: Dict[str, List[Callable[[Any], None]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.lock_waits = 0
 
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if key in self._cache and await self._is_valid(key):
-            return self._cache[key]
+        entry = await self.backend.get_entry(key)
+        # Past its TTL, the entry is only kept around while it may still be served stale
+        if entry is None or entry.expires_at <= time.time():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry.value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: int = 0) -> None:
+        """Set value in cache with TTL (seconds, defaults to CACHE_DURATION['default'])
+
+        stale_ttl keeps the entry for that many extra seconds after expiry so
+        get_or_set can serve it while a refresh runs in the background.
+        """
+        if ttl is None:
+            ttl = self.ttl_for('default')
+
+        expires_at = time.time() + ttl
+        await self.backend.set_entry(key, CacheEntry(value, expires_at, expires_at + stale_ttl))
+        self._notify(key, value)
+
+    def watch(self, key: str, callback: Callable[[Any], None]) -> None:
+        """Call `callback(value)` every time a new value is stored under `key`, by this or another worker"""
+        self._watchers.setdefault(key, []).append(callback)
+
+    def _notify(self, key: str, value: Any) -> None:
+        for callback in self._watchers.get(key, ()):
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Cache watcher error for {key}: {e}")
+
+    def _invalidated(self, key: str) -> None:
+        """Another worker changed a key; pass its new value on to local watchers"""
+        if key in self._watchers:
+            asyncio.ensure_future(self._notify_remote(key))
+
+    async def _notify_remote(self, key: str) -> None:
+        entry = await self.backend.get_entry(key)
+        if entry is not None:
+            self._notify(key, entry.value)
+
+    async def get_or_set(self, key: str, fetcher: Callable[[], Awaitable[Any]],
+                         ttl: Optional[int] = None, stale_ttl: int = 0) -> Any:
+        """Return the cached value, or fetch it once for all concurrent callers.
+
+        Concurrent misses on the same key share a single in-flight fetch and all
+        receive its result or its exception. Empty results are not cached so the
+        next caller retries the upstream. An expired entry still inside its
+        stale_ttl window is returned immediately while a background task
+        refreshes it.
+        """
+        entry = await self.backend.get_entry(key)
+        if entry is not None:
+            if entry.expires_at > time.time():
+                self.hits += 1
+                return entry.value
+            self.stale_hits += 1
+            self._start_fetch(key, fetcher, ttl, stale_ttl)
+            return entry.value
+
+        self.misses += 1
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(self._start_fetch(key, fetcher, ttl, stale_ttl))
+
+    async def refresh(self, key: str, fetcher: Callable[[], Awaitable[Any]],
+                      ttl: Optional[int] = None, stale_ttl: int = 0) -> Any:
+        """Fetch and store a fresh value regardless of the current entry"""
+        return await asyncio.shield(self._start_fetch(key, fetcher, ttl, stale_ttl))
+
+    def _start_fetch(self, key: str, fetcher: Callable[[], Awaitable[Any]],
+                     ttl: Optional[int], stale_ttl: int) -> asyncio.Task:
+        """Return the in-flight fetch for a key, starting one if there is none"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetcher, ttl, stale_ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_fetch(key, t))
+        return task
+
+    def _finish_fetch(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Background refreshes have no awaiting caller; retrieve the error so it isn't logged as lost
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Cache refresh error for {key}: {task.exception()}")
+
+    async def _fetch_and_store(self, key: str, fetcher: Callable[[], Awaitable[Any]],
+                               ttl: Optional[int], stale_ttl: int) -> Any:
+        if not config.CACHE_DISTRIBUTED_LOCK:
+            return await self._fetch_value(key, fetcher, ttl, stale_ttl)
+
+        token = await self.backend.acquire_lock(key, config.CACHE_LOCK_TIMEOUT)
+        if token is None:
+            value = await self._wait_for_value(key)
+            if value is not None:
+                return value
+            # The other worker's fetch never landed; fetch it ourselves
+            return await self._fetch_value(key, fetcher, ttl, stale_ttl)
+
+        try:
+            return await self._fetch_value(key, fetcher, ttl, stale_ttl)
+        finally:
+            await self.backend.release_lock(key, token)
+
+    async def _wait_for_value(self, key: str) -> Optional[Any]:
+        """Poll for a fresh value stored by the worker holding the key's lock"""
+        self.lock_waits += 1
+        deadline = time.time() + config.CACHE_LOCK_TIMEOUT
+        while time.time() < deadline:
+            await asyncio.sleep(config.CACHE_LOCK_POLL_INTERVAL)
+            entry = await self.backend.get_entry(key)
+            if entry is not None and entry.expires_at > time.time():
+                return entry.value
         return None
 
-    async def set(self, key: str, value: Any, ttl: int = 300) -> None:
-        """Set value in cache with TTL"""
-        self._cache[key] = value
-        self._timestamps[key] = datetime.now()
+    async def _fetch_value(self, key: str, fetcher: Callable[[], Awaitable[Any]],
+                           ttl: Optional[int], stale_ttl: int) -> Any:
+        value = await fetcher()
+        if value:
+            await self.set(key, value, ttl, stale_ttl)
+        return value
 
     async def delete(self, key: str) -> None:
         """Delete value from cache"""
-        self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
+        await self.backend.delete(key)
 
     async def clear(self) -> None:
         """Clear all cache"""
-        self._cache.clear()
-        self._timestamps.clear()
-
-    async def _is_valid(self, key: str) -> bool:
-        """Check if cache entry is still valid"""
-        if key not in self._timestamps:
-            return False
-        
-        cache_time = self._timestamps[key]
-        current_time = datetime.now()
-        return (current_time - cache_time).seconds < 300  # Default 5 minutes
+        await self.backend.clear()
+
+    def ttl_for(self, category: str) -> int:
+        """TTL in seconds for a cache category from config.CACHE_DURATION"""
+        return config.CACHE_DURATION.get(category, config.CACHE_DURATION['default'])
+
+    def stale_ttl_for(self, category: str) -> int:
+        """How long an expired entry of a category may be served stale, from config.CACHE_STALE_DURATION"""
+        return config.CACHE_STALE_DURATION.get(category, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the backend's size and eviction figures"""
+        return {
+            **self.backend.stats(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'lock_waits': self.lock_waits,
+            'inflight': len(self._inflight)
+        }
+
+    def sweep(self) -> int:
+        """Drop every in-process entry past its stale window, returning how many were removed"""
+        return self.backend.sweep()
+
+    async def start(self) -> None:
+        """Start the backend and the background sweeper"""
+        await self.backend.start(self._invalidated)
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """Stop the background sweeper, drop watchers (registered again on the next startup) and close the backend"""
+        self._watchers.clear()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        await self.backend.stop()
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+def _estimate_size(value: Any) -> int:
+    """Approximate deep size of JSON-like cache values"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
 
 # Global cache instance
-cache = CacheService()
\ No newline at end of file
+cache = CacheService()
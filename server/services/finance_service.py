@@ -1,242 +1,297 @@
-import aiohttp
 import asyncio
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-import json
-from ..config import config
+from config import config
 from .cache_service import cache
+from .http_client import http_client
+from .market_index import IndexedSnapshot, SymbolIndex
+from .providers import market_router
+from .timeseries import TimeSeriesStore
+
+# Fields the crypto list can be sorted and filtered on
+CRYPTO_SORT_FIELDS = ('market_cap', 'price_chg', 'volume_24h')
+
+# Coins included in the combined market-data payload
+MARKET_DATA_CRYPTO_LIMIT = 50
+
+_crypto_index = IndexedSnapshot(('symbol', 'id'))
+_stock_index = IndexedSnapshot(('symbol',))
 
 class FinanceService:
     def __init__(self):
         self.coingecko_base = config.COINGECKO_API
         self.alpha_vantage_key = config.ALPHA_VANTAGE_KEY
         self.finnhub_key = config.FINNHUB_KEY
+        self.timeseries = TimeSeriesStore(self._fetch_crypto_chart_data, self._fetch_crypto_chart_range)
+
+    def register_refresh_jobs(self, scheduler) -> None:
+        """Keep the dashboard snapshots warm in the background"""
+        scheduler.register("crypto_markets", self._fetch_crypto_data, 'crypto')
+        scheduler.register("stock_data", self._fetch_stock_data, 'stocks')
+        scheduler.register("forex_data", self._fetch_forex_data, 'forex')
+        scheduler.register("bitcoin_price", self._fetch_bitcoin_price, 'bitcoin')
+
+    def register_broadcasts(self, broadcaster) -> None:
+        """Publish every new market snapshot to WebSocket subscribers as it is cached"""
+        cache.watch("crypto_markets", lambda data: self._broadcast_crypto(broadcaster, data))
+        cache.watch("stock_data", lambda data: broadcaster.publish('stocks', data))
+        cache.watch("forex_data", lambda data: broadcaster.publish('forex', data))
+        cache.watch("bitcoin_price", lambda data: broadcaster.publish('btc', data))
+
+        broadcaster.register_loader('crypto', lambda channel: self.get_live_crypto_data(config.WS_CRYPTO_TOP_N))
+        broadcaster.register_loader('crypto:', self._load_coin_channel)
+        broadcaster.register_loader('stocks', lambda channel: self.get_live_stock_data())
+        broadcaster.register_loader('forex', lambda channel: self.get_live_forex_data())
+        broadcaster.register_loader('btc', lambda channel: self.get_bitcoin_price())
+
+    def _broadcast_crypto(self, broadcaster, crypto_data: List[Dict]) -> None:
+        broadcaster.publish('crypto', crypto_data[:config.WS_CRYPTO_TOP_N])
+        index = _crypto_index.for_items(crypto_data)
+        for channel in broadcaster.active_channels('crypto:'):
+            coin = index.get(channel.split(':', 1)[1])
+            if coin is not None:
+                broadcaster.publish(channel, coin)
+
+    async def _load_coin_channel(self, channel: str) -> Optional[Dict]:
+        return (await self.get_crypto_index()).get(channel.split(':', 1)[1])
+
+    async def get_market_snapshots(self) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """The cached crypto, stock and forex snapshots (the shared objects themselves), fetched in parallel"""
+        crypto_task = self.get_crypto_markets()
+        stocks_task = self.get_live_stock_data()
+        forex_task = self.get_live_forex_data()
+
+        crypto, stocks, forex = await asyncio.gather(
+            crypto_task, stocks_task, forex_task,
+            return_exceptions=True
+        )
+
+        # Handle any exceptions
+        crypto = [] if isinstance(crypto, Exception) else crypto
+        stocks = [] if isinstance(stocks, Exception) else stocks
+        forex = [] if isinstance(forex, Exception) else forex
+        return crypto, stocks, forex
 
     async def get_comprehensive_market_data(self) -> Dict:
         """Get all market data in parallel"""
         try:
-            crypto_task = self.get_live_crypto_data(50)
-            stocks_task = self.get_live_stock_data()
-            forex_task = self.get_live_forex_data()
-            
-            crypto, stocks, forex = await asyncio.gather(
-                crypto_task, stocks_task, forex_task,
-                return_exceptions=True
-            )
-            
-            # Handle any exceptions
-            crypto = [] if isinstance(crypto, Exception) else crypto
-            stocks = [] if isinstance(stocks, Exception) else stocks
-            forex = [] if isinstance(forex, Exception) else forex
-            
+            crypto, stocks, forex = await self.get_market_snapshots()
+
             return {
-                "crypto": crypto,
+                "crypto": crypto[:MARKET_DATA_CRYPTO_LIMIT],
                 "stocks": stocks,
                 "forex": forex,
                 "timestamp": datetime.now().isoformat()
             }
-            
+
         except Exception as e:
             print(f"Market data error: {e}")
             return {"crypto": [], "stocks": [], "forex": [], "timestamp": datetime.now().isoformat()}
 
     async def get_live_crypto_data(self, limit: int = 100) -> List[Dict]:
-        """Get cryptocurrency data from CoinGecko"""
-        cache_key = f"crypto_data_{limit}"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
+        """Get the top cryptocurrencies by market cap, sliced from the canonical snapshot"""
+        return (await self.get_crypto_markets())[:limit]
 
+    async def get_crypto_markets(self) -> List[Dict]:
+        """Get the canonical top-N cryptocurrency snapshot from CoinGecko"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.coingecko_base}/coins/markets"
-                params = {
-                    'vs_currency': 'usd',
-                    'order': 'market_cap_desc',
-                    'per_page': limit,
-                    'page': 1,
-                    'sparkline': 'false',
-                    'price_change_percentage': '24h'
-                }
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        crypto_data = []
-                        for item in data:
-                            crypto_data.append({
-                                'symbol': item['symbol'].upper(),
-                                'name': item['name'],
-                                'price': item['current_price'],
-                                'price_chg': item.get('price_change_percentage_24h', 0),
-                                'volume_24h': item.get('total_volume', 0),
-                                'market_cap': item.get('market_cap', 0),
-                                'market_cap_rank': item.get('market_cap_rank')
-                            })
-                        
-                        await cache.set(cache_key, crypto_data, ttl=300)
-                        return crypto_data
-                    else:
-                        print(f"CoinGecko API error: {response.status}")
-                        return []
-                        
+            return await cache.get_or_set(
+                "crypto_markets",
+                self._fetch_crypto_data,
+                ttl=cache.ttl_for('crypto'),
+                stale_ttl=cache.stale_ttl_for('crypto')
+            )
         except Exception as e:
             print(f"Error fetching crypto data: {e}")
             return []
 
-    async def get_crypto_chart_data(self, coin_id: str, days: int = 30) -> Dict:
-        """Get cryptocurrency chart data"""
-        cache_key = f"crypto_chart_{coin_id}_{days}"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
+    async def get_crypto_page(self, page: int = 1, limit: int = 100, sort_by: str = 'market_cap',
+                              order: str = 'desc', min_market_cap: Optional[float] = None,
+                              min_volume: Optional[float] = None, min_change: Optional[float] = None,
+                              max_change: Optional[float] = None) -> Dict:
+        """Sort, filter and paginate the cached crypto snapshot"""
+        if sort_by not in CRYPTO_SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {', '.join(CRYPTO_SORT_FIELDS)}")
+
+        crypto_data = await self.get_crypto_markets()
+
+        filters = [
+            ('market_cap', min_market_cap, None),
+            ('volume_24h', min_volume, None),
+            ('price_chg', min_change, max_change)
+        ]
+        active = [(field, low, high) for field, low, high in filters if low is not None or high is not None]
+        if active:
+            crypto_data = [
+                coin for coin in crypto_data
+                if all((low is None or (coin[field] or 0) >= low) and (high is None or (coin[field] or 0) <= high)
+                       for field, low, high in active)
+            ]
+
+        # The snapshot is already ordered by market cap descending
+        if sort_by != 'market_cap' or order != 'desc':
+            crypto_data = sorted(crypto_data, key=lambda coin: coin[sort_by] or 0, reverse=(order == 'desc'))
+
+        start = (page - 1) * limit
+        page_data = crypto_data[start:start + limit]
+        return {
+            "data": page_data,
+            "count": len(page_data),
+            "total": len(crypto_data),
+            "page": page,
+            "limit": limit
+        }
+
+    async def _fetch_crypto_data(self) -> List[Dict]:
+        return await market_router.fetch('crypto', lambda provider: provider.get_crypto_quotes(config.CRYPTO_TOP_N))
 
+    async def get_crypto_index(self) -> SymbolIndex:
+        """Get the crypto snapshot indexed by symbol and CoinGecko id"""
+        return _crypto_index.for_items(await self.get_crypto_markets())
+
+    async def get_crypto_chart_data(self, coin_id: str, days: int = 30, points: Optional[int] = None,
+                                    downsample: str = 'lttb') -> Dict:
+        """Get cryptocurrency chart data, optionally downsampled to about `points` points.
+
+        downsample='lttb' keeps the visually significant price points;
+        'ohlc' buckets prices into [timestamp, open, high, low, close] candles.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.coingecko_base}/coins/{coin_id}/market_chart"
-                params = {
-                    'vs_currency': 'usd',
-                    'days': str(days),
-                    'interval': 'daily' if days > 90 else 'hourly'
-                }
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        chart_data = {
-                            'prices': data.get('prices', []),
-                            'market_caps': data.get('market_caps', []),
-                            'total_volumes': data.get('total_volumes', []),
-                            'coin_id': coin_id,
-                            'days': days
-                        }
-                        await cache.set(cache_key, chart_data, ttl=60)
-                        return chart_data
-                    else:
-                        print(f"Chart API error: {response.status}")
-                        return {}
-                        
+            series = await self.timeseries.get_series(coin_id, days)
+            if not series:
+                return {}
+            if points and downsample == 'ohlc':
+                return series.to_ohlc_chart(coin_id, days, points)
+            if points:
+                series = series.downsample(points)
+            return series.to_chart(coin_id, days)
         except Exception as e:
             print(f"Error fetching crypto chart: {e}")
             return {}
 
+    async def _fetch_crypto_chart_data(self, coin_id: str, days: int) -> Dict:
+        url = f"{self.coingecko_base}/coins/{coin_id}/market_chart"
+        # CoinGecko picks 5-minute, hourly or daily points from the range
+        params = {
+            'vs_currency': 'usd',
+            'days': str(days)
+        }
+        if days > 90:
+            params['interval'] = 'daily'
+
+        async with http_client.get('coingecko', url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                return {
+                    'prices': data.get('prices', []),
+                    'market_caps': data.get('market_caps', []),
+                    'total_volumes': data.get('total_volumes', []),
+                    'coin_id': coin_id,
+                    'days': days
+                }
+            else:
+                print(f"Chart API error: {response.status}")
+                return {}
+
+    async def _fetch_crypto_chart_range(self, coin_id: str, start: int, end: int) -> Dict:
+        """Chart points between two unix times (seconds), used to fetch only a series' missing tail"""
+        url = f"{self.coingecko_base}/coins/{coin_id}/market_chart/range"
+        params = {
+            'vs_currency': 'usd',
+            'from': str(start),
+            'to': str(end)
+        }
+
+        async with http_client.get('coingecko', url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                return {
+                    'prices': data.get('prices', []),
+                    'market_caps': data.get('market_caps', []),
+                    'total_volumes': data.get('total_volumes', [])
+                }
+            else:
+                print(f"Chart range API error: {response.status}")
+                return {}
+
     async def get_live_stock_data(self) -> List[Dict]:
         """Get live stock data using Alpha Vantage"""
-        cache_key = "stock_data"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-
-        symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'JPM', 'V', 'WMT']
-        
         try:
-            # Fetch stock data concurrently
-            tasks = [self.get_stock_quote(symbol) for symbol in symbols]
-            stock_data = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Filter out exceptions and None values
-            valid_stocks = [stock for stock in stock_data 
-                          if stock is not None and not isinstance(stock, Exception)]
-            
-            await cache.set(cache_key, valid_stocks, ttl=120)
-            return valid_stocks
-            
+            return await cache.get_or_set(
+                "stock_data",
+                self._fetch_stock_data,
+                ttl=cache.ttl_for('stocks'),
+                stale_ttl=cache.stale_ttl_for('stocks')
+            )
         except Exception as e:
             print(f"Error fetching stock data: {e}")
             return []
 
+    async def _fetch_stock_data(self) -> List[Dict]:
+        return await market_router.fetch('stocks', lambda provider: provider.get_stock_quotes(config.STOCK_SYMBOLS))
+
+    async def get_stock_index(self) -> SymbolIndex:
+        """Get the stock snapshot indexed by symbol"""
+        return _stock_index.for_items(await self.get_live_stock_data())
+
     async def get_stock_quote(self, symbol: str) -> Optional[Dict]:
         """Get individual stock quote from Alpha Vantage"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://www.alphavantage.co/query"
-                params = {
-                    'function': 'GLOBAL_QUOTE',
-                    'symbol': symbol,
-                    'apikey': self.alpha_vantage_key
-                }
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if 'Global Quote' in data:
-                            quote = data['Global Quote']
-                            return {
-                                'symbol': symbol,
-                                'price': float(quote.get('05. price', 0)),
-                                'change': float(quote.get('09. change', 0)),
-                                'change_percent': quote.get('10. change percent', '0%').replace('%', ''),
-                                'volume': int(quote.get('06. volume', 0)),
-                                'high': float(quote.get('03. high', 0)),
-                                'low': float(quote.get('04. low', 0)),
-                                'open': float(quote.get('02. open', 0))
-                            }
-                    return None
-                    
+            return await cache.get_or_set(
+                f"stock_quote_{symbol}",
+                lambda: market_router.fetch('stocks', lambda provider: provider.get_stock_quote(symbol)),
+                ttl=cache.ttl_for('stocks'),
+                stale_ttl=cache.stale_ttl_for('stocks')
+            )
         except Exception as e:
             print(f"Error fetching stock {symbol}: {e}")
             return None
 
     async def get_live_forex_data(self) -> List[Dict]:
         """Get live forex data"""
-        cache_key = "forex_data"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-
-        # Simplified forex implementation
         try:
-            # Using a free forex API or creating mock data
-            forex_data = [
-                {'pair': 'EUR/USD', 'price': 1.0950, 'change': 0.0020},
-                {'pair': 'GBP/USD', 'price': 1.2750, 'change': -0.0015},
-                {'pair': 'USD/JPY', 'price': 145.20, 'change': 0.3000},
-                {'pair': 'USD/CAD', 'price': 1.3400, 'change': -0.0010},
-                {'pair': 'AUD/USD', 'price': 0.6680, 'change': 0.0030},
-            ]
-            
-            await cache.set(cache_key, forex_data, ttl=300)
-            return forex_data
-            
+            return await cache.get_or_set(
+                "forex_data",
+                self._fetch_forex_data,
+                ttl=cache.ttl_for('forex'),
+                stale_ttl=cache.stale_ttl_for('forex')
+            )
         except Exception as e:
             print(f"Error fetching forex data: {e}")
             return []
 
+    async def _fetch_forex_data(self) -> List[Dict]:
+        return await market_router.fetch('forex', lambda provider: provider.get_forex_rates(config.FOREX_PAIRS))
+
     async def get_bitcoin_price(self) -> Dict:
         """Get real-time Bitcoin price"""
-        cache_key = "bitcoin_price"
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.coingecko_base}/simple/price"
-                params = {
-                    'ids': 'bitcoin',
-                    'vs_currencies': 'usd',
-                    'include_24hr_change': 'true',
-                    'include_24hr_vol': 'true',
-                    'include_market_cap': 'true'
-                }
-                
-                async with session.get(url, params=params, timeout=5) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'bitcoin' in data:
-                            btc_data = data['bitcoin']
-                            result = {
-                                'price': btc_data['usd'],
-                                'change_24h': btc_data.get('usd_24h_change', 0),
-                                'volume_24h': btc_data.get('usd_24h_vol', 0),
-                                'market_cap': btc_data.get('usd_market_cap', 0)
-                            }
-                            await cache.set(cache_key, result, ttl=60)
-                            return result
-                    return {}
-                    
+            return await cache.get_or_set(
+                "bitcoin_price",
+                self._fetch_bitcoin_price,
+                ttl=cache.ttl_for('bitcoin'),
+                stale_ttl=cache.stale_ttl_for('bitcoin')
+            )
         except Exception as e:
             print(f"Error fetching Bitcoin price: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    async def _fetch_bitcoin_price(self) -> Dict:
+        """BTC from the top of a routed crypto quote, so it fails over like every other crypto fetch"""
+        try:
+            quotes = await market_router.fetch('crypto', lambda provider: provider.get_crypto_quotes(1))
+        except Exception as e:
+            print(f"Error fetching Bitcoin quote: {e}")
+            quotes = []
+        coin = next((quote for quote in quotes or [] if quote.get('id') == 'bitcoin'), None)
+        if coin is None:
+            # No provider answered (or bitcoin isn't ranked first): use the cached crypto snapshot
+            coin = (await self.get_crypto_index()).get('bitcoin', 'id')
+        if coin is None:
+            return {}
+        return {
+            'price': coin['price'],
+            'change_24h': coin.get('price_chg') or 0,
+            'volume_24h': coin.get('volume_24h') or 0,
+            'market_cap': coin.get('market_cap') or 0
+        }
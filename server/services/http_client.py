@@ -0,0 +1,142 @@
+import aiohttp
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from config import config
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .latency import LatencyWindow
+from .metrics import record_upstream, upstream_requests
+
+class HTTPClient:
+    """Application-scoped pooled HTTP client shared by every upstream integration.
+
+    Each named upstream gets its own circuit breaker and latency window; the
+    request timeout adapts to the observed p99 latency, capped by the
+    upstream's configured timeout profile.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._timeouts: Dict[str, aiohttp.ClientTimeout] = {
+            upstream: aiohttp.ClientTimeout(total=profile['total'], connect=profile['connect'])
+            for upstream, profile in config.HTTP_TIMEOUTS.items()
+        }
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyWindow] = {}
+
+    async def start(self) -> None:
+        """Open the pooled session (called from the app lifespan)"""
+        self._get_session()
+
+    async def close(self) -> None:
+        """Close the pooled session and release all kept-alive connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it lazily if the lifespan hasn't run"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_POOL_LIMIT,
+                limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=config.HTTP_DNS_CACHE_TTL
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def breaker(self, upstream: str) -> CircuitBreaker:
+        if upstream not in self._breakers:
+            self._breakers[upstream] = CircuitBreaker(
+                upstream,
+                failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+                recovery_time=config.CIRCUIT_RECOVERY_TIME
+            )
+        return self._breakers[upstream]
+
+    def latency(self, upstream: str) -> LatencyWindow:
+        if upstream not in self._latency:
+            self._latency[upstream] = LatencyWindow(config.CIRCUIT_LATENCY_WINDOW)
+        return self._latency[upstream]
+
+    def _timeout_for(self, upstream: str, timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """Adaptive timeout: observed p99 times a safety factor, capped by the profile or per-call override"""
+        profile = self._timeouts.get(upstream, self._timeouts['default'])
+        ceiling = profile.total if timeout is None else min(timeout, profile.total)
+
+        stats = self.latency(upstream)
+        p99 = stats.percentile(0.99) if len(stats) >= config.CIRCUIT_MIN_SAMPLES else None
+        if p99 is not None:
+            total = min(ceiling, max(config.CIRCUIT_MIN_TIMEOUT, p99 * config.CIRCUIT_TIMEOUT_MULTIPLIER))
+        else:
+            total = ceiling
+        return aiohttp.ClientTimeout(total=total, connect=min(profile.connect, total))
+
+    @asynccontextmanager
+    async def request(self, upstream: str, method: str, url: str,
+                      timeout: Optional[float] = None, **kwargs):
+        """Issue a request to a named upstream over the shared connection pool.
+
+        Raises CircuitOpenError without touching the network while the
+        upstream's breaker is open. Transport errors, timeouts, 5xx and 429
+        responses count as failures.
+        """
+        breaker = self.breaker(upstream)
+        if not breaker.allow():
+            upstream_requests.inc(upstream, 'circuit_open')
+            raise CircuitOpenError(upstream, breaker.retry_after())
+
+        session = self._get_session()
+        start = time.monotonic()
+        ok = False
+        outcome = 'error'
+        response = None
+        cancelled = False
+        try:
+            async with session.request(method, url, timeout=self._timeout_for(upstream, timeout), **kwargs) as response:
+                ok = response.status < 500 and response.status != 429
+                outcome = 'ok' if ok else 'throttled' if response.status == 429 else 'error'
+                yield response
+        except asyncio.CancelledError:
+            # A cancelled caller (e.g. a losing hedged request) says nothing about upstream health
+            cancelled = True
+            breaker.release()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            ok = False
+            outcome = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error'
+            raise
+        finally:
+            if not cancelled:
+                self.latency(upstream).record(time.monotonic() - start, ok=ok)
+                record_upstream(upstream, start, outcome, response.content.total_bytes if response is not None else None)
+                if ok:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+    def get(self, upstream: str, url: str, **kwargs):
+        """GET request to a named upstream"""
+        return self.request(upstream, 'GET', url, **kwargs)
+
+    def post(self, upstream: str, url: str, **kwargs):
+        """POST request to a named upstream"""
+        return self.request(upstream, 'POST', url, **kwargs)
+
+    def health(self) -> Dict[str, Dict]:
+        """Breaker state and latency percentiles per upstream"""
+        return {
+            upstream: {
+                **breaker.snapshot(),
+                'p50': self.latency(upstream).percentile(0.5),
+                'p99': self.latency(upstream).percentile(0.99),
+                'timeout': self._timeout_for(upstream).total
+            }
+            for upstream, breaker in self._breakers.items()
+        }
+
+# Global HTTP client instance
+http_client = HTTPClient()
@@ -0,0 +1,26 @@
+from collections import deque
+from typing import Optional
+
+class LatencyWindow:
+    """Rolling window of call latencies and outcomes for one upstream"""
+
+    def __init__(self, size: int = 100):
+        self._samples = deque(maxlen=size)
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        self._samples.append((latency, ok))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0-1) over successful calls, or None without samples"""
+        latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def __len__(self) -> int:
+        return len(self._samples)
@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+class SymbolIndex:
+    """Dictionary lookup over a market snapshot, keyed by one or more fields"""
+
+    def __init__(self, items: List[Dict], fields: Sequence[str] = ('symbol',)):
+        self.items = items
+        self.fields = tuple(fields)
+        self._by_field: Dict[str, Dict[str, Dict]] = {field: {} for field in self.fields}
+
+        for item in items:
+            for field in self.fields:
+                value = item.get(field)
+                if value:
+                    # Snapshots are rank ordered, so the first (largest) entry wins on duplicates
+                    self._by_field[field].setdefault(str(value).upper(), item)
+
+    def get(self, key: str, field: Optional[str] = None) -> Optional[Dict]:
+        """Look up an item by a specific field, or by each indexed field in turn"""
+        key = key.upper()
+        if field is not None:
+            return self._by_field[field].get(key)
+
+        for by_key in self._by_field.values():
+            item = by_key.get(key)
+            if item is not None:
+                return item
+        return None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Look up several keys at once, mapping each requested key to its item or None"""
+        return {key: self.get(key) for key in keys}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+class IndexedSnapshot:
+    """Holds the SymbolIndex for the current snapshot and rebuilds it only when the snapshot changes"""
+
+    def __init__(self, fields: Sequence[str] = ('symbol',)):
+        self.fields = tuple(fields)
+        self._source: Optional[List[Dict]] = None
+        self._index: Optional[SymbolIndex] = None
+
+    def for_items(self, items: List[Dict]) -> SymbolIndex:
+        # Cached snapshots are shared objects, so identity changes exactly once per refresh
+        if self._index is None or items is not self._source:
+            self._index = SymbolIndex(items, self.fields)
+            self._source = items
+        return self._index
@@ -0,0 +1,192 @@
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Latency buckets in seconds, from cache hits up to slow LLM completions
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        return [(self.name, self.labels, labels, value) for labels, value in self._values.items()]
+
+class Histogram:
+    """Cumulative bucket histogram per label combination.
+
+    An observation is one bisect and three additions; buckets are only made
+    cumulative when scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        samples = []
+        names = self.labels + ('le',)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', names, labels + (_format_bound(bound),), cumulative))
+            samples.append((self.name + '_sum', self.labels, labels, total))
+            samples.append((self.name + '_count', self.labels, labels, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """Metrics rendered in the Prometheus text exposition format.
+
+    Counters and histograms are updated inline; gauges are read from stats
+    callbacks (e.g. CacheService.stats) only when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Tuple[str, str, Callable[[], Dict[str, Any]]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, help: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Expose every numeric field of collect()'s dict (nested dicts flattened) as `<prefix>_<field>` gauges"""
+        self._collectors.append((prefix, help, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_sample_line(*sample) for sample in metric.samples())
+
+        for prefix, help, collect in self._collectors:
+            try:
+                fields = _flatten(collect(), prefix)
+            except Exception as e:
+                print(f"Metrics collector error for {prefix}: {e}")
+                continue
+            for name, value in fields:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def _flatten(stats: Dict[str, Any], prefix: str) -> List[Tuple[str, float]]:
+    fields = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            fields.extend(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            fields.append((name, value))
+    return fields
+
+def _sample_line(name: str, names: Tuple[str, ...], labels: Tuple[str, ...], value: float) -> str:
+    if not names:
+        return f"{name} {_format_value(value)}"
+    pairs = ','.join(f'{label}="{_escape(str(value))}"' for label, value in zip(names, labels))
+    return f"{name}{{{pairs}}} {_format_value(value)}"
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Global metrics registry and the application's metrics
+metrics = MetricsRegistry()
+
+route_latency = metrics.histogram(
+    'http_request_duration_seconds', 'Time to send the full response, by route template',
+    ('method', 'route'))
+route_requests = metrics.counter(
+    'http_requests_total', 'Responses by route template and status code', ('method', 'route', 'status'))
+upstream_latency = metrics.histogram(
+    'upstream_request_duration_seconds', 'Upstream call latency, including reading the body', ('upstream',))
+upstream_requests = metrics.counter(
+    'upstream_requests_total', 'Upstream calls by outcome (ok, error, throttled, timeout, circuit_open)',
+    ('upstream', 'outcome'))
+upstream_bytes = metrics.counter(
+    'upstream_response_bytes_total', 'Response body bytes received from each upstream', ('upstream',))
+ai_stage_latency = metrics.histogram(
+    'ai_stage_duration_seconds', 'AI answer time per pipeline stage (search, market data, llm, total)',
+    ('stage',))
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template.
+
+    Routes are labelled by their path template (e.g. /api/crypto/{coin_id})
+    so label cardinality stays bounded; requests that match no route are
+    grouped under 'unmatched'. WebSocket and lifespan traffic pass through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            template = getattr(route, 'path_format', None) or 'unmatched'
+            method = scope['method']
+            route_latency.observe(time.perf_counter() - start, method, template)
+            route_requests.inc(method, template, str(status))
+
+def record_upstream(upstream: str, started: float, outcome: str, received: Optional[int] = None) -> None:
+    """Record one upstream call that began at time.monotonic() `started`"""
+    upstream_latency.observe(time.monotonic() - started, upstream)
+    upstream_requests.inc(upstream, outcome)
+    if received:
+        upstream_bytes.inc(upstream, amount=received)
@@ -0,0 +1,124 @@
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from config import config
+from utils.fuzzy_matching import matcher
+from .answer_cache import STOPWORDS
+
+# Article kinds: NewsAPI articles, and Serper web results kept for research questions
+KIND_NEWS = 'news'
+KIND_SEARCH = 'search'
+
+def index_terms(text: str) -> Set[str]:
+    """Searchable terms of a text; abbreviations are expanded so 'BTC' and 'bitcoin' meet"""
+    words = re.findall(r'[a-z0-9]+', matcher.expand_abbreviations(text.lower()))
+    return {word for word in words if len(word) > 1 and word not in STOPWORDS}
+
+def canonical_url(url: str) -> str:
+    """URL with tracking parameters, fragment, 'www.' and trailing slash removed, for deduplication"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix('www.')
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip('/'), query, ''))
+
+class IndexedArticle:
+    __slots__ = ('article', 'terms', 'kinds')
+
+    def __init__(self, article: Dict, terms: Set[str], kind: str):
+        self.article = article
+        self.terms = terms
+        self.kinds = {kind}
+
+class NewsIndex:
+    """Bounded in-memory inverted index over news articles and search results.
+
+    Articles are deduplicated by canonical URL and indexed by the terms of
+    their title, description and source. When the index is full the
+    earliest ingested articles are dropped along with their postings.
+    """
+
+    def __init__(self, max_articles: Optional[int] = None):
+        self.max_articles = max_articles or config.NEWS_INDEX_MAX_ARTICLES
+        self._articles: "OrderedDict[str, IndexedArticle]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        # Newest-first article order per kind, rebuilt after the index changes
+        self._latest: Dict[str, List[Dict]] = {}
+        self.added = 0
+        self.duplicates = 0
+        self.evictions = 0
+
+    def add(self, articles: Iterable[Dict], kind: str = KIND_NEWS) -> int:
+        """Index articles shaped like get_financial_news results, returning how many were new"""
+        added = 0
+        for article in articles:
+            if not article.get('url') or not article.get('title'):
+                continue
+            url = canonical_url(article['url'])
+            existing = self._articles.get(url)
+            if existing is not None:
+                existing.kinds.add(kind)
+                self._articles.move_to_end(url)
+                self.duplicates += 1
+                continue
+
+            terms = index_terms(' '.join((article['title'], article.get('description') or '',
+                                          article.get('source') or '')))
+            self._articles[url] = IndexedArticle(article, terms, kind)
+            for term in terms:
+                self._postings.setdefault(term, set()).add(url)
+            added += 1
+
+        while len(self._articles) > self.max_articles:
+            url, entry = self._articles.popitem(last=False)
+            for term in entry.terms:
+                postings = self._postings.get(term)
+                postings.discard(url)
+                if not postings:
+                    del self._postings[term]
+            self.evictions += 1
+
+        if added:
+            self._latest.clear()
+        self.added += added
+        return added
+
+    def latest(self, limit: int, kind: str = KIND_NEWS) -> List[Dict]:
+        """Most recently published articles of a kind"""
+        ordered = self._latest.get(kind)
+        if ordered is None:
+            entries = [entry.article for entry in self._articles.values() if kind in entry.kinds]
+            ordered = sorted(entries, key=lambda article: article.get('publishedAt') or '', reverse=True)
+            self._latest[kind] = ordered
+        return ordered[:limit]
+
+    def search(self, query: str, limit: int, kind: str = KIND_NEWS, min_match: float = 1.0) -> List[Dict]:
+        """Articles containing at least `min_match` of the query's terms, best match then newest first"""
+        terms = index_terms(query)
+        if not terms:
+            return self.latest(limit, kind)
+
+        counts = Counter()
+        for term in terms:
+            counts.update(self._postings.get(term, ()))
+
+        needed = min_match * len(terms)
+        matches = [(count, self._articles[url].article) for url, count in counts.items()
+                   if count >= needed and kind in self._articles[url].kinds]
+        matches.sort(key=lambda match: (match[0], match[1].get('publishedAt') or ''), reverse=True)
+        return [article for _, article in matches[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'articles': len(self._articles),
+            'terms': len(self._postings),
+            'added': self.added,
+            'duplicates': self.duplicates,
+            'evictions': self.evictions
+        }
+
+# Global news index instance
+news_index = NewsIndex()
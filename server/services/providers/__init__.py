@@ -0,0 +1,45 @@
+from typing import List
+from config import config
+from .base import MarketDataProvider, ProviderError
+from .coingecko import CoinGeckoProvider
+from .coinmarketcap import CoinMarketCapProvider
+from .alpha_vantage import AlphaVantageProvider
+from .finnhub import FinnhubProvider
+from .currencylayer import CurrencyLayerProvider
+from .stub import StubProvider, static_forex_provider
+from .router import ProviderRouter
+
+PROVIDERS = {
+    'coingecko': CoinGeckoProvider,
+    'coinmarketcap': CoinMarketCapProvider,
+    'alpha_vantage': AlphaVantageProvider,
+    'finnhub': FinnhubProvider,
+    'currencylayer': CurrencyLayerProvider,
+    'stub': lambda: StubProvider(latency=config.STUB_PROVIDER_LATENCY, error_rate=config.STUB_PROVIDER_ERROR_RATE)
+}
+
+def build_providers(names: List[str]) -> List[MarketDataProvider]:
+    """Instantiate the configured providers, skipping unknown names and missing API keys"""
+    providers = []
+    for name in names:
+        factory = PROVIDERS.get(name)
+        if factory is None:
+            print(f"Unknown market data provider: {name}")
+            continue
+        provider = factory()
+        if provider.is_configured():
+            providers.append(provider)
+    providers.append(static_forex_provider())
+    return providers
+
+# Global provider router instance
+market_router = ProviderRouter(build_providers(config.MARKET_PROVIDERS))
+
+__all__ = [
+    'MarketDataProvider',
+    'ProviderError',
+    'ProviderRouter',
+    'StubProvider',
+    'build_providers',
+    'market_router'
+]
@@ -0,0 +1,15 @@
+from typing import Dict, List, Optional
+from services.stock_service import stock_service
+from .base import MarketDataProvider
+
+class AlphaVantageProvider(MarketDataProvider):
+    """Stock quotes through the quota-aware Alpha Vantage scheduler"""
+
+    name = "alpha_vantage"
+    capabilities = frozenset({'stocks'})
+
+    async def get_stock_quote(self, symbol: str) -> Optional[Dict]:
+        return await stock_service.get_quote(symbol)
+
+    async def get_stock_quotes(self, symbols: List[str]) -> List[Dict]:
+        return await stock_service.get_quotes(symbols)
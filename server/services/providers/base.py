@@ -0,0 +1,35 @@
+from typing import Dict, FrozenSet, List, Optional
+
+# Providers in the fallback tier are only used once every live provider has failed
+LIVE_TIER = 0
+FALLBACK_TIER = 1
+
+class ProviderError(Exception):
+    """Raised when a provider fails to answer (transport, HTTP or payload error)"""
+
+class MarketDataProvider:
+    """Base class for a market data source.
+
+    Providers raise ProviderError (or any exception) when they fail and return
+    empty results when they simply have no data, so the router can tell a
+    broken upstream from an unknown symbol.
+    """
+
+    name = "base"
+    capabilities: FrozenSet[str] = frozenset()
+    tier = LIVE_TIER
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def get_crypto_quotes(self, limit: int) -> List[Dict]:
+        raise NotImplementedError
+
+    async def get_stock_quote(self, symbol: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def get_stock_quotes(self, symbols: List[str]) -> List[Dict]:
+        raise NotImplementedError
+
+    async def get_forex_rates(self, pairs: List[str]) -> List[Dict]:
+        raise NotImplementedError
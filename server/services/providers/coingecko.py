@@ -0,0 +1,35 @@
+from typing import Dict, List
+from config import config
+from services.http_client import http_client
+from .base import MarketDataProvider, ProviderError
+
+class CoinGeckoProvider(MarketDataProvider):
+    name = "coingecko"
+    capabilities = frozenset({'crypto'})
+
+    async def get_crypto_quotes(self, limit: int) -> List[Dict]:
+        url = f"{config.COINGECKO_API}/coins/markets"
+        params = {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': limit,
+            'page': 1,
+            'sparkline': 'false',
+            'price_change_percentage': '24h'
+        }
+
+        async with http_client.get('coingecko', url, params=params) as response:
+            if response.status != 200:
+                raise ProviderError(f"CoinGecko API error: {response.status}")
+            data = await response.json()
+
+        return [{
+            'id': item['id'],
+            'symbol': item['symbol'].upper(),
+            'name': item['name'],
+            'price': item['current_price'],
+            'price_chg': item.get('price_change_percentage_24h', 0),
+            'volume_24h': item.get('total_volume', 0),
+            'market_cap': item.get('market_cap', 0),
+            'market_cap_rank': item.get('market_cap_rank')
+        } for item in data]
@@ -0,0 +1,56 @@
+from typing import Dict, List
+from config import config
+from services.http_client import http_client
+from .base import MarketDataProvider, ProviderError
+
+# CMC slugs that differ from the CoinGecko id of the same coin. The rest of the top listings share
+# their slug with CoinGecko; a coin missing here whose ids differ won't resolve by id after failover
+COINGECKO_IDS = {
+    'xrp': 'ripple',
+    'bnb': 'binancecoin',
+    'avalanche': 'avalanche-2',
+    'polygon': 'matic-network',
+    'multi-collateral-dai': 'dai',
+    'toncoin': 'the-open-network',
+    'polkadot-new': 'polkadot',
+    'near-protocol': 'near',
+    'unus-sed-leo': 'leo-token',
+    'crypto-com-coin': 'crypto-com-chain',
+    'hedera': 'hedera-hashgraph',
+    'optimism-ethereum': 'optimism',
+    'render': 'render-token',
+    'injective': 'injective-protocol'
+}
+
+class CoinMarketCapProvider(MarketDataProvider):
+    name = "coinmarketcap"
+    capabilities = frozenset({'crypto'})
+
+    def is_configured(self) -> bool:
+        return bool(config.COINMARKETCAP_KEY)
+
+    async def get_crypto_quotes(self, limit: int) -> List[Dict]:
+        url = f"{config.COINMARKETCAP_API}/cryptocurrency/listings/latest"
+        params = {'start': 1, 'limit': limit, 'convert': 'USD'}
+        headers = {'X-CMC_PRO_API_KEY': config.COINMARKETCAP_KEY}
+
+        async with http_client.get('coinmarketcap', url, params=params, headers=headers) as response:
+            if response.status != 200:
+                raise ProviderError(f"CoinMarketCap API error: {response.status}")
+            data = await response.json()
+
+        crypto_data = []
+        for item in data.get('data', []):
+            quote = item.get('quote', {}).get('USD', {})
+            crypto_data.append({
+                # Ids are CoinGecko's, used by /api/crypto/{id}, 'crypto:<id>' channels and index lookups
+                'id': COINGECKO_IDS.get(item.get('slug'), item.get('slug')),
+                'symbol': item['symbol'].upper(),
+                'name': item['name'],
+                'price': quote.get('price', 0),
+                'price_chg': quote.get('percent_change_24h', 0),
+                'volume_24h': quote.get('volume_24h', 0),
+                'market_cap': quote.get('market_cap', 0),
+                'market_cap_rank': item.get('cmc_rank')
+            })
+        return crypto_data
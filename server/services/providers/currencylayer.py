@@ -0,0 +1,44 @@
+from typing import Dict, List
+from config import config
+from services.http_client import http_client
+from .base import MarketDataProvider, ProviderError
+
+class CurrencyLayerProvider(MarketDataProvider):
+    name = "currencylayer"
+    capabilities = frozenset({'forex'})
+
+    def __init__(self):
+        # The live endpoint has no change field, so compare against our previous reading
+        self._previous: Dict[str, float] = {}
+
+    def is_configured(self) -> bool:
+        return bool(config.CURRENCYLAYER_KEY)
+
+    async def get_forex_rates(self, pairs: List[str]) -> List[Dict]:
+        currencies = {currency for pair in pairs for currency in pair.split('/') if currency != 'USD'}
+        url = f"{config.CURRENCYLAYER_API}/live"
+        params = {'access_key': config.CURRENCYLAYER_KEY, 'currencies': ','.join(sorted(currencies))}
+
+        async with http_client.get('currencylayer', url, params=params) as response:
+            if response.status != 200:
+                raise ProviderError(f"CurrencyLayer API error: {response.status}")
+            data = await response.json()
+
+        if not data.get('success'):
+            raise ProviderError(f"CurrencyLayer error: {data.get('error', {}).get('info', 'unknown')}")
+
+        quotes = data.get('quotes', {})
+        forex_data = []
+        for pair in pairs:
+            base, quote_currency = pair.split('/')
+            if base == 'USD' and f"USD{quote_currency}" in quotes:
+                price = quotes[f"USD{quote_currency}"]
+            elif quote_currency == 'USD' and quotes.get(f"USD{base}"):
+                price = 1 / quotes[f"USD{base}"]
+            else:
+                continue
+
+            previous = self._previous.get(pair, price)
+            self._previous[pair] = price
+            forex_data.append({'pair': pair, 'price': round(price, 6), 'change': round(price - previous, 6)})
+        return forex_data
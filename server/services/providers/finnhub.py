@@ -0,0 +1,43 @@
+import asyncio
+from typing import Dict, List, Optional
+from config import config
+from services.http_client import http_client
+from .base import MarketDataProvider, ProviderError
+
+class FinnhubProvider(MarketDataProvider):
+    name = "finnhub"
+    capabilities = frozenset({'stocks'})
+
+    def is_configured(self) -> bool:
+        return bool(config.FINNHUB_KEY)
+
+    async def get_stock_quote(self, symbol: str) -> Optional[Dict]:
+        url = f"{config.FINNHUB_API}/quote"
+        params = {'symbol': symbol, 'token': config.FINNHUB_KEY}
+
+        async with http_client.get('finnhub', url, params=params) as response:
+            if response.status != 200:
+                raise ProviderError(f"Finnhub API error: {response.status}")
+            quote = await response.json()
+
+        # Finnhub answers unknown symbols with an all-zero quote
+        if not quote.get('c'):
+            return None
+        return {
+            'symbol': symbol,
+            'price': float(quote['c']),
+            'change': float(quote.get('d') or 0),
+            'change_percent': f"{float(quote.get('dp') or 0):.4f}",
+            'volume': 0,
+            'high': float(quote.get('h') or 0),
+            'low': float(quote.get('l') or 0),
+            'open': float(quote.get('o') or 0)
+        }
+
+    async def get_stock_quotes(self, symbols: List[str]) -> List[Dict]:
+        quotes = await asyncio.gather(*[self.get_stock_quote(symbol) for symbol in symbols],
+                                      return_exceptions=True)
+        valid = [quote for quote in quotes if quote is not None and not isinstance(quote, Exception)]
+        if not valid and any(isinstance(quote, Exception) for quote in quotes):
+            raise ProviderError("Finnhub quotes failed")
+        return valid
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+from config import config
+from services.latency import LatencyWindow
+from .base import MarketDataProvider, ProviderError
+
+T = TypeVar('T')
+
+class ProviderRouter:
+    """Routes each market data request to the fastest healthy provider.
+
+    Providers are ranked by tier, health (rolling error rate) and median
+    latency. If the chosen provider hasn't answered by its own p95 latency a
+    hedged request goes to the next one, and failures or empty answers fail
+    over immediately. The first non-empty result wins and the rest are cancelled.
+    """
+
+    def __init__(self, providers: List[MarketDataProvider]):
+        self.providers = providers
+        self._stats: Dict[str, LatencyWindow] = {
+            provider.name: LatencyWindow(config.PROVIDER_STATS_WINDOW) for provider in providers
+        }
+
+    def candidates(self, capability: str) -> List[MarketDataProvider]:
+        """Providers able to serve a capability, best first"""
+        eligible = [provider for provider in self.providers if capability in provider.capabilities]
+        return sorted(eligible, key=self._rank)
+
+    def _is_healthy(self, provider: MarketDataProvider) -> bool:
+        stats = self._stats[provider.name]
+        return len(stats) < config.PROVIDER_MIN_SAMPLES or stats.error_rate() <= config.PROVIDER_MAX_ERROR_RATE
+
+    def _rank(self, provider: MarketDataProvider):
+        # Providers without samples yet rank as fastest so they get measured
+        median = self._stats[provider.name].percentile(0.5) or 0.0
+        return (provider.tier, not self._is_healthy(provider), median)
+
+    def _hedge_delay(self, provider: MarketDataProvider) -> float:
+        p95 = self._stats[provider.name].percentile(0.95)
+        if p95 is None:
+            return config.PROVIDER_HEDGE_MAX
+        return min(config.PROVIDER_HEDGE_MAX, max(config.PROVIDER_HEDGE_MIN, p95))
+
+    async def _timed(self, provider: MarketDataProvider,
+                     call: Callable[[MarketDataProvider], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        try:
+            result = await call(provider)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._stats[provider.name].record(time.monotonic() - start, ok=False)
+            raise
+        self._stats[provider.name].record(time.monotonic() - start, ok=True)
+        return result
+
+    async def fetch(self, capability: str, call: Callable[[MarketDataProvider], Awaitable[T]]) -> T:
+        """Run `call` against providers for a capability, hedging and failing over as needed"""
+        candidates = iter(self.candidates(capability))
+        pending: Dict[asyncio.Task, MarketDataProvider] = {}
+        last_launched: Optional[MarketDataProvider] = None
+        last_error: Optional[Exception] = None
+        # A provider that answered with nothing is "empty", not "failed": its answer beats any error
+        answered = False
+        empty_result = None
+
+        def launch() -> bool:
+            nonlocal last_launched
+            provider = next(candidates, None)
+            if provider is None:
+                return False
+            pending[asyncio.ensure_future(self._timed(provider, call))] = provider
+            last_launched = provider
+            return True
+
+        if not launch():
+            raise ProviderError(f"No provider configured for {capability}")
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=self._hedge_delay(last_launched),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than this provider's p95: hedge with the next one
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"{provider.name} {capability} error: {e}")
+                        last_error = e
+                        launch()
+                        continue
+                    if result:
+                        return result
+                    answered = True
+                    empty_result = result
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not answered and last_error is not None:
+            raise last_error
+        return empty_result
+
+    def stats(self) -> Dict[str, Dict]:
+        """Rolling latency and error rate per provider"""
+        return {
+            provider.name: {
+                'p50': self._stats[provider.name].percentile(0.5),
+                'p95': self._stats[provider.name].percentile(0.95),
+                'error_rate': self._stats[provider.name].error_rate(),
+                'healthy': self._is_healthy(provider),
+                'samples': len(self._stats[provider.name])
+            }
+            for provider in self.providers
+        }
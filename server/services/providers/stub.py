@@ -0,0 +1,76 @@
+import asyncio
+import random
+from typing import Dict, FrozenSet, List, Optional
+from .base import FALLBACK_TIER, LIVE_TIER, MarketDataProvider, ProviderError
+
+STUB_CRYPTO = [
+    {'id': 'bitcoin', 'symbol': 'BTC', 'name': 'Bitcoin', 'price': 65000.0, 'price_chg': 1.2,
+     'volume_24h': 3.1e10, 'market_cap': 1.28e12, 'market_cap_rank': 1},
+    {'id': 'ethereum', 'symbol': 'ETH', 'name': 'Ethereum', 'price': 3200.0, 'price_chg': -0.8,
+     'volume_24h': 1.5e10, 'market_cap': 3.85e11, 'market_cap_rank': 2},
+    {'id': 'tether', 'symbol': 'USDT', 'name': 'Tether', 'price': 1.0, 'price_chg': 0.01,
+     'volume_24h': 5.0e10, 'market_cap': 1.1e11, 'market_cap_rank': 3},
+    {'id': 'solana', 'symbol': 'SOL', 'name': 'Solana', 'price': 150.0, 'price_chg': 3.4,
+     'volume_24h': 2.5e9, 'market_cap': 6.9e10, 'market_cap_rank': 4},
+    {'id': 'ripple', 'symbol': 'XRP', 'name': 'XRP', 'price': 0.52, 'price_chg': -1.5,
+     'volume_24h': 1.2e9, 'market_cap': 2.9e10, 'market_cap_rank': 5}
+]
+
+STUB_FOREX = [
+    {'pair': 'EUR/USD', 'price': 1.0950, 'change': 0.0020},
+    {'pair': 'GBP/USD', 'price': 1.2750, 'change': -0.0015},
+    {'pair': 'USD/JPY', 'price': 145.20, 'change': 0.3000},
+    {'pair': 'USD/CAD', 'price': 1.3400, 'change': -0.0010},
+    {'pair': 'AUD/USD', 'price': 0.6680, 'change': 0.0030},
+]
+
+class StubProvider(MarketDataProvider):
+    """Local provider serving canned data with configurable latency and error rate.
+
+    Used for tests and benchmarks, and (as the fallback tier) to keep serving
+    indicative forex rates when no live forex provider is reachable.
+    """
+
+    def __init__(self, name: str = "stub", latency: float = 0.0, error_rate: float = 0.0,
+                 capabilities: Optional[FrozenSet[str]] = None, tier: int = LIVE_TIER):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.capabilities = capabilities if capabilities is not None else frozenset({'crypto', 'stocks', 'forex'})
+        self.tier = tier
+
+    async def _simulate(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise ProviderError(f"{self.name} simulated failure")
+
+    async def get_crypto_quotes(self, limit: int) -> List[Dict]:
+        await self._simulate()
+        return [dict(coin) for coin in STUB_CRYPTO[:limit]]
+
+    async def get_stock_quote(self, symbol: str) -> Optional[Dict]:
+        await self._simulate()
+        # Deterministic pseudo-price so repeated calls agree
+        price = 50.0 + sum(ord(char) for char in symbol) % 400
+        return {
+            'symbol': symbol,
+            'price': price,
+            'change': 0.0,
+            'change_percent': '0.0000',
+            'volume': 1000000,
+            'high': price,
+            'low': price,
+            'open': price
+        }
+
+    async def get_stock_quotes(self, symbols: List[str]) -> List[Dict]:
+        return [await self.get_stock_quote(symbol) for symbol in symbols]
+
+    async def get_forex_rates(self, pairs: List[str]) -> List[Dict]:
+        await self._simulate()
+        return [dict(rate) for rate in STUB_FOREX if rate['pair'] in pairs]
+
+def static_forex_provider() -> StubProvider:
+    """Indicative forex rates used only when every live forex provider fails"""
+    return StubProvider(name="static_forex", capabilities=frozenset({'forex'}), tier=FALLBACK_TIER)
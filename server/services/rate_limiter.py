@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+class TokenBucket:
+    """Token bucket allowing `rate` calls per `period` seconds with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, period: float = 60.0, capacity: Optional[float] = None):
+        self.rate = rate
+        self.period = period
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.period)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available, returning whether the call may proceed"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` will be available"""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) * self.period / self.rate
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Return tokens that were acquired but not spent"""
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream reports we were throttled anyway"""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
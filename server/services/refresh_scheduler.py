@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Tuple
+from config import config
+from .cache_service import cache
+
+class RefreshScheduler:
+    """Keeps cached snapshots warm by refreshing them on their CACHE_DURATION cadence"""
+
+    def __init__(self):
+        self._jobs: List[Tuple[str, Callable[[], Awaitable[Any]], str, bool]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, key: str, fetcher: Callable[[], Awaitable[Any]], category: str) -> None:
+        """Refresh cache key from fetcher every REFRESH_LEAD * CACHE_DURATION[category] seconds"""
+        self._jobs.append((key, fetcher, category, True))
+
+    def register_task(self, name: str, task: Callable[[], Awaitable[Any]], category: str) -> None:
+        """Run task on the same cadence for its side effects only; its result is not cached"""
+        self._jobs.append((name, task, category, False))
+
+    async def start(self) -> None:
+        """Start one refresh loop per registered snapshot"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(*job)) for job in self._jobs]
+
+    async def stop(self) -> None:
+        """Cancel all refresh loops and forget their jobs, which the next startup registers again"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._jobs = []
+
+    async def _run(self, key: str, fetcher: Callable[[], Awaitable[Any]], category: str, store: bool) -> None:
+        interval = cache.ttl_for(category) * config.REFRESH_LEAD
+        while True:
+            try:
+                if store:
+                    await cache.refresh(key, fetcher, ttl=cache.ttl_for(category),
+                                        stale_ttl=cache.stale_ttl_for(category))
+                else:
+                    await fetcher()
+            except Exception as e:
+                print(f"Background refresh error for {key}: {e}")
+            await asyncio.sleep(interval)
+
+# Global refresh scheduler instance
+refresh_scheduler = RefreshScheduler()
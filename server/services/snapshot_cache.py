@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+def dumps(data: Any) -> bytes:
+    """Compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(',', ':'), default=_default).encode('utf-8')
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class EncodedSnapshot:
+    """A response body encoded once, with its validators and lazily compressed variants"""
+
+    __slots__ = ('body', 'etag', 'modified', 'last_modified', '_variants')
+
+    def __init__(self, body: bytes, modified: Optional[datetime] = None):
+        self.body = body
+        # Weak: the identity and compressed variants carry the same representation
+        self.etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.modified = (modified or datetime.now(timezone.utc)).replace(microsecond=0)
+        self.last_modified = format_datetime(self.modified, usegmt=True)
+        self._variants: Dict[str, bytes] = {}
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Whether a conditional request's validators still match (If-None-Match takes precedence)"""
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or self.etag.removeprefix('W/') in tags
+        if if_modified_since:
+            try:
+                return self.modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Best content coding the client accepts, or None for identity"""
+        if len(self.body) < MIN_COMPRESS_SIZE or not accept_encoding:
+            return None
+        accepted = set()
+        for part in accept_encoding.lower().split(','):
+            coding, _, params = part.partition(';')
+            params = params.replace(' ', '')
+            try:
+                quality = float(params[2:]) if params.startswith('q=') else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """The body in a content coding, compressed at most once per snapshot"""
+        if encoding is None:
+            return self.body
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = brotli.compress(self.body) if encoding == 'br' else gzip.compress(self.body, compresslevel=6)
+            self._variants[encoding] = variant
+        return variant
+
+class SnapshotEncoder:
+    """Encodes each named response once per distinct set of source snapshots.
+
+    Cached market snapshots are shared objects that are replaced on refresh,
+    so the identity of the sources tells whether the encoded bytes are
+    still current.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[Any, ...], EncodedSnapshot]] = {}
+
+    def encode(self, name: str, sources: Tuple[Any, ...], build: Callable[[], Any]) -> EncodedSnapshot:
+        entry = self._entries.get(name)
+        if entry is not None and len(entry[0]) == len(sources) and all(a is b for a, b in zip(entry[0], sources)):
+            return entry[1]
+
+        snapshot = EncodedSnapshot(dumps(build()))
+        self._entries[name] = (sources, snapshot)
+        return snapshot
+
+# Global snapshot encoder instance
+snapshot_encoder = SnapshotEncoder()
@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+from config import config
+from .http_client import http_client
+from .rate_limiter import TokenBucket
+
+BULK_BATCH_SIZE = 100
+
+# Lower values are dispatched first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+class StockService:
+    """Quota-aware Alpha Vantage quote scheduler.
+
+    Quote requests are queued by priority and deduplicated per symbol. A single
+    worker dispatches them only when one of the API keys' token buckets has
+    budget, so calls are spread across the free-tier quota instead of being
+    throttled. Symbols users ask for directly jump the queue and are ranked
+    first in background list refreshes, and quotes that are still fresh are
+    never re-fetched.
+    """
+
+    def __init__(self):
+        self.api_keys = config.ALPHA_VANTAGE_KEYS
+        self._buckets = {key: TokenBucket(config.ALPHA_VANTAGE_CALLS_PER_MINUTE) for key in self.api_keys}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._priorities: Dict[str, int] = {}
+        self._attempts: Dict[str, int] = {}
+        self._in_flight: Set[str] = set()
+        self._latest: Dict[str, Tuple[float, Dict]] = {}
+        self._demand: Counter = Counter()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def get_quote(self, symbol: str, priority: int = PRIORITY_USER,
+                        timeout: Optional[float] = None) -> Optional[Dict]:
+        """Get one quote, waiting at most `timeout` seconds for quota before falling back to the last known quote"""
+        symbol = symbol.upper()
+        # Demand only ranks list refreshes, so only tracked symbols are counted and arbitrary input can't grow it
+        if priority == PRIORITY_USER and symbol in config.STOCK_SYMBOLS:
+            self._demand[symbol] += 1
+
+        future = self._enqueue(symbol, priority)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or config.ALPHA_VANTAGE_MAX_WAIT)
+        except asyncio.TimeoutError:
+            return self.latest_quote(symbol)
+
+    async def get_quotes(self, symbols: List[str], priority: int = PRIORITY_BACKGROUND,
+                         wait: Optional[float] = None) -> List[Dict]:
+        """Refresh stale quotes for many symbols and return every quote available after `wait` seconds.
+
+        Symbols still queued when the wait ends keep their place and update the
+        latest quotes once quota frees up.
+        """
+        ranked = sorted(symbols, key=lambda symbol: -self._demand[symbol])
+        futures = [self._enqueue(symbol, priority) for symbol in ranked if not self._is_fresh(symbol)]
+        if futures:
+            await asyncio.wait(futures, timeout=wait if wait is not None else config.ALPHA_VANTAGE_LIST_WAIT)
+
+        quotes = [self.latest_quote(symbol) for symbol in symbols]
+        return [quote for quote in quotes if quote is not None]
+
+    def latest_quote(self, symbol: str) -> Optional[Dict]:
+        """Last successfully fetched quote for a symbol, however old"""
+        latest = self._latest.get(symbol.upper())
+        return latest[1] if latest else None
+
+    async def close(self) -> None:
+        """Stop the dispatch worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def _is_fresh(self, symbol: str) -> bool:
+        latest = self._latest.get(symbol)
+        return latest is not None and time.monotonic() - latest[0] < config.CACHE_DURATION['stocks']
+
+    def _enqueue(self, symbol: str, priority: int) -> asyncio.Future:
+        future = self._pending.get(symbol)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[symbol] = future
+            self._attempts[symbol] = 0
+            self._priorities[symbol] = priority
+            self._queue.put_nowait((priority, next(self._seq), symbol))
+        elif symbol not in self._in_flight and priority < self._priorities[symbol]:
+            # Re-queue at the higher priority; the old queue entry is skipped as stale
+            self._priorities[symbol] = priority
+            self._queue.put_nowait((priority, next(self._seq), symbol))
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return future
+
+    def _is_current(self, priority: int, symbol: str) -> bool:
+        return (symbol in self._pending and symbol not in self._in_flight
+                and self._priorities.get(symbol) == priority)
+
+    def _take_batch(self, size: int) -> List[str]:
+        batch = []
+        while len(batch) < size and not self._queue.empty():
+            priority, _, symbol = self._queue.get_nowait()
+            if self._is_current(priority, symbol) and symbol not in batch:
+                batch.append(symbol)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for work, then for quota, and only then pick the highest-priority symbols
+            self._queue.put_nowait(await self._queue.get())
+            api_key = await self._acquire_key()
+
+            batch = self._take_batch(BULK_BATCH_SIZE if config.ALPHA_VANTAGE_BULK else 1)
+            if not batch:
+                self._buckets[api_key].refund()
+                continue
+
+            self._in_flight.update(batch)
+            asyncio.create_task(self._dispatch(api_key, batch))
+
+    async def _acquire_key(self) -> str:
+        while True:
+            for api_key, bucket in self._buckets.items():
+                if bucket.try_acquire():
+                    return api_key
+            await asyncio.sleep(min(bucket.time_until_available() for bucket in self._buckets.values()))
+
+    async def _dispatch(self, api_key: str, batch: List[str]) -> None:
+        try:
+            if config.ALPHA_VANTAGE_BULK:
+                quotes, throttled = await self._fetch_bulk_quotes(api_key, batch)
+            else:
+                quotes, throttled = await self._fetch_global_quote(api_key, batch[0])
+        except Exception as e:
+            print(f"Error fetching stocks {', '.join(batch)}: {e}")
+            for symbol in batch:
+                self._resolve(symbol, None)
+            return
+
+        if throttled:
+            print(f"Alpha Vantage throttled key ...{api_key[-4:]}, requeueing {len(batch)} symbols")
+            self._buckets[api_key].drain()
+            for symbol in batch:
+                self._retry(symbol)
+            return
+
+        for symbol in batch:
+            self._resolve(symbol, quotes.get(symbol))
+
+    def _retry(self, symbol: str) -> None:
+        self._in_flight.discard(symbol)
+        self._attempts[symbol] += 1
+        if self._attempts[symbol] > config.ALPHA_VANTAGE_MAX_RETRIES:
+            self._resolve(symbol, None)
+        else:
+            self._queue.put_nowait((self._priorities[symbol], next(self._seq), symbol))
+
+    def _resolve(self, symbol: str, quote: Optional[Dict]) -> None:
+        self._in_flight.discard(symbol)
+        self._priorities.pop(symbol, None)
+        self._attempts.pop(symbol, None)
+        future = self._pending.pop(symbol, None)
+
+        if quote is not None:
+            self._latest[symbol] = (time.monotonic(), quote)
+        if future is not None and not future.done():
+            future.set_result(quote)
+
+    async def _fetch_global_quote(self, api_key: str, symbol: str) -> Tuple[Dict[str, Dict], bool]:
+        params = {
+            'function': 'GLOBAL_QUOTE',
+            'symbol': symbol,
+            'apikey': api_key
+        }
+
+        async with http_client.get('alpha_vantage', config.ALPHA_VANTAGE_API, params=params) as response:
+            if response.status != 200:
+                return {}, False
+            data = await response.json()
+
+        if data.get('Global Quote'):
+            quote = data['Global Quote']
+            return {symbol: {
+                'symbol': symbol,
+                'price': float(quote.get('05. price', 0)),
+                'change': float(quote.get('09. change', 0)),
+                'change_percent': quote.get('10. change percent', '0%').replace('%', ''),
+                'volume': int(quote.get('06. volume', 0)),
+                'high': float(quote.get('03. high', 0)),
+                'low': float(quote.get('04. low', 0)),
+                'open': float(quote.get('02. open', 0))
+            }}, False
+        return {}, _is_throttled(data)
+
+    async def _fetch_bulk_quotes(self, api_key: str, symbols: List[str]) -> Tuple[Dict[str, Dict], bool]:
+        params = {
+            'function': 'REALTIME_BULK_QUOTES',
+            'symbol': ','.join(symbols),
+            'apikey': api_key
+        }
+
+        async with http_client.get('alpha_vantage', config.ALPHA_VANTAGE_API, params=params) as response:
+            if response.status != 200:
+                return {}, False
+            data = await response.json()
+
+        quotes = {}
+        for item in data.get('data', []):
+            symbol = item.get('symbol', '').upper()
+            if symbol:
+                quotes[symbol] = {
+                    'symbol': symbol,
+                    'price': float(item.get('close', 0)),
+                    'change': float(item.get('change', 0)),
+                    'change_percent': str(item.get('change_percent', '0')).replace('%', ''),
+                    'volume': int(float(item.get('volume', 0))),
+                    'high': float(item.get('high', 0)),
+                    'low': float(item.get('low', 0)),
+                    'open': float(item.get('open', 0))
+                }
+        return quotes, not quotes and _is_throttled(data)
+
+def _is_throttled(data: Dict) -> bool:
+    """Alpha Vantage reports rate limiting as a 200 with a Note/Information message"""
+    return 'Note' in data or 'Information' in data
+
+# Global stock service instance, shared so every caller draws from the same quota
+stock_service = StockService()
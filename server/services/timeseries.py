@@ -0,0 +1,338 @@
+import asyncio
+import os
+import sqlite3
+import time
+import numpy as np
+from collections import OrderedDict
+from contextlib import closing
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from config import config
+from .cache_service import cache
+
+DAY_MS = 86_400_000
+
+class Series:
+    """Columnar chart series: int64 millisecond timestamps plus aligned float64 columns.
+
+    Windows are views into the same arrays, so slicing a shorter range out of
+    a longer fetch copies nothing. Series that are kept (fetched, extended or
+    loaded) own their columns, so no view pins a larger source array.
+    """
+
+    __slots__ = ('timestamps', 'prices', 'market_caps', 'total_volumes')
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray,
+                 market_caps: np.ndarray, total_volumes: np.ndarray):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.market_caps = market_caps
+        self.total_volumes = total_volumes
+
+    @classmethod
+    def from_market_chart(cls, data: Dict) -> 'Series':
+        """Build from CoinGecko's market_chart payload ([[ts, value], ...] per field)"""
+        prices = _pairs(data.get('prices'))
+        prices = prices[~np.isnan(prices[:, 1])]
+        timestamps = prices[:, 0].astype(np.int64)
+        return cls(
+            timestamps,
+            prices[:, 1],
+            _align(timestamps, _pairs(data.get('market_caps'))),
+            _align(timestamps, _pairs(data.get('total_volumes')))
+        ).owned()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __sizeof__(self) -> int:
+        # Lets the cache's byte budget see the array data, not just the wrapper and array headers
+        return object.__sizeof__(self) + sum(column.nbytes for column in self._columns())
+
+    def _columns(self):
+        return self.timestamps, self.prices, self.market_caps, self.total_volumes
+
+    def owned(self) -> 'Series':
+        """This series with every column in contiguous memory of its own (views and buffers copied)"""
+        if all(column.base is None and column.flags.c_contiguous for column in self._columns()):
+            return self
+        return Series(*(np.array(column, copy=True, order='C') for column in self._columns()))
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self.timestamps[-1])
+
+    def take(self, index) -> 'Series':
+        return Series(*(column[index] for column in self._columns()))
+
+    def window(self, days: float) -> 'Series':
+        """The trailing `days` of the series, as views"""
+        if not len(self):
+            return self
+        start = np.searchsorted(self.timestamps, self.timestamps[-1] - int(days * DAY_MS), side='left')
+        return self.take(slice(start, None))
+
+    def extend(self, tail: 'Series', step_ms: int, span_ms: int) -> 'Series':
+        """Merge a freshly fetched tail, conformed to the tier's spacing, and trim to the tier's span.
+
+        The old series' last point is CoinGecko's live price, so it is replaced
+        rather than kept. Tail points closer than one step to the previous kept
+        point are dropped, except the newest, which becomes the new live point.
+        """
+        settled = self.take(slice(None, -1)) if len(self) > 1 else self
+        tail = tail.take(slice(np.searchsorted(tail.timestamps, settled.last_timestamp, side='right'), None))
+        if not len(tail):
+            return self
+
+        keep = []
+        last = settled.last_timestamp
+        for i, ts in enumerate(tail.timestamps[:-1]):
+            if ts - last >= step_ms:
+                keep.append(i)
+                last = ts
+        keep.append(len(tail) - 1)
+        tail = tail.take(np.array(keep))
+
+        merged = Series(*(np.concatenate((old, new)) for old, new in zip(settled._columns(), tail._columns())))
+        start = np.searchsorted(merged.timestamps, merged.last_timestamp - span_ms, side='left')
+        return merged.take(slice(start, None)).owned()
+
+    def downsample(self, points: int) -> 'Series':
+        """Reduce to about `points` samples with Largest-Triangle-Three-Buckets on price"""
+        if points >= len(self) or points < 3:
+            return self
+        return self.take(lttb_indices(self.timestamps, self.prices, points))
+
+    def to_chart(self, symbol: str, days: int) -> Dict:
+        """ChartData-shaped dict of [[timestamp, value], ...] lists"""
+        return {
+            'prices': to_rows(self.timestamps, self.prices),
+            'market_caps': to_rows(self.timestamps, self.market_caps),
+            'total_volumes': to_rows(self.timestamps, self.total_volumes),
+            'symbol': symbol,
+            'days': days
+        }
+
+    def to_ohlc_chart(self, symbol: str, days: int, points: int) -> Dict:
+        """ChartData-shaped dict with prices bucketed into [timestamp, open, high, low, close] candles.
+
+        Market caps and volumes take the last value in each bucket; CoinGecko
+        volumes are rolling 24h figures, so summing them would be wrong.
+        """
+        if not len(self):
+            return self.to_chart(symbol, days)
+
+        bounds = np.linspace(0, len(self), min(points, len(self)) + 1).astype(np.int64)
+        starts, ends = bounds[:-1], bounds[1:] - 1
+        timestamps = self.timestamps[starts]
+        candles = np.column_stack((
+            timestamps.astype(np.float64),
+            self.prices[starts],
+            np.maximum.reduceat(self.prices, starts),
+            np.minimum.reduceat(self.prices, starts),
+            self.prices[ends]
+        ))
+        return {
+            'prices': candles.tolist(),
+            'market_caps': to_rows(timestamps, self.market_caps[ends]),
+            'total_volumes': to_rows(timestamps, self.total_volumes[ends]),
+            'symbol': symbol,
+            'days': days
+        }
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps (first and last always kept)"""
+    n = len(x)
+    x = x.astype(np.float64)
+    bounds = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # The next bucket's average (or the final point) is the triangle's third vertex
+        if i + 2 < len(bounds):
+            avg_x, avg_y = x[end:bounds[i + 2]].mean(), y[end:bounds[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def tier_for(days: float) -> str:
+    """Finest resolution tier whose range covers `days`"""
+    for name, tier in sorted(config.TIMESERIES_TIERS.items(), key=lambda item: item[1]['days']):
+        if days <= tier['days']:
+            return name
+    return max(config.TIMESERIES_TIERS, key=lambda name: config.TIMESERIES_TIERS[name]['days'])
+
+class SeriesDatabase:
+    """SQLite persistence for chart series, one row of raw column bytes per (coin, tier).
+
+    Methods are blocking; callers run them with asyncio.to_thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._ready:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                "coin_id TEXT NOT NULL, tier TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "timestamps BLOB NOT NULL, prices BLOB NOT NULL, market_caps BLOB NOT NULL, "
+                "total_volumes BLOB NOT NULL, PRIMARY KEY (coin_id, tier))"
+            )
+            self._ready = True
+        return connection
+
+    def load(self, coin_id: str, tier: str) -> Optional[Series]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT timestamps, prices, market_caps, total_volumes FROM series WHERE coin_id = ? AND tier = ?",
+                (coin_id, tier)
+            ).fetchone()
+        if row is None:
+            return None
+        return Series(
+            np.frombuffer(row[0], dtype=np.int64),
+            *(np.frombuffer(column, dtype=np.float64) for column in row[1:])
+        ).owned()
+
+    def save(self, coin_id: str, tier: str, series: Series) -> None:
+        # The inner block commits; closing() releases the connection
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (coin_id, tier, time.time(), *(np.ascontiguousarray(column).tobytes() for column in series._columns()))
+            )
+
+def _open_database() -> Optional[SeriesDatabase]:
+    if not config.TIMESERIES_DB_PATH:
+        return None
+    directory = os.path.dirname(config.TIMESERIES_DB_PATH)
+    try:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        print(f"Time series persistence disabled: {e}")
+        return None
+    return SeriesDatabase(config.TIMESERIES_DB_PATH)
+
+# Latest series per (coin, tier), shared by every store so refreshes only fetch the missing tail
+_history: "OrderedDict[Tuple[str, str], Optional[Series]]" = OrderedDict()
+series_db = _open_database()
+
+class TimeSeriesStore:
+    """Per-coin chart series, one columnar Series per (coin, resolution tier).
+
+    A tier is fetched once over its full range and every requested window is
+    sliced from it, so days=30 and days=31 share one upstream fetch and one
+    copy of the data. Series live in the shared cache, which provides
+    single-flight fetches, TTLs, stale-while-revalidate and the byte budget.
+
+    Once a tier has been fetched, refreshes request only the range after its
+    last point and merge it in. Series are persisted to SQLite so a restart
+    resumes from the stored history instead of refetching it.
+    """
+
+    def __init__(self, fetcher: Callable[[str, int], Awaitable[Dict]],
+                 range_fetcher: Optional[Callable[[str, int, int], Awaitable[Dict]]] = None,
+                 database: Optional[SeriesDatabase] = series_db):
+        self.fetcher = fetcher
+        self.range_fetcher = range_fetcher
+        self.database = database
+
+    async def get_series(self, coin_id: str, days: float) -> Optional[Series]:
+        """The trailing `days` window of a coin's series, or None if it can't be fetched"""
+        series = await self.get_tier_series(coin_id, tier_for(days))
+        return series.window(days) if series else None
+
+    async def get_tier_series(self, coin_id: str, tier_name: str) -> Optional[Series]:
+        """A coin's full series at one resolution tier (the same object until it is refreshed)"""
+        tier = config.TIMESERIES_TIERS[tier_name]
+        return await cache.get_or_set(
+            f"crypto_series_{coin_id}_{tier_name}",
+            lambda: self._refresh(coin_id, tier_name),
+            ttl=tier['ttl'],
+            stale_ttl=tier['stale_ttl']
+        )
+
+    async def _refresh(self, coin_id: str, tier_name: str) -> Optional[Series]:
+        """Fetch only the missing tail when there is usable history, else the full range"""
+        tier = config.TIMESERIES_TIERS[tier_name]
+        span_ms = tier['days'] * DAY_MS
+        previous = await self._previous(coin_id, tier_name)
+
+        now_ms = int(time.time() * 1000)
+        if previous is not None and self.range_fetcher is not None and now_ms - previous.last_timestamp < span_ms:
+            tail = await self._fetch_range(coin_id, previous.last_timestamp // 1000 - tier['step'], now_ms // 1000)
+            series = previous.extend(tail, tier['step'] * 1000, span_ms) if tail is not None else previous
+        else:
+            series = await self._fetch(coin_id, tier['days'])
+
+        if series is not None and series is not previous:
+            self._remember(coin_id, tier_name, series)
+            if self.database is not None:
+                try:
+                    await asyncio.to_thread(self.database.save, coin_id, tier_name, series)
+                except sqlite3.Error as e:
+                    print(f"Time series save error for {coin_id}/{tier_name}: {e}")
+        return series
+
+    async def _previous(self, coin_id: str, tier_name: str) -> Optional[Series]:
+        """The last series for a tier, loading it from the database the first time"""
+        key = (coin_id, tier_name)
+        if key not in _history and self.database is not None:
+            try:
+                _history[key] = await asyncio.to_thread(self.database.load, coin_id, tier_name)
+            except sqlite3.Error as e:
+                print(f"Time series load error for {coin_id}/{tier_name}: {e}")
+                _history[key] = None
+        series = _history.get(key)
+        return series if series is not None and len(series) else None
+
+    def _remember(self, coin_id: str, tier_name: str, series: Series) -> None:
+        _history[(coin_id, tier_name)] = series
+        _history.move_to_end((coin_id, tier_name))
+        while len(_history) > config.TIMESERIES_MAX_SERIES:
+            _history.popitem(last=False)
+
+    async def _fetch(self, coin_id: str, days: int) -> Optional[Series]:
+        data = await self.fetcher(coin_id, days)
+        if not data or not data.get('prices'):
+            return None
+        return Series.from_market_chart(data)
+
+    async def _fetch_range(self, coin_id: str, start: int, end: int) -> Optional[Series]:
+        data = await self.range_fetcher(coin_id, start, end)
+        if not data or not data.get('prices'):
+            return None
+        return Series.from_market_chart(data)
+
+def _pairs(values) -> np.ndarray:
+    """[[ts, value], ...] as an (n, 2) float64 array, with nulls as NaN"""
+    if not values:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.array([[ts, np.nan if value is None else value] for ts, value in values], dtype=np.float64)
+
+def to_rows(timestamps: np.ndarray, values: np.ndarray) -> list:
+    """[[ts, value], ...] lists for JSON, skipping missing (NaN) values"""
+    present = ~np.isnan(values)
+    return np.column_stack((timestamps[present].astype(np.float64), values[present])).tolist()
+
+def _align(timestamps: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Values of a secondary field at the price timestamps (NaN where missing)"""
+    if len(pairs) == len(timestamps) and np.array_equal(pairs[:, 0].astype(np.int64), timestamps):
+        return pairs[:, 1]
+    values = np.full(len(timestamps), np.nan)
+    if len(pairs):
+        index = np.searchsorted(pairs[:, 0], timestamps)
+        found = index < len(pairs)
+        found[found] = pairs[index[found], 0].astype(np.int64) == timestamps[found]
+        values[found] = pairs[index[found], 1]
+    return values
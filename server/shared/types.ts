@@ -1,6 +1,7 @@
 // TypeScript interfaces for frontend-backend consistency
 
 export interface CryptoData {
+  id?: string;
   symbol: string;
   name: string;
   price: number;
@@ -29,10 +30,11 @@ export interface AIResponse {
   }>;
   response_time: number;
   timestamp: string;
+  timings?: Record<string, number | null>;
 }
 
 export interface ChartData {
-  prices: number[][];  // [[timestamp, price], ...]
+  prices: number[][];  // [[timestamp, price], ...] or [[timestamp, open, high, low, close], ...]
   market_caps: number[][];
   total_volumes: number[][];
   symbol: string;
@@ -63,4 +65,14 @@ export interface PaginatedResponse<T> {
   total: number;
   page: number;
   limit: number;
-}
\ No newline at end of file
+}
+
+// WebSocket /api/ws messages ('crypto', 'stocks', 'forex', 'btc', 'crypto:<SYMBOL>')
+export interface StreamMessage<T = any> {
+  type: 'snapshot' | 'delta' | 'error';
+  channel?: string;
+  seq?: number;
+  timestamp?: string;
+  data?: T | { changed: any; removed: string[] };
+  message?: string;
+}
@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services import admission as admission_module
+from services.admission import AdmissionController, ConcurrencyLimiter, Overloaded, QuotaExceeded, QuotaTracker
+from services.cache_service import cache
+
+def test_quota_slides_over_the_previous_window(monkeypatch):
+    now = 100 * 100 + 50
+    monkeypatch.setattr(admission_module.time, 'time', lambda: now)
+    quota = QuotaTracker(limit=10, window=100, max_clients=10)
+    for _ in range(10):
+        quota.consume('client')
+    with pytest.raises(QuotaExceeded) as rejected:
+        quota.consume('client')
+    assert 0 < rejected.value.retry_after <= 150
+
+    # Half a window later the previous window still counts for half its queries
+    now += 50
+    with pytest.raises(QuotaExceeded):
+        quota.consume('client')
+    now += 10
+    quota.consume('client')
+    assert quota.stats()['rejections'] == 2
+
+def test_quota_drops_least_recent_clients():
+    quota = QuotaTracker(limit=1, window=100, max_clients=2)
+    for client in ('a', 'b', 'c'):
+        quota.consume(client)
+    assert quota.stats()['clients'] == 2
+    quota.consume('a')
+
+def test_limiter_sheds_work_that_would_wait_past_the_budget():
+    limiter = ConcurrencyLimiter(limit=2, budget=0.5, expected_duration=0.2)
+
+    async def job():
+        try:
+            async with limiter.slot():
+                await asyncio.sleep(0.2)
+            return 'ran'
+        except Overloaded:
+            return 'shed'
+
+    async def scenario():
+        return await asyncio.gather(*(job() for _ in range(12)))
+
+    results = asyncio.run(scenario())
+    assert 'shed' in results and results.count('ran') >= 2
+    assert limiter.stats()['active'] == 0 and limiter.stats()['waiting'] == 0
+
+@pytest.fixture
+def client(monkeypatch):
+    from routers import ai as ai_router
+    from services import ai_service
+
+    controller = AdmissionController()
+    controller.quota = QuotaTracker(limit=2, window=86400, max_clients=10)
+    monkeypatch.setattr(ai_service, 'admission', controller)
+    service = ai_router.ai_service
+
+    async def price_answer(intent):
+        return "**Latest prices:**\n• Bitcoin (BTC): $65,000.00 (+1.00%)"
+
+    async def gather(query, intent=None):
+        return "", "", {}
+
+    async def gather_sections(query, intent, names=None):
+        return {}, {}
+
+    async def complete(query, context):
+        return f"answer to {query}"
+
+    monkeypatch.setattr(service, '_price_answer', price_answer)
+    monkeypatch.setattr(service, '_gather_context', gather)
+    monkeypatch.setattr(service, '_gather_sections', gather_sections)
+    monkeypatch.setattr(service, '_fetch_ai_completion', complete)
+    asyncio.run(cache.clear())
+
+    app = FastAPI()
+    app.include_router(ai_router.router, prefix="/api/ai")
+    yield TestClient(app), controller
+    asyncio.run(cache.clear())
+
+def test_only_llm_questions_are_charged(client):
+    http, controller = client
+    for _ in range(5):
+        assert http.post("/api/ai/ask", json={"query": "bitcoin price"}).status_code == 200
+
+    assert http.post("/api/ai/ask", json={"query": "why are bonds falling"}).status_code == 200
+    # Cached now, so free
+    assert http.post("/api/ai/ask", json={"query": "why are bonds falling"}).status_code == 200
+    assert http.post("/api/ai/ask", json={"query": "why is gold rising"}).status_code == 200
+
+    rejected = http.post("/api/ai/ask", json={"query": "why is oil rising"})
+    assert rejected.status_code == 429
+    assert int(rejected.headers['retry-after']) > 0
+    assert http.get("/api/ai/ask/stream", params={"query": "why is oil rising"}).status_code == 429
+    assert http.post("/api/ai/ask", json={"query": "bitcoin price"}).status_code == 200
+
+def test_saturation_sheds_only_llm_questions(client):
+    http, controller = client
+    controller.llm.active = controller.llm.limit
+    controller.llm.waiting = 100
+    try:
+        shed = http.post("/api/ai/ask", json={"query": "why are bonds falling"})
+        assert shed.status_code == 503
+        assert 'retry-after' in shed.headers
+        assert http.post("/api/ai/ask", json={"query": "bitcoin price"}).status_code == 200
+        assert http.get("/api/ai/ask/stream", params={"query": "bitcoin price"}).status_code == 200
+
+        batch = http.post("/api/ai/ask/batch", json={"queries": ["bitcoin price", "why are bonds falling"]})
+        assert batch.status_code == 200
+        assert '"status": 503' in batch.text
+    finally:
+        controller.llm.active = controller.llm.waiting = 0
+
+def _charged(controller) -> int:
+    state = controller.quota._clients.get('testclient')
+    return state.current if state else 0
+
+def test_shed_after_admission_is_a_503_and_refunded(client, monkeypatch):
+    http, controller = client
+    from routers import ai as ai_router
+
+    async def shed(query, context):
+        raise Overloaded(3)
+
+    monkeypatch.setattr(ai_router.ai_service, '_fetch_ai_completion', shed)
+    response = http.post("/api/ai/ask", json={"query": "why are bonds falling"})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '3'
+    assert _charged(controller) == 0
+
+    batch = http.post("/api/ai/ask/batch", json={"queries": ["why is gold rising"]})
+    assert '"status": 503' in batch.text
+    assert _charged(controller) == 0
+
+def test_shed_mid_stream_ends_with_an_error_event_and_is_refunded(client, monkeypatch):
+    http, controller = client
+    from routers import ai as ai_router
+
+    async def shed(query, context):
+        raise Overloaded(2)
+        yield
+
+    monkeypatch.setattr(ai_router.ai_service, '_stream_ai_completion', shed)
+    response = http.get("/api/ai/ask/stream", params={"query": "why are bonds falling"})
+    assert response.status_code == 200
+    events = [line for line in response.text.splitlines() if line.startswith('event:')]
+    assert events == ['event: sources', 'event: key_data', 'event: error']
+    assert '"status": 503' in response.text and '"retry_after": 2' in response.text
+    assert _charged(controller) == 0
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from config import config
+from services.ai_service import AIService
+from services.cache_service import cache
+from services.market_index import SymbolIndex
+
+COINS = ['bitcoin', 'ethereum', 'solana', 'cardano', 'dogecoin', 'litecoin', 'monero']
+
+class _FinanceService:
+    def __init__(self):
+        self.index_reads = 0
+
+    async def get_crypto_index(self):
+        self.index_reads += 1
+        return SymbolIndex([{'id': coin_id, 'symbol': coin_id[:3].upper(), 'name': coin_id.title(),
+                             'price': 100.0 + rank, 'price_chg': 1.0} for rank, coin_id in enumerate(COINS)],
+                           ('symbol', 'id'))
+
+    async def get_bitcoin_price(self):
+        return {'price': 100.0, 'change_24h': 1.0}
+
+@pytest.fixture
+def service(monkeypatch):
+    asyncio.run(cache.clear())
+    service = AIService()
+    service.finance_service = _FinanceService()
+    service.prompts = {}
+    service.active = service.peak = 0
+
+    async def complete(query, context):
+        service.active += 1
+        service.peak = max(service.peak, service.active)
+        await asyncio.sleep(0.05 if 'slow' not in query else 2)
+        service.active -= 1
+        service.prompts[query] = context
+        return f"answer to {query}"
+
+    async def search(query):
+        return ""
+
+    monkeypatch.setattr(service, '_fetch_ai_completion', complete)
+    monkeypatch.setattr(service, '_fetch_search_results', search)
+    yield service
+    asyncio.run(cache.clear())
+
+def _run(service, queries):
+    async def collect():
+        return [event async for event in service.stream_batch_responses(queries)]
+    return asyncio.run(collect())
+
+def test_each_question_is_prompted_with_its_own_coins(service):
+    queries = [f"why is {coin} moving" for coin in COINS]
+    events = _run(service, queries)
+
+    results = [data for event, data in events if event == 'result']
+    assert len(results) == len(COINS)
+    for coin in COINS:
+        prompt = service.prompts[f"why is {coin} moving"]
+        assert coin.title() in prompt
+        assert all(other.title() not in prompt for other in COINS if other not in (coin, 'bitcoin'))
+
+def test_duplicates_are_answered_once(service):
+    events = _run(service, ["Explain ethereum staking", "explain Ethereum staking?", "what are bonds"])
+    context = next(data for event, data in events if event == 'context')
+    results = [data for event, data in events if event == 'result']
+    assert context['unique'] == 2
+    assert sorted(result['indexes'] for result in results) == [[0, 1], [2]]
+    assert len(service.prompts) == 2
+
+def test_concurrency_and_item_timeout_are_bounded(service, monkeypatch):
+    monkeypatch.setattr(config, 'AI_BATCH_CONCURRENCY', 2)
+    monkeypatch.setattr(config, 'AI_BATCH_ITEM_TIMEOUT', 0.5)
+    queries = [f"question {i} about inflation" for i in range(5)] + ["slow question about rates"]
+    results = [data for event, data in _run(service, queries) if event == 'result']
+
+    assert service.peak <= 2
+    errors = [result for result in results if 'error' in result]
+    assert [result['query'] for result in errors] == ["slow question about rates"]
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from config import config
+from services import ai_service as ai_module
+from services.ai_service import AIService
+from services.cache_service import cache
+from services.market_index import SymbolIndex
+from services.news_index import NewsIndex
+
+class _FinanceService:
+    async def get_crypto_index(self):
+        return SymbolIndex([{'id': 'ethereum', 'symbol': 'ETH', 'name': 'Ethereum', 'price': 3000.0,
+                             'price_chg': 2.0}], ('symbol', 'id'))
+
+@pytest.fixture
+def service(monkeypatch):
+    asyncio.run(cache.clear())
+    monkeypatch.setattr(ai_module, 'news_index', NewsIndex())
+    service = AIService()
+    service.finance_service = _FinanceService()
+    service.completions = []
+
+    async def search(query):
+        return "Source 1: Ethereum upgrade ships. Fees fall\n\n"
+
+    async def stream(query, context):
+        service.completions.append(context)
+        for token in ("Ethereum ", "is ", "rising."):
+            yield token
+
+    monkeypatch.setattr(service, '_fetch_search_results', search)
+    monkeypatch.setattr(service, '_stream_ai_completion', stream)
+    yield service
+    asyncio.run(cache.clear())
+
+def _events(service, query):
+    async def collect():
+        return [event async for event in service.stream_finance_response(query)]
+    return asyncio.run(collect())
+
+def test_stream_sends_sources_and_key_data_before_tokens_then_done(service):
+    events = _events(service, "why is ethereum rising")
+    assert [event for event, _ in events] == ['sources', 'key_data', 'token', 'token', 'token', 'done']
+    assert events[0][1] == [{'title': 'Ethereum upgrade ships. Fees fall', 'url': '#'}]
+    assert 'Ethereum (ETH)' in service.completions[0]
+    assert set(events[-1][1]['timings']) >= {'search', 'crypto', 'context'}
+
+def test_streamed_answer_is_cached(service):
+    _events(service, "why is ethereum rising")
+    events = _events(service, "Why is Ethereum rising?")
+    assert len(service.completions) == 1
+    assert ('token', "Ethereum is rising.") in events
+    assert events[0] == ('sources', [{'title': 'Ethereum upgrade ships. Fees fall', 'url': '#'}])
+    assert events[-1][0] == 'done'
+
+def test_stage_missing_the_deadline_is_dropped_and_timed_as_none(service, monkeypatch):
+    monkeypatch.setattr(config, 'AI_CONTEXT_BUDGET', 0.2)
+
+    async def slow_search(query):
+        await asyncio.sleep(1)
+        return "Source 1: Too late.\n\n"
+
+    monkeypatch.setattr(service, '_fetch_search_results', slow_search)
+    started = time.monotonic()
+    search_context, market_context, timings = asyncio.run(service._gather_context("why is ethereum rising"))
+
+    assert time.monotonic() - started < 0.5
+    assert search_context == ""
+    assert 'Ethereum (ETH)' in market_context
+    assert timings['search'] is None
+    assert 0 <= timings['crypto'] < 0.2
+    assert 0.2 <= timings['context'] < 0.5
+
+    events = _events(service, "why is ethereum rising")
+    assert events[0] == ('sources', [])
+    assert events[-1][1]['timings']['search'] is None
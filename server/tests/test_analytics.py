@@ -0,0 +1,76 @@
+import asyncio
+import numpy as np
+import pytest
+from services.analytics import INDICATORS, AnalyticsService, drawdown, splice_point
+from services.timeseries import Series
+
+STEP_MS = 3_600_000
+
+def _series(prices, start_ms: int = 0) -> Series:
+    prices = np.asarray(prices, dtype=float)
+    timestamps = start_ms + np.arange(len(prices), dtype=np.int64) * STEP_MS
+    return Series(timestamps, prices, prices * 1e7, prices * 1e6)
+
+class _Store:
+    def __init__(self, series: Series):
+        self.series = series
+
+    async def get_tier_series(self, coin_id: str, tier: str):
+        return self.series
+
+def _prices(count: int, seed: int = 7) -> np.ndarray:
+    return 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, count)))
+
+def test_splice_point_finds_the_shared_prefix():
+    prices = _prices(100)
+    previous = _series(prices)
+    shifted = _series(np.concatenate((prices[5:], [1.0, 2.0])), start_ms=5 * STEP_MS)
+    assert splice_point(previous, shifted) == (5, 95)
+
+    revised = _series(np.concatenate((prices[5:50], [1.0])), start_ms=5 * STEP_MS)
+    assert splice_point(previous, revised) == (5, 45)
+    assert splice_point(previous, _series(prices, start_ms=STEP_MS // 2)) == (0, 0)
+
+@pytest.mark.parametrize('name,param', [('sma', 20), ('ema', 20), ('rsi', 14), ('volatility', 30)])
+def test_refreshed_series_splices_to_the_full_history_result(name, param):
+    prices = _prices(400)
+    history = _series(prices)
+    # The refresh drops the oldest points and appends a new tail
+    tail = _prices(10, seed=8) * prices[-1] / 100
+    refreshed = _series(np.concatenate((prices[10:], tail)), start_ms=10 * STEP_MS)
+    combined = _series(np.concatenate((prices, tail)))
+
+    service = AnalyticsService(_Store(history))
+    service._indicator('btc', 'hourly', name, param, history)
+    spliced = service._indicator('btc', 'hourly', name, param, refreshed).values
+
+    expected = np.full(len(combined), np.nan)
+    INDICATORS[name](combined, param, expected, {}, 0)
+    assert service.stats()['splices'] == 1 and service.stats()['computations'] == 1
+    np.testing.assert_allclose(spliced[param + 1:], expected[10:][param + 1:], rtol=1e-9)
+
+def test_unchanged_series_is_a_memo_hit_and_windows_share_it():
+    series = _series(_prices(24 * 60))
+    service = AnalyticsService(_Store(series))
+
+    async def main():
+        week = await service.get_indicators('btc', 7, ['sma', 'drawdown'])
+        month = await service.get_indicators('btc', 30, ['sma'])
+        return week, month
+
+    week, month = asyncio.run(main())
+    assert service.stats() == {'entries': 1, 'hits': 1, 'splices': 0, 'computations': 1}
+    assert week['indicators']['sma'][-1] == month['indicators']['sma'][-1]
+    assert len(week['indicators']['sma']) == 7 * 24 + 1
+    # Drawdown is measured from the peak inside the window
+    assert max(value for _, value in week['indicators']['drawdown']) == 0
+
+def test_drawdown_from_running_peak():
+    np.testing.assert_allclose(drawdown(np.array([100.0, 120.0, 90.0, 130.0])), [0, 0, -25, 0])
+
+def test_memo_is_bounded():
+    series = _series(_prices(200))
+    service = AnalyticsService(_Store(series), memo_size=2)
+    for period in (5, 10, 15):
+        service._indicator('btc', 'hourly', 'ema', period, series)
+    assert service.stats()['entries'] == 2
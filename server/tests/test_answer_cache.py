@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from services.ai_service import AIService
+from services.answer_cache import AnswerCache
+from services.cache_service import cache
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    asyncio.run(cache.clear())
+    yield
+    asyncio.run(cache.clear())
+
+def test_rewordings_share_a_key():
+    answers = AnswerCache()
+    assert answers.key("What is the price of bitcoin?") == answers.key("bitcoin price")
+
+def test_comparisons_keep_word_order():
+    answers = AnswerCache()
+    assert answers.key("is bitcoin better than ethereum") != answers.key("is ethereum better than bitcoin")
+
+def test_stopword_only_questions_do_not_share_an_answer():
+    answers = AnswerCache()
+    assert answers.key("what is it?") != answers.key("how is it?")
+
+    async def scenario():
+        await answers.store("what is it?", "first answer")
+        assert await answers.lookup("how is it?") is None
+        assert await answers.lookup("what is it?") == "first answer"
+    asyncio.run(scenario())
+
+def test_similar_questions_reuse_an_answer_but_reversed_comparisons_do_not():
+    answers = AnswerCache()
+
+    async def scenario():
+        await answers.store("bitcoin price outlook for investors", "outlook answer")
+        assert await answers.lookup("investors bitcoin price outlook") == "outlook answer"
+
+        await answers.store("is bitcoin better than ethereum", "bitcoin answer")
+        assert await answers.lookup("is ethereum better than bitcoin") is None
+    asyncio.run(scenario())
+
+def test_get_or_fetch_fetches_once():
+    answers = AnswerCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "fetched"
+
+    async def scenario():
+        results = await asyncio.gather(*(answers.get_or_fetch("why did bitcoin fall", fetch) for _ in range(5)))
+        assert results == ["fetched"] * 5
+    asyncio.run(scenario())
+    assert calls == 1
+
+def test_cached_answer_skips_context_gathering(monkeypatch):
+    from services import ai_service
+
+    service = AIService()
+    gathered = []
+
+    async def gather(*args, **kwargs):
+        gathered.append(args)
+        return "", "", {}
+
+    monkeypatch.setattr(service, '_gather_context', gather)
+
+    async def scenario():
+        await ai_service.answer_cache.store("why do interest rates matter", "cached answer")
+        response = await service.get_finance_response("why do interest rates matter?")
+        events = [event async for event in service.stream_finance_response("why do interest rates matter")]
+        return response, events
+
+    response, events = asyncio.run(scenario())
+    assert response['response'] == "cached answer"
+    assert ("token", "cached answer") in events
+    assert gathered == []
+
+def test_similar_questions_about_different_assets_do_not_share_an_answer():
+    answers = AnswerCache()
+    bitcoin = "how risky is bitcoin staking yield compared with bond income during high inflation recession periods"
+    apple = "why is apple stock price falling after weak iphone sales report"
+
+    async def scenario():
+        await answers.store(bitcoin, "bitcoin answer")
+        await answers.store(apple, "apple answer")
+        assert await answers.lookup(bitcoin.replace("bitcoin", "ethereum")) is None
+        assert await answers.lookup(apple.replace("apple", "tesla")) is None
+        assert await answers.lookup(apple.replace("weak", "poor")) == "apple answer"
+    asyncio.run(scenario())
+
+def test_conversions_keep_their_direction():
+    answers = AnswerCache()
+    assert answers.key("convert usd to eur") != answers.key("convert eur to usd")
+    assert answers.key("btc to eth swap rate") != answers.key("eth to btc swap rate")
+
+    async def scenario():
+        await answers.store("convert usd to eur", "usd answer")
+        assert await answers.lookup("convert eur to usd") is None
+        assert await answers.lookup("convert usd to eur") == "usd answer"
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from services import cache_service
+from services.cache_service import CacheService, MemoryBackend, RedisBackend, TieredBackend
+
+fakeredis = pytest.importorskip('fakeredis')
+
+def _redis(server, signing_key: str = 'test-key') -> RedisBackend:
+    return RedisBackend(client=fakeredis.FakeAsyncRedis(server=server), signing_key=signing_key)
+
+def test_redis_backend_requires_a_signing_key():
+    with pytest.raises(ValueError):
+        RedisBackend(client=fakeredis.FakeAsyncRedis(), signing_key='')
+
+def test_redis_round_trip_compresses_large_values():
+    async def scenario():
+        cache = CacheService(_redis(fakeredis.FakeServer()))
+        value = {'prices': list(range(2000))}
+        await cache.set('big', value, ttl=60)
+        assert await cache.get('big') == value
+        assert cache.backend.bytes_written < len(repr(value))
+    asyncio.run(scenario())
+
+def test_unsigned_or_foreign_entries_are_misses():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        ours, theirs = CacheService(_redis(server)), CacheService(_redis(server, 'other-key'))
+        await theirs.set('k', {'injected': True}, ttl=60)
+        assert await ours.get('k') is None
+        assert ours.backend.rejected == 1
+
+        # A raw write by anyone with access to redis is never unpickled
+        await ours.backend.client.set(ours.backend._key('raw'), b'\x00' * 64)
+        assert await ours.get('raw') is None
+        assert ours.backend.rejected == 2
+    asyncio.run(scenario())
+
+def test_tiered_workers_share_one_fetch_and_invalidate_each_other():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        first = CacheService(TieredBackend(MemoryBackend(), _redis(server)))
+        second = CacheService(TieredBackend(MemoryBackend(), _redis(server)))
+        await first.start()
+        await second.start()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return {'price': 1}
+
+        try:
+            results = await asyncio.gather(first.get_or_set('k', fetch, 60), second.get_or_set('k', fetch, 60))
+            assert results == [{'price': 1}, {'price': 1}]
+            assert calls == 1
+
+            # L1 hits return the same object within a worker
+            assert await second.get('k') is await second.get('k')
+
+            await first.set('k', {'price': 2}, 60)
+            await asyncio.sleep(0.2)
+            assert await second.get('k') == {'price': 2}
+        finally:
+            await first.stop()
+            await second.stop()
+    asyncio.run(scenario())
+
+def test_create_backend_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        cache_service.create_backend('memcached')
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from services.cache_service import CacheEntry, CacheService, MemoryBackend
+
+def _entry(value, ttl=60, size=10):
+    expires_at = time.time() + ttl
+    return CacheEntry(value, expires_at, expires_at, size)
+
+def test_memory_backend_evicts_least_recently_used_over_entry_budget():
+    async def main():
+        backend = MemoryBackend(max_entries=2, max_bytes=1000)
+        await backend.set_entry('a', _entry(1))
+        await backend.set_entry('b', _entry(2))
+        await backend.get_entry('a')
+        await backend.set_entry('c', _entry(3))
+        return [await backend.get_entry(key) for key in 'abc'], backend.stats()
+
+    (a, b, c), stats = asyncio.run(main())
+    assert a.value == 1 and b is None and c.value == 3
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+
+def test_memory_backend_evicts_over_byte_budget():
+    async def main():
+        backend = MemoryBackend(max_entries=10, max_bytes=25)
+        for key in 'abc':
+            await backend.set_entry(key, _entry(key))
+        return backend.stats()
+
+    assert asyncio.run(main())['bytes'] == 20
+
+def test_expired_entries_are_misses_and_swept():
+    async def main():
+        cache = CacheService(MemoryBackend())
+        await cache.set('gone', 1, ttl=-1)
+        await cache.set('unread', 2, ttl=-1)
+        await cache.set('kept', 3, ttl=60)
+        return await cache.get('gone'), await cache.get('kept'), cache.sweep(), cache.backend.stats()
+
+    gone, kept, swept, stats = asyncio.run(main())
+    assert gone is None and kept == 3
+    assert swept == 1 and stats['entries'] == 1 and stats['expirations'] == 2
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'price': 1}
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        results = await asyncio.gather(*(cache.get_or_set('btc', fetch, ttl=60) for _ in range(20)))
+        return results, await cache.get_or_set('btc', fetch, ttl=60)
+
+    results, cached = asyncio.run(main())
+    assert calls == [1]
+    assert all(result == {'price': 1} for result in results) and cached == {'price': 1}
+
+def test_shared_fetch_errors_reach_every_caller_and_empty_results_are_not_cached():
+    calls = []
+
+    async def failing():
+        calls.append('fail')
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def empty():
+        calls.append('empty')
+        return []
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        errors = await asyncio.gather(*(cache.get_or_set('k', failing) for _ in range(5)), return_exceptions=True)
+        await cache.get_or_set('e', empty)
+        await cache.get_or_set('e', empty)
+        return errors
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert calls == ['fail', 'empty', 'empty']
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 'value'
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        first = asyncio.ensure_future(cache.get_or_set('k', fetch))
+        second = asyncio.ensure_future(cache.get_or_set('k', fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'value'
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls) + 1
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        await cache.set('btc', 1, ttl=-1, stale_ttl=60)
+        served = await asyncio.gather(*(cache.get_or_set('btc', fetch, ttl=60, stale_ttl=60) for _ in range(5)))
+        await asyncio.sleep(0.1)
+        return served, await cache.get('btc'), cache.stats()
+
+    served, refreshed, stats = asyncio.run(main())
+    assert served == [1] * 5
+    assert calls == [1] and refreshed == 2
+    assert stats['stale_hits'] == 5
+
+def test_failed_refresh_keeps_serving_the_stale_value():
+    async def failing():
+        raise RuntimeError('upstream down')
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        await cache.set('btc', 1, ttl=-1, stale_ttl=60)
+        first = await cache.get_or_set('btc', failing, ttl=60, stale_ttl=60)
+        await asyncio.sleep(0.01)
+        return first, await cache.get_or_set('btc', failing, ttl=60, stale_ttl=60)
+
+    assert asyncio.run(main()) == (1, 1)
+
+def test_entries_past_their_stale_window_are_fetched_again():
+    async def fetch():
+        return 2
+
+    async def main():
+        cache = CacheService(MemoryBackend())
+        await cache.set('btc', 1, ttl=-1, stale_ttl=0)
+        return await cache.get_or_set('btc', fetch, ttl=60)
+
+    assert asyncio.run(main()) == 2
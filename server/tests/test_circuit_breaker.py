@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from config import config
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.http_client import HTTPClient
+
+class _Clock:
+    """Stands in for the breaker module's `time`, leaving the event loop's clock alone"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+def test_opens_after_consecutive_failures_then_probes_and_closes(clock):
+    breaker = CircuitBreaker('up', failure_threshold=3, recovery_time=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.record_success()
+    assert breaker.failures == 0
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    assert breaker.snapshot()['retry_after'] == 30
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker('up', failure_threshold=1, recovery_time=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+
+class _HangingSession:
+    closed = False
+
+    @asynccontextmanager
+    async def request(self, method, url, **kwargs):
+        await asyncio.sleep(10)
+        yield
+
+def test_cancelled_request_releases_the_half_open_probe(clock):
+    client = HTTPClient()
+    client._session = _HangingSession()
+    breaker = client.breaker('up')
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    clock.now += breaker.recovery_time
+
+    async def call():
+        async with client.get('up', 'http://upstream.test'):
+            pass
+
+    async def scenario():
+        task = asyncio.ensure_future(call())
+        await asyncio.sleep(0.01)
+        assert not breaker.allow()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The probe slot is free again and the cancellation didn't count as a failure
+        assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow()
+        with pytest.raises(CircuitOpenError):
+            await call()
+
+    asyncio.run(scenario())
+    assert len(client.latency('up')) == 0
+
+def test_adaptive_timeout_stays_within_the_profile(monkeypatch):
+    monkeypatch.setattr(config, 'CIRCUIT_MIN_SAMPLES', 5)
+    monkeypatch.setattr(config, 'CIRCUIT_MIN_TIMEOUT', 1.0)
+    monkeypatch.setattr(config, 'CIRCUIT_TIMEOUT_MULTIPLIER', 2.0)
+    client = HTTPClient()
+    ceiling = client._timeouts['coingecko'].total
+
+    # No samples yet: the profile's timeout
+    assert client._timeout_for('coingecko').total == ceiling
+
+    window = client.latency('coingecko')
+    for _ in range(10):
+        window.record(0.05)
+    assert client._timeout_for('coingecko').total == 1.0
+    assert client._timeout_for('coingecko').connect <= 1.0
+
+    for _ in range(10):
+        window.record(2.0)
+    assert client._timeout_for('coingecko').total == 4.0
+    # A per-call override can only tighten it
+    assert client._timeout_for('coingecko', timeout=3.0).total == 3.0
+
+    for _ in range(10):
+        window.record(60.0)
+    assert client._timeout_for('coingecko').total == ceiling
+
+    # Failures carry no latency signal
+    failing = client.latency('serper')
+    for _ in range(10):
+        failing.record(0.01, ok=False)
+    assert client._timeout_for('serper').total == client._timeouts['serper'].total
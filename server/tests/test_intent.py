@@ -0,0 +1,82 @@
+import asyncio
+import time
+from services.ai_service import AIService
+from services.market_index import SymbolIndex
+from utils.intent import INTENT_EXPLANATION, INTENT_PRICE, classify_query
+
+def test_shouted_words_are_not_tickers():
+    intent = classify_query("WHAT IS THE PRICE NOW")
+    assert intent['tickers'] == []
+    assert intent['intent'] == INTENT_EXPLANATION
+
+def test_tickers_come_from_cashtags_names_and_tracked_symbols():
+    assert classify_query("price of $PLTR")['tickers'] == ['PLTR']
+    assert classify_query("how much is apple stock")['tickers'] == ['AAPL']
+    assert classify_query("MSFT price")['tickers'] == ['MSFT']
+    assert classify_query("price of ZZZZ")['tickers'] == []
+
+def test_everyday_words_need_context_to_be_coins():
+    assert classify_query("what is an atom made of")['coins'] == []
+    assert classify_query("the ripple effect of interest rates")['coins'] == []
+    assert classify_query("stellar returns from index funds")['coins'] == []
+    assert classify_query("price of stellar")['coins'] == ['stellar']
+    assert classify_query("atom staking yield")['coins'] == ['cosmos']
+    assert classify_query("btc and ripple")['coins'] == ['bitcoin', 'ripple']
+
+def test_unambiguous_coins_need_no_context():
+    intent = classify_query("bitcoin price")
+    assert intent['coins'] == ['bitcoin']
+    assert intent['intent'] == INTENT_PRICE
+
+def test_coins_resolve_to_coingecko_ids():
+    assert classify_query("matic and avax price")['coins'] == ['matic-network', 'avalanche-2']
+    assert classify_query("polygon and avalanche price")['coins'] == ['matic-network', 'avalanche-2']
+
+class _FinanceService:
+    """Cached indexes plus a slow, counted per-ticker quote"""
+
+    def __init__(self, quote_delay: float = 0.0):
+        self.quote_delay = quote_delay
+        self.quotes = []
+
+    async def get_crypto_index(self):
+        return SymbolIndex([{'id': 'bitcoin', 'symbol': 'BTC', 'name': 'Bitcoin', 'price': 65000.0, 'price_chg': 1.0},
+                            {'id': 'pepe', 'symbol': 'PEPE', 'name': 'Pepe', 'price': 0.00001, 'price_chg': 2.0},
+                            {'id': 'matic-network', 'symbol': 'MATIC', 'name': 'Polygon', 'price': 0.5,
+                             'price_chg': -1.0}],
+                           ('symbol', 'id'))
+
+    async def get_stock_index(self):
+        return SymbolIndex([{'symbol': 'AAPL', 'price': 190.0, 'change_percent': '1.0'}])
+
+    async def get_stock_quote(self, symbol):
+        self.quotes.append(symbol)
+        await asyncio.sleep(self.quote_delay)
+        return {'symbol': symbol, 'price': 10.0, 'change_percent': '0.5'}
+
+def _service(finance) -> AIService:
+    service = AIService()
+    service.finance_service = finance
+    return service
+
+def test_price_answer_uses_indexes_before_quotes():
+    finance = _FinanceService()
+    answer = asyncio.run(_service(finance)._price_answer(classify_query("price of $AAPL $PEPE bitcoin")))
+    assert 'AAPL' in answer and 'Pepe' in answer and 'Bitcoin' in answer
+    assert finance.quotes == []
+
+    assert 'Polygon' in asyncio.run(_service(finance)._price_answer(classify_query("matic price")))
+
+def test_price_answer_quotes_the_rest_concurrently_within_the_budget(monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, 'AI_CONTEXT_BUDGET', 0.5)
+
+    finance = _FinanceService(quote_delay=0.3)
+    started = time.monotonic()
+    answer = asyncio.run(_service(finance)._price_answer(classify_query("price of $PLTR $SNOW $UBER")))
+    assert time.monotonic() - started < 0.5
+    assert sorted(finance.quotes) == ['PLTR', 'SNOW', 'UBER']
+    assert answer.index('PLTR') < answer.index('SNOW') < answer.index('UBER')
+
+    finance = _FinanceService(quote_delay=2)
+    assert asyncio.run(_service(finance)._price_answer(classify_query("price of $PLTR"))) is None
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from services.metrics import MetricsMiddleware, MetricsRegistry, route_requests
+
+def test_renders_counters_histograms_and_collectors():
+    registry = MetricsRegistry()
+    calls = registry.counter('calls_total', 'Calls', ('upstream', 'outcome'))
+    latency = registry.histogram('latency_seconds', 'Latency', ('upstream',), buckets=(0.1, 1.0))
+    registry.register_collector('cache', 'Cache stats', lambda: {'hits': 3, 'backend': 'memory',
+                                                                  'l1': {'entries': 2}})
+    calls.inc('coin"gecko', 'ok')
+    calls.inc('coin"gecko', 'ok')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, 'serper')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE calls_total counter' in lines
+    assert 'calls_total{upstream="coin\\"gecko",outcome="ok"} 2' in lines
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{upstream="serper",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{upstream="serper",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{upstream="serper",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{upstream="serper"} 5.55' in lines
+    assert 'latency_seconds_count{upstream="serper"} 3' in lines
+    assert 'cache_hits 3' in lines and 'cache_l1_entries 2' in lines
+    assert not any(line.startswith('cache_backend') for line in lines)
+
+def test_middleware_labels_by_route_template():
+    router = APIRouter()
+
+    @router.get("/coins/{coin_id}")
+    async def coin(coin_id: str):
+        return {"id": coin_id}
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router, prefix="/api/metrics-test")
+    client = TestClient(app)
+
+    def count(route, status):
+        return route_requests._values.get(('GET', route, status), 0)
+
+    before = count('/api/metrics-test/coins/{coin_id}', '200'), count('unmatched', '404')
+    client.get("/api/metrics-test/coins/bitcoin")
+    client.get("/api/metrics-test/coins/ethereum")
+    client.get("/api/metrics-test/nowhere")
+    assert count('/api/metrics-test/coins/{coin_id}', '200') == before[0] + 2
+    assert count('unmatched', '404') == before[1] + 1
+    assert not any('/coins/bitcoin' in labels[1] for labels in route_requests._values)
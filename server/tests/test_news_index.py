@@ -0,0 +1,68 @@
+import asyncio
+from services import ai_service
+from services.cache_service import cache
+from services.news_index import KIND_SEARCH, NewsIndex, canonical_url
+
+def _article(url, title, published='2024-05-01T00:00:00Z', description=''):
+    return {'url': url, 'title': title, 'description': description, 'source': 'Wire', 'publishedAt': published}
+
+def test_canonical_url_drops_tracking_and_cosmetic_differences():
+    assert canonical_url('https://WWW.Example.com/markets/btc/?utm_source=x&id=7#top') == \
+        'https://example.com/markets/btc?id=7'
+
+def test_duplicates_are_indexed_once_and_keep_every_kind():
+    index = NewsIndex(max_articles=10)
+    assert index.add([_article('https://example.com/a', 'Bitcoin rallies')]) == 1
+    assert index.add([_article('https://www.example.com/a/?utm_medium=feed', 'Bitcoin rallies again')],
+                     KIND_SEARCH) == 0
+    assert len(index) == 1 and index.stats()['duplicates'] == 1
+    assert index.search('bitcoin', 5, KIND_SEARCH)[0]['title'] == 'Bitcoin rallies'
+
+def test_eviction_removes_postings():
+    index = NewsIndex(max_articles=2)
+    index.add([_article('https://example.com/1', 'Gold shines'),
+               _article('https://example.com/2', 'Oil slips'),
+               _article('https://example.com/3', 'Bonds rally')])
+    assert index.stats()['evictions'] == 1
+    assert index.search('gold', 5) == []
+    assert 'gold' not in index._postings
+    assert [article['title'] for article in index.search('oil', 5)] == ['Oil slips']
+
+def test_min_match_threshold():
+    index = NewsIndex(max_articles=10)
+    index.add([_article('https://example.com/1', 'Bitcoin ETF inflows surge', '2024-05-02'),
+               _article('https://example.com/2', 'Bitcoin miners struggle', '2024-05-03')])
+    assert [a['title'] for a in index.search('bitcoin etf inflows', 5)] == ['Bitcoin ETF inflows surge']
+    # Two of three terms is enough at 0.6; best match ranks first, then newest
+    assert [a['title'] for a in index.search('bitcoin etf miners', 5, min_match=0.6)] == [
+        'Bitcoin miners struggle', 'Bitcoin ETF inflows surge']
+    assert index.search('bitcoin etf miners', 5) == []
+    # Abbreviations meet their full names
+    assert len(index.search('BTC', 5)) == 2
+
+def test_get_financial_news_falls_back_to_the_upstream(monkeypatch):
+    index = NewsIndex(max_articles=100)
+    monkeypatch.setattr(ai_service, 'news_index', index)
+    service = ai_service.AIService()
+    fetched = []
+
+    async def fetch(query, limit):
+        fetched.append(query)
+        return [_article(f'https://example.com/{query}/{i}', f'{query} story {i}') for i in range(5)]
+
+    monkeypatch.setattr(service, '_fetch_financial_news', fetch)
+    index.add([_article('https://example.com/local', 'Copper demand story')])
+
+    async def scenario():
+        await cache.clear()
+        few = await service.get_financial_news('copper', 3)
+        await cache.clear()
+        # The upstream articles joined the index, so the same query is now answered locally
+        again = await service.get_financial_news('copper', 3)
+        await cache.clear()
+        return few, again
+
+    few, again = asyncio.run(scenario())
+    assert fetched == ['copper']
+    assert len(few) == 3 and len(again) == 3
+    assert len(index) == 6
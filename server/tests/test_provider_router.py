@@ -0,0 +1,95 @@
+import asyncio
+import time
+import pytest
+from config import config
+from services import finance_service
+from services.cache_service import cache
+from services.finance_service import FinanceService
+from services.providers import ProviderError, ProviderRouter, StubProvider
+from services.providers.base import FALLBACK_TIER
+
+class _EmptyProvider(StubProvider):
+    async def get_crypto_quotes(self, limit):
+        await self._simulate()
+        return None
+
+def _fetch_crypto(router: ProviderRouter, limit: int = 5):
+    return asyncio.run(router.fetch('crypto', lambda provider: provider.get_crypto_quotes(limit)))
+
+def test_fails_over_to_the_next_provider():
+    router = ProviderRouter([StubProvider('broken', error_rate=1.0), StubProvider('healthy')])
+    assert [coin['id'] for coin in _fetch_crypto(router, 2)] == ['bitcoin', 'ethereum']
+    stats = router.stats()
+    assert stats['broken']['error_rate'] == 1.0
+    assert stats['healthy']['error_rate'] == 0.0
+
+def test_raises_when_every_provider_fails():
+    router = ProviderRouter([StubProvider('a', error_rate=1.0), StubProvider('b', error_rate=1.0)])
+    with pytest.raises(ProviderError):
+        _fetch_crypto(router)
+
+def test_empty_answer_is_not_a_failure():
+    router = ProviderRouter([StubProvider('broken', error_rate=1.0), _EmptyProvider('empty')])
+    assert _fetch_crypto(router) is None
+
+def test_unhealthy_providers_rank_last():
+    broken, healthy = StubProvider('broken', error_rate=1.0), StubProvider('healthy')
+    router = ProviderRouter([broken, healthy])
+    for _ in range(config.PROVIDER_MIN_SAMPLES):
+        _fetch_crypto(router)
+    assert router.candidates('crypto') == [healthy, broken]
+
+def test_fallback_tier_only_after_live_providers():
+    fallback = StubProvider('fallback', tier=FALLBACK_TIER)
+    live = StubProvider('live', latency=0.01)
+    assert ProviderRouter([fallback, live]).candidates('crypto') == [live, fallback]
+
+def test_slow_provider_is_hedged(monkeypatch):
+    monkeypatch.setattr(config, 'PROVIDER_HEDGE_MAX', 0.05)
+    router = ProviderRouter([StubProvider('slow', latency=1.0), StubProvider('fast')])
+    started = time.monotonic()
+    assert _fetch_crypto(router)
+    assert time.monotonic() - started < 0.5
+
+def test_bitcoin_price_fails_over(monkeypatch):
+    router = ProviderRouter([StubProvider('coingecko', error_rate=1.0), StubProvider('coinmarketcap')])
+    monkeypatch.setattr(finance_service, 'market_router', router)
+
+    async def scenario():
+        await cache.clear()
+        try:
+            return await FinanceService().get_bitcoin_price()
+        finally:
+            await cache.clear()
+
+    price = asyncio.run(scenario())
+    assert price['price'] == 65000.0
+    assert price['change_24h'] == 1.2
+
+class _Response:
+    status = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+def test_coinmarketcap_ids_are_coingecko_ids(monkeypatch):
+    from services.providers import coinmarketcap
+
+    listings = {'data': [
+        {'slug': slug, 'symbol': symbol, 'name': name, 'cmc_rank': rank, 'quote': {'USD': {'price': 1.0}}}
+        for rank, (slug, symbol, name) in enumerate([('bitcoin', 'btc', 'Bitcoin'), ('xrp', 'XRP', 'XRP'),
+                                                     ('bnb', 'BNB', 'BNB')], 1)
+    ]}
+    monkeypatch.setattr(coinmarketcap.http_client, 'get', lambda *args, **kwargs: _Response(listings))
+    coins = asyncio.run(coinmarketcap.CoinMarketCapProvider().get_crypto_quotes(3))
+    assert [coin['id'] for coin in coins] == ['bitcoin', 'ripple', 'binancecoin']
+    assert coins[0]['symbol'] == 'BTC'
@@ -0,0 +1,48 @@
+import asyncio
+from services.cache_service import cache
+from services.refresh_scheduler import RefreshScheduler
+
+def test_tasks_run_without_caching_their_result():
+    runs = []
+
+    async def ingest():
+        runs.append(1)
+        return ['article']
+
+    async def main():
+        scheduler = RefreshScheduler()
+        scheduler.register_task("news_feed_test", ingest, 'news')
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return await cache.get("news_feed_test")
+
+    assert asyncio.run(main()) is None
+    assert runs == [1]
+
+def test_restarting_does_not_duplicate_jobs_or_watchers():
+    runs = []
+    notified = []
+
+    async def job():
+        runs.append(1)
+        return {'price': 1}
+
+    async def lifespan(scheduler):
+        await cache.start()
+        cache.watch("restart_test", notified.append)
+        scheduler.register("restart_test", job, 'bitcoin')
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        await cache.stop()
+
+    async def main():
+        scheduler = RefreshScheduler()
+        await lifespan(scheduler)
+        await lifespan(scheduler)
+        await cache.delete("restart_test")
+
+    asyncio.run(main())
+    assert runs == [1, 1]
+    assert notified == [{'price': 1}, {'price': 1}]
@@ -0,0 +1,88 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from services import snapshot_cache
+from services.snapshot_cache import EncodedSnapshot, SnapshotEncoder
+from utils.helpers import snapshot_response
+
+BODY = b'{"data":[' + b','.join(b'{"symbol":"BTC","price":65000.0}' for _ in range(100)) + b']}'
+
+def test_if_none_match_accepts_weak_strong_and_listed_tags():
+    snapshot = EncodedSnapshot(BODY)
+    strong = snapshot.etag.removeprefix('W/')
+    assert snapshot.etag.startswith('W/"')
+    assert snapshot.not_modified(snapshot.etag, None)
+    assert snapshot.not_modified(strong, None)
+    assert snapshot.not_modified(f'"other", {snapshot.etag}', None)
+    assert snapshot.not_modified('*', None)
+    assert not snapshot.not_modified('"other", W/"another"', None)
+    # If-None-Match wins over a matching If-Modified-Since
+    assert not snapshot.not_modified('"other"', snapshot.last_modified)
+
+def test_if_modified_since():
+    modified = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+    snapshot = EncodedSnapshot(BODY, modified)
+    assert snapshot.not_modified(None, format_datetime(modified, usegmt=True))
+    assert snapshot.not_modified(None, format_datetime(modified + timedelta(hours=1), usegmt=True))
+    assert not snapshot.not_modified(None, format_datetime(modified - timedelta(seconds=1), usegmt=True))
+    assert not snapshot.not_modified(None, 'not a date')
+
+def test_negotiate_honours_q_zero_exclusions(monkeypatch):
+    snapshot = EncodedSnapshot(BODY)
+    monkeypatch.setattr(snapshot_cache, 'brotli', None)
+    assert snapshot.negotiate('gzip, deflate') == 'gzip'
+    assert snapshot.negotiate('gzip;q=0, deflate') is None
+    assert snapshot.negotiate('gzip; q=0.0') is None
+    assert snapshot.negotiate('gzip;q=0.5') == 'gzip'
+    assert snapshot.negotiate('br') is None
+    assert snapshot.negotiate('') is None
+    assert EncodedSnapshot(b'{}').negotiate('gzip') is None
+
+    class _Brotli:
+        @staticmethod
+        def compress(body):
+            return b'br:' + body
+
+    monkeypatch.setattr(snapshot_cache, 'brotli', _Brotli)
+    assert snapshot.negotiate('gzip, br') == 'br'
+    assert snapshot.negotiate('gzip, br;q=0') == 'gzip'
+    assert snapshot.encoded('br') is snapshot.encoded('br')
+
+def test_encoder_rebuilds_only_when_a_source_object_changes():
+    encoder = SnapshotEncoder()
+    builds = []
+    data = [{'symbol': 'BTC'}]
+
+    def build(source):
+        return lambda: builds.append(1) or {'data': source}
+
+    first = encoder.encode('crypto', (data,), build(data))
+    assert encoder.encode('crypto', (data,), build(data)) is first
+    # An equal but new snapshot object is a refresh
+    refreshed = [{'symbol': 'BTC'}]
+    assert encoder.encode('crypto', (refreshed,), build(refreshed)) is not first
+    assert len(builds) == 2
+
+def test_snapshot_response_serves_304_and_compressed_bodies():
+    snapshot = EncodedSnapshot(BODY)
+    app = FastAPI()
+
+    @app.get("/snapshot")
+    async def endpoint(request: Request):
+        return snapshot_response(request, snapshot)
+
+    client = TestClient(app)
+    response = client.get("/snapshot", headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert response.content == BODY
+    assert gzip.decompress(snapshot.encoded('gzip')) == BODY
+
+    cached = client.get("/snapshot", headers={'If-None-Match': response.headers['etag']})
+    assert cached.status_code == 304 and cached.content == b''
+    assert cached.headers['etag'] == snapshot.etag
+
+    identity = client.get("/snapshot", headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'content-encoding' not in identity.headers and identity.content == BODY
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from services import stock_service as stock_module
+from services.rate_limiter import TokenBucket
+from services.stock_service import PRIORITY_BACKGROUND, StockService
+
+def _service(rate: float, period: float, responses=None):
+    """StockService with one fast token bucket and a fake GLOBAL_QUOTE recording each call"""
+    service = StockService()
+    service._buckets = {'key': TokenBucket(rate, period)}
+    calls = []
+
+    async def fetch(api_key, symbol):
+        calls.append((symbol, time.monotonic()))
+        response = (responses or {}).get(symbol)
+        if response:
+            return response.pop(0)
+        return {symbol: {'symbol': symbol, 'price': 1.0}}, False
+
+    service._fetch_global_quote = fetch
+    return service, calls
+
+def test_calls_are_paced_by_the_token_bucket():
+    async def scenario():
+        service, calls = _service(rate=2, period=0.2)
+        quotes = await service.get_quotes(['A', 'B', 'C', 'D'], wait=2)
+        await service.close()
+        return quotes, calls
+
+    quotes, calls = asyncio.run(scenario())
+    assert len(quotes) == 4
+    # Two calls of burst, then one per 0.1s
+    assert calls[3][1] - calls[0][1] >= 0.15
+
+def test_user_requests_jump_ahead_of_list_refreshes():
+    async def scenario():
+        service, calls = _service(rate=1, period=0.05)
+        refresh = asyncio.ensure_future(service.get_quotes(['A', 'B', 'C', 'D'], PRIORITY_BACKGROUND, wait=2))
+        await asyncio.sleep(0.01)
+        quote = await service.get_quote('Z', timeout=2)
+        await refresh
+        await service.close()
+        return quote, [symbol for symbol, _ in calls]
+
+    quote, order = asyncio.run(scenario())
+    assert quote == {'symbol': 'Z', 'price': 1.0}
+    assert order.index('Z') < order.index('C')
+
+def test_throttled_calls_drain_the_bucket_and_retry(monkeypatch):
+    monkeypatch.setattr(stock_module.config, 'ALPHA_VANTAGE_MAX_RETRIES', 2)
+    throttled = ({}, True)
+
+    async def scenario():
+        service, calls = _service(rate=5, period=0.25, responses={'A': [throttled], 'B': [throttled] * 3})
+        a = await service.get_quote('A', timeout=2)
+        b = await service.get_quote('B', timeout=2)
+        await service.close()
+        return a, b, calls
+
+    a, b, calls = asyncio.run(scenario())
+    assert a == {'symbol': 'A', 'price': 1.0}
+    # Gave up after the retries
+    assert b is None and [symbol for symbol, _ in calls].count('B') == 3
+    # A full bucket allowed an immediate retry; a drained one waits for a refill
+    assert calls[1][1] - calls[0][1] >= 0.04
+
+def test_get_quote_falls_back_to_the_last_quote_on_timeout():
+    async def scenario():
+        service, calls = _service(rate=1, period=60)
+        service._buckets['key'].drain()
+        service._latest['AAPL'] = (time.monotonic(), {'symbol': 'AAPL', 'price': 189.0})
+        quote = await service.get_quote('aapl', timeout=0.05)
+        await service.close()
+        return quote, calls
+
+    quote, calls = asyncio.run(scenario())
+    assert quote == {'symbol': 'AAPL', 'price': 189.0}
+    assert calls == []
+
+def test_only_tracked_symbols_count_as_demand(monkeypatch):
+    monkeypatch.setattr(stock_module.config, 'STOCK_SYMBOLS', ['AAPL'])
+
+    async def scenario():
+        service, _ = _service(rate=10, period=1)
+        await service.get_quote('AAPL')
+        await service.get_quote('NOTREAL')
+        await service.close()
+        return service._demand
+
+    assert dict(asyncio.run(scenario())) == {'AAPL': 1}
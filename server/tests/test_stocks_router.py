@@ -0,0 +1,25 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import stocks
+from services.market_index import SymbolIndex
+
+def test_batch_quotes_only_a_few_untracked_symbols(monkeypatch):
+    looked_up = []
+
+    async def stock_index():
+        return SymbolIndex([{'symbol': 'AAPL', 'price': 190.0}])
+
+    async def stock_quote(symbol):
+        looked_up.append(symbol)
+        return {'symbol': symbol, 'price': 1.0}
+
+    monkeypatch.setattr(stocks.finance_service, 'get_stock_index', stock_index)
+    monkeypatch.setattr(stocks.finance_service, 'get_stock_quote', stock_quote)
+    monkeypatch.setattr(stocks.config, 'STOCK_BATCH_MAX_LOOKUPS', 2)
+    app = FastAPI()
+    app.include_router(stocks.router, prefix="/api/stocks")
+
+    response = TestClient(app).get("/api/stocks/batch", params={"symbols": "AAPL,AAA,BBB,CCC,DDD"}).json()
+    assert looked_up == ['AAA', 'BBB']
+    assert [stock['symbol'] for stock in response['data']] == ['AAPL', 'AAA', 'BBB']
+    assert response['missing'] == ['CCC', 'DDD']
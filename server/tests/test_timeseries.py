@@ -0,0 +1,77 @@
+import sys
+import time
+import numpy as np
+from services.timeseries import DAY_MS, Series, SeriesDatabase, lttb_indices
+
+STEP_MS = 300_000
+
+def _chart(start_ms: int, count: int, step_ms: int = STEP_MS) -> dict:
+    prices = [[start_ms + i * step_ms, 100.0 + np.sin(i / 10)] for i in range(count)]
+    return {
+        'prices': prices,
+        'market_caps': [[ts, value * 1e7] for ts, value in prices],
+        'total_volumes': [[ts, value * 1e6] for ts, value in prices]
+    }
+
+def _owns_columns(series: Series) -> bool:
+    return all(column.base is None and column.flags.c_contiguous for column in series._columns())
+
+def test_from_market_chart_owns_its_columns():
+    series = Series.from_market_chart(_chart(0, 288))
+    assert len(series) == 288
+    assert _owns_columns(series)
+
+def test_sizeof_counts_array_data():
+    series = Series.from_market_chart(_chart(0, 2880))
+    data = sum(column.nbytes for column in series._columns())
+    assert data == 2880 * 8 * 4
+    assert sys.getsizeof(series) >= data
+
+def test_extend_replaces_live_point_conforms_spacing_and_trims():
+    start = int(time.time() * 1000) - DAY_MS
+    series = Series.from_market_chart(_chart(start, 288))
+    last = series.last_timestamp
+    # One point too close to the last settled point, two on the grid, then a live point
+    tail = Series.from_market_chart({'prices': [
+        [last + 1000, 1.0], [last + STEP_MS, 2.0], [last + 2 * STEP_MS, 3.0], [last + 2 * STEP_MS + 5000, 4.0]
+    ]})
+    merged = series.extend(tail, STEP_MS, DAY_MS)
+
+    assert _owns_columns(merged)
+    assert merged.last_timestamp == last + 2 * STEP_MS + 5000
+    assert merged.prices[-1] == 4.0
+    assert merged.last_timestamp - merged.timestamps[0] <= DAY_MS
+    gaps = np.diff(merged.timestamps[:-1])
+    assert (gaps >= STEP_MS).all()
+
+def test_window_is_a_view_of_the_tier():
+    series = Series.from_market_chart(_chart(0, 2 * 288))
+    window = series.window(1)
+    assert np.shares_memory(window.prices, series.prices)
+    assert window.last_timestamp - window.timestamps[0] <= DAY_MS
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(1000, dtype=np.int64)
+    y = np.zeros(1000)
+    y[500] = 10.0
+    indices = lttb_indices(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 500 in indices
+    assert (np.diff(indices) > 0).all()
+
+def test_downsample_leaves_short_series_alone():
+    series = Series.from_market_chart(_chart(0, 10))
+    assert series.downsample(100) is series
+    assert len(series.downsample(5)) == 5
+
+def test_database_round_trip(tmp_path):
+    database = SeriesDatabase(str(tmp_path / 'series.db'))
+    series = Series.from_market_chart(_chart(0, 100))
+    database.save('bitcoin', 'minute', series)
+    loaded = database.load('bitcoin', 'minute')
+
+    assert _owns_columns(loaded)
+    assert np.array_equal(loaded.timestamps, series.timestamps)
+    assert np.array_equal(loaded.prices, series.prices)
+    assert database.load('bitcoin', 'daily') is None
@@ -0,0 +1,25 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import ws
+
+def _client():
+    app = FastAPI()
+    app.include_router(ws.router)
+    return TestClient(app)
+
+def test_invalid_json_gets_an_error_and_keeps_the_socket_open():
+    with _client().websocket_connect("/ws") as socket:
+        socket.send_text("{not json")
+        assert socket.receive_json() == {"type": "error", "message": "messages must be JSON"}
+        socket.send_json({"action": "subscribe", "channels": ["nope"]})
+        assert socket.receive_json() == {"type": "error", "message": "Unknown channel nope"}
+
+def test_failed_sender_closes_the_socket(monkeypatch):
+    async def failing_next_messages(subscriber):
+        raise RuntimeError("send failed")
+
+    monkeypatch.setattr(ws.broadcaster, "next_messages", failing_next_messages)
+    with _client().websocket_connect("/ws") as socket:
+        message = socket.receive()
+        assert message["type"] == "websocket.close"
+        assert message["code"] == 1011
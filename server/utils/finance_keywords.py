@@ -0,0 +1,69 @@
+FINANCE_KEYWORDS = [
+    # Markets and instruments
+    'stock', 'stocks', 'share', 'shares', 'equity', 'equities', 'bond', 'bonds', 'etf', 'etfs',
+    'index', 'indices', 'fund', 'funds', 'mutual fund', 'option', 'options', 'futures', 'commodity',
+    'commodities', 'forex', 'currency', 'currencies', 'exchange rate', 'gold', 'silver', 'oil',
+    'treasury', 'yield', 'yields', 'reit', 'ipo', 'derivative', 'derivatives',
+
+    # Crypto
+    'crypto', 'cryptocurrency', 'cryptocurrencies', 'blockchain', 'token', 'tokens', 'coin', 'coins',
+    'altcoin', 'stablecoin', 'defi', 'nft', 'mining', 'staking', 'wallet', 'halving',
+
+    # Trading and investing
+    'price', 'prices', 'market', 'markets', 'trading', 'trade', 'invest', 'investing', 'investment',
+    'investor', 'portfolio', 'dividend', 'dividends', 'valuation', 'market cap', 'volume', 'volatility',
+    'bull', 'bear', 'rally', 'crash', 'correction', 'short', 'long', 'leverage', 'margin', 'hedge',
+    'broker', 'nasdaq', 'dow', 's&p', 'sp500',
+
+    # Company fundamentals
+    'earnings', 'revenue', 'profit', 'eps', 'pe ratio', 'balance sheet', 'cash flow', 'guidance',
+    'buyback', 'merger', 'acquisition',
+
+    # Macro and banking
+    'inflation', 'deflation', 'interest rate', 'interest rates', 'fed', 'federal reserve', 'rate hike',
+    'rate cut', 'recession', 'gdp', 'unemployment', 'cpi', 'economy', 'economic', 'monetary', 'fiscal',
+    'bank', 'banking', 'loan', 'mortgage', 'credit', 'debt', 'savings', 'tax', 'taxes', 'finance',
+    'financial', 'money', 'usd', 'dollar', 'euro'
+]
+
+CRYPTO_ABBREVIATIONS = {
+    'btc': 'bitcoin',
+    'eth': 'ethereum',
+    'usdt': 'tether',
+    'bnb': 'binancecoin',
+    'sol': 'solana',
+    'xrp': 'ripple',
+    'usdc': 'usd-coin',
+    'ada': 'cardano',
+    'doge': 'dogecoin',
+    'trx': 'tron',
+    'matic': 'matic-network',
+    'ltc': 'litecoin',
+    'avax': 'avalanche-2',
+    'shib': 'shiba-inu',
+    'xlm': 'stellar',
+    'atom': 'cosmos',
+    'xmr': 'monero',
+    'bch': 'bitcoin-cash'
+}
+
+# Company names people use instead of tickers
+COMPANY_TICKERS = {
+    'apple': 'AAPL',
+    'microsoft': 'MSFT',
+    'google': 'GOOGL',
+    'alphabet': 'GOOGL',
+    'amazon': 'AMZN',
+    'tesla': 'TSLA',
+    'meta': 'META',
+    'facebook': 'META',
+    'nvidia': 'NVDA',
+    'jpmorgan': 'JPM',
+    'visa': 'V',
+    'walmart': 'WMT',
+    'netflix': 'NFLX',
+    'amd': 'AMD',
+    'intel': 'INTC'
+}
+
+CURRENCY_CODES = {'USD', 'EUR', 'GBP', 'JPY', 'CAD', 'AUD', 'CHF', 'CNY', 'NZD', 'INR', 'HKD', 'SGD', 'MXN'}
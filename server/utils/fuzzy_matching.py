@@ -1,76 +1,146 @@
-from fuzzywuzzy import fuzz, process
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import Levenshtein
+from fuzzywuzzy import fuzz
 from .finance_keywords import FINANCE_KEYWORDS, CRYPTO_ABBREVIATIONS
 
+class BKTree:
+    """Burkhard-Keller tree over edit distance for bounded typo lookups"""
+
+    def __init__(self, words: Iterable[str]):
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            return
+
+        node = self._root
+        while True:
+            distance = Levenshtein.distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All words within max_distance edits, as (distance, word)"""
+        if self._root is None:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            term, children = stack.pop()
+            distance = Levenshtein.distance(word, term)
+            if distance <= max_distance:
+                matches.append((distance, term))
+            # Triangle inequality: only subtrees in [d - max, d + max] can hold matches
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+class FinanceTermMatcher:
+    """Finance vocabulary matcher built once at import.
+
+    Exact keyword and abbreviation hits use single precompiled alternations;
+    typo matching searches a BK-tree with an edit-distance bound derived from
+    the fuzz.ratio threshold, so only a handful of candidates are scored.
+    Per-word results are memoized.
+    """
+
+    def __init__(self, keywords: List[str], abbreviations: Dict[str, str]):
+        self.abbreviations = {abbrev.lower(): full_name.lower() for abbrev, full_name in abbreviations.items()}
+        self.terms = sorted({term.lower() for term in keywords} | set(self.abbreviations) |
+                            set(self.abbreviations.values()))
+        self._term_set = frozenset(self.terms)
+        self._tree = BKTree(self.terms)
+
+        # Longest first so multi-word keywords win over their prefixes
+        self._keyword_pattern = _alternation(sorted({k.lower() for k in keywords}, key=len, reverse=True))
+        self._abbrev_pattern = _alternation(sorted(self.abbreviations, key=len, reverse=True))
+        self.match_word = lru_cache(maxsize=8192)(self._match_word)
+
+    def _match_word(self, word: str, threshold: int) -> Tuple[Optional[str], int]:
+        if word in self._term_set:
+            return word, 100
+
+        # fuzz.ratio >= t bounds the indel distance by r * (len(a) + len(b)) with r = 1 - t/100,
+        # which in turn bounds the candidate length and the Levenshtein distance to search
+        r = 1 - threshold / 100
+        if r >= 1:
+            max_length = max(len(term) for term in self.terms)
+        else:
+            max_length = len(word) * (1 + r) / (1 - r)
+        max_distance = int(r * (len(word) + max_length))
+
+        best_term, best_score = None, 0
+        for _, term in self._tree.search(word, max_distance):
+            score = fuzz.ratio(word, term)
+            if score > best_score or (score == best_score and best_term is not None and term < best_term):
+                best_term, best_score = term, score
+
+        if best_term is not None and best_score >= threshold:
+            return best_term, best_score
+        return None, 0
+
+    def expand_abbreviations(self, text: str) -> str:
+        return self._abbrev_pattern.sub(lambda match: self.abbreviations[match.group(0)], text)
+
+    def has_keyword(self, text: str) -> bool:
+        return self._keyword_pattern.search(text) is not None
+
+    def has_abbreviation(self, text: str) -> bool:
+        return self._abbrev_pattern.search(text) is not None
+
+def _alternation(words: List[str]) -> re.Pattern:
+    return re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+
+# Built once at import time
+matcher = FinanceTermMatcher(FINANCE_KEYWORDS, CRYPTO_ABBREVIATIONS)
+
 def fuzzy_match_finance_term(query_word: str, threshold: int = 70) -> tuple:
     """Use fuzzy matching to find the best match for a finance term"""
-    all_finance_terms = []
-    
-    # Add finance keywords
-    all_finance_terms.extend(FINANCE_KEYWORDS)
-    
-    # Add crypto abbreviations
-    all_finance_terms.extend(CRYPTO_ABBREVIATIONS.keys())
-    all_finance_terms.extend(CRYPTO_ABBREVIATIONS.values())
-    
-    # Remove duplicates and convert to lowercase
-    all_finance_terms = list(set([term.lower() for term in all_finance_terms]))
-    
-    # Use fuzzy matching to find the best match
-    best_match = process.extractOne(query_word.lower(), all_finance_terms, scorer=fuzz.ratio)
-    
-    if best_match and best_match[1] >= threshold:
-        return best_match[0], best_match[1]
-    
-    return None, 0
+    return matcher.match_word(query_word.lower(), threshold)
 
+@lru_cache(maxsize=4096)
 def normalize_query(query: str) -> str:
     """Enhanced normalization with fuzzy matching for typos"""
-    import re
-    
     query_lower = query.lower().strip()
     words = query_lower.split()
     normalized_words = []
-    
+
     for word in words:
         # Clean the word (remove punctuation)
         clean_word = re.sub(r'[^\w]', '', word)
-        
+
         if len(clean_word) > 2:  # Only process words longer than 2 characters
             # Try fuzzy matching for finance terms
-            matched_term, confidence = fuzzy_match_finance_term(clean_word, threshold=75)
-            
+            matched_term, confidence = matcher.match_word(clean_word, 75)
+
             if matched_term and confidence >= 75:
                 normalized_words.append(matched_term)
             else:
                 normalized_words.append(clean_word)
         else:
             normalized_words.append(clean_word)
-    
+
     # Join words back
     normalized_query = ' '.join(normalized_words)
-    
+
     # Replace crypto abbreviations with full names
-    for abbrev, full_name in CRYPTO_ABBREVIATIONS.items():
-        pattern = r'\b' + re.escape(abbrev) + r'\b'
-        normalized_query = re.sub(pattern, full_name, normalized_query)
-    
-    return normalized_query
+    return matcher.expand_abbreviations(normalized_query)
 
 def is_finance_related(query: str) -> bool:
     """Check if query is finance-related"""
     query_lower = query.lower()
-    normalized_query = normalize_query(query)
-    
-    # Check against finance keywords
-    for keyword in FINANCE_KEYWORDS:
-        if re.search(r'\b' + re.escape(keyword) + r'\b', query_lower):
-            return True
-        if re.search(r'\b' + re.escape(keyword) + r'\b', normalized_query):
-            return True
-    
-    # Check for crypto abbreviations
-    for abbrev in CRYPTO_ABBREVIATIONS.keys():
-        if re.search(r'\b' + re.escape(abbrev) + r'\b', query_lower):
-            return True
-    
-    return False
\ No newline at end of file
+    if matcher.has_keyword(query_lower) or matcher.has_abbreviation(query_lower):
+        return True
+    return matcher.has_keyword(normalize_query(query))
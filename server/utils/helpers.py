@@ -0,0 +1,36 @@
+import json
+from typing import Any, List
+from fastapi import Request, Response
+
+def parse_symbols(raw: str, max_symbols: int = 100) -> List[str]:
+    """Split a comma-separated symbol list into unique upper-case symbols, preserving order"""
+    symbols = []
+    seen = set()
+    for part in raw.split(','):
+        symbol = part.strip().upper()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            symbols.append(symbol)
+    if len(symbols) > max_symbols:
+        raise ValueError(f"At most {max_symbols} symbols per request")
+    return symbols
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def snapshot_response(request: Request, snapshot) -> Response:
+    """Serve a pre-encoded snapshot, answering conditional requests with 304 Not Modified"""
+    headers = {
+        'ETag': snapshot.etag,
+        'Last-Modified': snapshot.last_modified,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if snapshot.not_modified(request.headers.get('if-none-match'), request.headers.get('if-modified-since')):
+        return Response(status_code=304, headers=headers)
+
+    encoding = snapshot.negotiate(request.headers.get('accept-encoding', ''))
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(snapshot.encoded(encoding), media_type='application/json', headers=headers)
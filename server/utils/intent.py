@@ -0,0 +1,147 @@
+import re
+from typing import Dict, List
+from config import config
+from .finance_keywords import COMPANY_TICKERS, CRYPTO_ABBREVIATIONS, CURRENCY_CODES
+from .fuzzy_matching import fuzzy_match_finance_term
+
+INTENT_PRICE = 'price'
+INTENT_CHART = 'chart'
+INTENT_NEWS = 'news'
+INTENT_EXPLANATION = 'explanation'
+
+COIN_IDS = frozenset(CRYPTO_ABBREVIATIONS.values())
+# Names whose CoinGecko id differs from the name itself
+COIN_ALIASES = {'binance': 'binancecoin', 'shiba': 'shiba-inu', 'polygon': 'matic-network', 'avalanche': 'avalanche-2'}
+
+CRYPTO_TERMS = frozenset({'crypto', 'cryptocurrency', 'cryptocurrencies', 'coin', 'coins', 'altcoin', 'altcoins',
+                          'token', 'tokens', 'defi', 'blockchain', 'stablecoin', 'stablecoins'})
+STOCK_TERMS = frozenset({'stock', 'stocks', 'share', 'shares', 'equity', 'equities', 'ticker', 'nasdaq', 'dow', 'sp500'})
+FOREX_TERMS = frozenset({'forex', 'fx', 'currency', 'currencies', 'exchange'})
+
+NEWS_TERMS = frozenset({'news', 'headline', 'headlines', 'announcement', 'announcements', 'happening', 'happened'})
+CHART_TERMS = frozenset({'chart', 'charts', 'graph', 'history', 'historical', 'trend', 'trends', 'performance',
+                         'performed'})
+PRICE_TERMS = frozenset({'price', 'prices', 'worth', 'cost', 'quote', 'quotes', 'trading', 'value', 'rate', 'rates',
+                         'much'})
+# Words that turn a price lookup into a question needing research and the LLM
+EXPLANATION_TERMS = frozenset({'why', 'should', 'explain', 'analysis', 'analyze', 'predict', 'prediction', 'forecast',
+                               'outlook', 'compare', 'vs', 'versus', 'recommend', 'buy', 'sell', 'risk', 'future',
+                               'will', 'could', 'good', 'bad', 'best'})
+
+# Coin names and symbols that are also everyday words ("atom", "ripple effect"); they only count as coins
+# in a question that also mentions another coin or something about crypto, prices or markets
+AMBIGUOUS_COIN_WORDS = frozenset({'tether', 'ripple', 'tron', 'polygon', 'avalanche', 'stellar', 'cosmos', 'atom',
+                                  'sol', 'ada'})
+COIN_CONTEXT_TERMS = CRYPTO_TERMS | frozenset({'price', 'prices', 'worth', 'quote', 'trading', 'trade', 'chart',
+                                               'market', 'markets', 'buy', 'sell', 'invest', 'investing', 'staking',
+                                               'wallet', 'usd'})
+
+_WORD = re.compile(r"\$?[A-Za-z][A-Za-z0-9&.-]*")
+_PAIR = re.compile(r'\b([A-Za-z]{3})\s*/\s*([A-Za-z]{3})\b|\b([A-Z]{3})([A-Z]{3})\b|'
+                   r'\b([A-Za-z]{3})\s+(?:to|in|vs)\s+([A-Za-z]{3})\b')
+
+def _coin_for(word: str) -> str:
+    """CoinGecko id a lower-case word refers to, or '' if none"""
+    if word in COIN_IDS:
+        return word
+    if word in CRYPTO_ABBREVIATIONS:
+        return CRYPTO_ABBREVIATIONS[word]
+    if word in COIN_ALIASES:
+        return COIN_ALIASES[word]
+    # Typo correction only for longer words of about the same length, so "method" never
+    # becomes "eth" and "together" never becomes "tether"
+    if len(word) >= 5:
+        term, _ = fuzzy_match_finance_term(word, 85)
+        if term in COIN_IDS and abs(len(term) - len(word)) <= 1:
+            return term
+    return ''
+
+def _forex_pairs(query: str) -> List[str]:
+    pairs = []
+    for match in _PAIR.finditer(query):
+        base, quote = [group.upper() for group in match.groups() if group]
+        pair = f"{base}/{quote}"
+        if base != quote and base in CURRENCY_CODES and quote in CURRENCY_CODES and pair not in pairs:
+            pairs.append(pair)
+    return pairs
+
+def classify_query(query: str) -> Dict:
+    """Classify a finance question into an intent and the entities it mentions.
+
+    Returns a dict with 'intent' (price, chart, news or explanation), 'coins'
+    (CoinGecko ids), 'tickers' (stock symbols), 'forex_pairs' ('EUR/USD'
+    style) and 'asset_classes' (crypto, stocks, forex) the query touches.
+
+    Tickers are only taken from cashtags ($AAPL), company names and the
+    tracked STOCK_SYMBOLS, never from arbitrary all-caps words, since each
+    unknown ticker can cost a rate-limited quote lookup.
+    """
+    words = _WORD.findall(query)
+    lowered = {word.lower().lstrip('$') for word in words}
+    stock_symbols = set(config.STOCK_SYMBOLS)
+
+    forex_pairs = _forex_pairs(query)
+    pair_codes = {code for pair in forex_pairs for code in pair.split('/')}
+
+    coins: List[str] = []
+    ambiguous_coins: List[str] = []
+    tickers: List[str] = []
+    for word in words:
+        lower = word.lower().lstrip('$')
+        upper = lower.upper()
+        if upper in pair_codes:
+            continue
+
+        if word.startswith('$') and len(upper) <= 5 and upper.isalpha():
+            # Cashtags are explicit tickers, unless they name a coin
+            entity = CRYPTO_ABBREVIATIONS.get(lower)
+            if entity:
+                coins.append(entity)
+            else:
+                tickers.append(upper)
+            continue
+
+        coin = _coin_for(lower)
+        if coin:
+            # Typo-corrected words ("ripples") are as ambiguous as the coin name they were corrected to
+            corrected = coin != lower and lower not in CRYPTO_ABBREVIATIONS and lower not in COIN_ALIASES
+            if lower in AMBIGUOUS_COIN_WORDS or (corrected and coin in AMBIGUOUS_COIN_WORDS):
+                ambiguous_coins.append(coin)
+            else:
+                coins.append(coin)
+        elif lower in COMPANY_TICKERS:
+            tickers.append(COMPANY_TICKERS[lower])
+        elif upper in stock_symbols and (word.isupper() or len(upper) >= 3):
+            tickers.append(upper)
+
+    if ambiguous_coins and (coins or lowered & COIN_CONTEXT_TERMS):
+        coins.extend(ambiguous_coins)
+    coins = list(dict.fromkeys(coins))
+    tickers = list(dict.fromkeys(tickers))
+
+    asset_classes = []
+    if coins or lowered & CRYPTO_TERMS:
+        asset_classes.append('crypto')
+    if tickers or lowered & STOCK_TERMS:
+        asset_classes.append('stocks')
+    if forex_pairs or lowered & FOREX_TERMS:
+        asset_classes.append('forex')
+
+    if lowered & NEWS_TERMS:
+        intent = INTENT_NEWS
+    elif lowered & EXPLANATION_TERMS:
+        intent = INTENT_EXPLANATION
+    elif lowered & CHART_TERMS:
+        intent = INTENT_CHART
+    elif lowered & PRICE_TERMS and (coins or tickers or forex_pairs):
+        intent = INTENT_PRICE
+    else:
+        intent = INTENT_EXPLANATION
+
+    return {
+        'intent': intent,
+        'coins': coins,
+        'tickers': tickers,
+        'forex_pairs': forex_pairs,
+        'asset_classes': asset_classes
+    }